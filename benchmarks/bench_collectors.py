@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Yalla Collector and Renderer Benchmark
+Measures the hot paths against synthetic hosts of 10, 10k and 100k processes and sockets
+
+The monitors read from the deterministic simulated host (yalla.modules.simulator)
+with churn switched off, which also keeps the /proc backend out of the way,
+so numbers are comparable across machines and releases. Results are
+written as JSON for tracking.
+
+Usage:
+  python benchmarks/bench_collectors.py [--scales 10,10000,100000] [--min-time S] [--out FILE]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yalla._version import __version__
+from yalla.modules import network_monitor, system_monitor
+from yalla.modules.datasource import set_source
+from yalla.modules.metric_history import MetricHistory
+from yalla.modules.screen import Screen
+from yalla.modules.simulator import SimulatedHost
+from yalla.modules.snapshot import Snapshot
+from yalla.modules.ui_renderer import create_progress_bar, render_dashboard
+
+DEFAULT_SCALES = (10, 10_000, 100_000)
+
+
+def use_host(processes, sockets):
+    """Point the monitors at a simulated host that stays the same while measuring"""
+    set_source(SimulatedHost(processes=processes, sockets=sockets, churn=0))
+
+
+def measure(func, min_time, min_runs=3):
+    """Run `func` for at least `min_time` seconds and `min_runs` runs; per-run cost in microseconds"""
+    func()  # Warm up caches and, for the process table, track every process once
+    runs = 0
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    fastest = float('inf')
+    while runs < min_runs or time.perf_counter() - wall_start < min_time:
+        started = time.perf_counter()
+        func()
+        fastest = min(fastest, time.perf_counter() - started)
+        runs += 1
+    wall = (time.perf_counter() - wall_start) / runs * 1e6
+    cpu = (time.process_time() - cpu_start) / runs * 1e6
+    return {'runs': runs, 'wall_us': round(wall, 2), 'cpu_us': round(cpu, 2), 'min_us': round(fastest * 1e6, 2)}
+
+
+def bench_collectors(scale, min_time):
+    """Collector cost with `scale` processes and `scale` sockets"""
+    use_host(scale, scale)
+    cases = (
+        ('get_system_stats', system_monitor.get_system_stats),
+        ('get_network_stats', network_monitor.get_network_stats),
+        ('get_connection_state_counts', network_monitor.get_connection_state_counts),
+        ('get_top_processes', lambda: system_monitor.get_top_processes(5)),
+    )
+    return [dict(name=name, scale=scale, **measure(func, min_time)) for name, func in cases]
+
+
+def bench_rendering(min_time):
+    """Frame-render cost for a typical snapshot; independent of host size"""
+    use_host(100, 100)
+    system_data = system_monitor.get_system_stats()
+    system_data.update(system_monitor.collect_top_processes())
+    network_monitor.collect_io_stats()
+    network_data = network_monitor.get_network_stats()
+
+    history = MetricHistory()
+    for tick in range(60):
+        history.record_snapshot(Snapshot(float(tick), system_data, network_data))
+    screen = Screen(io.StringIO())
+
+    def full_frame():
+        screen.stream.seek(0)
+        screen.invalidate()
+        render_dashboard(system_data, network_data, screen, history)
+
+    def unchanged_frame():
+        screen.stream.seek(0)
+        render_dashboard(system_data, network_data, screen, history)
+
+    def progress_bars():
+        for value in range(0, 101, 10):
+            create_progress_bar(value, 100, '')
+
+    return [
+        dict(name='render_dashboard_full', **measure(full_frame, min_time)),
+        dict(name='render_dashboard_unchanged', **measure(unchanged_frame, min_time)),
+        dict(name='create_progress_bar_x11', **measure(progress_bars, min_time)),
+    ]
+
+
+def main():
+    """Run the benchmarks and print or write the results"""
+    parser = argparse.ArgumentParser(description='Benchmark yalla collectors and rendering')
+    parser.add_argument('--scales', default=','.join(str(s) for s in DEFAULT_SCALES),
+                        help='Comma-separated process/socket counts (default: 10,10000,100000)')
+    parser.add_argument('--min-time', type=float, default=0.5, metavar='SECONDS',
+                        help='Minimum measuring time per case (default: 0.5)')
+    parser.add_argument('--out', metavar='FILE', help='Write JSON results to FILE instead of stdout')
+    args = parser.parse_args()
+
+    results = []
+    for scale in (int(s) for s in args.scales.split(',') if s):
+        results.extend(bench_collectors(scale, args.min_time))
+    results.extend(bench_rendering(args.min_time))
+
+    report = {
+        'yalla': __version__,
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.time(),
+        'results': results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        for result in results:
+            scale = f"@{result['scale']}" if 'scale' in result else ''
+            print(f"{result['name'] + scale:>36}: {result['cpu_us']:12.1f} us CPU  ({result['runs']} runs)")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Yalla procfs Benchmark
+Compares the per-tick cost of the native /proc backend against psutil
+
+Usage:
+  python benchmarks/bench_procfs.py [--ticks N] [--json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psutil
+from yalla.modules.procfs import ProcfsBackend
+
+
+def psutil_tick():
+    """One tick of the metrics the procfs backend replaces, via psutil"""
+    psutil.cpu_percent(interval=None)
+    psutil.virtual_memory()
+    psutil.getloadavg()
+    psutil.net_io_counters(pernic=True)
+
+
+def make_procfs_tick(backend):
+    """One tick of the same metrics via the procfs backend"""
+    def tick():
+        backend.cpu_percent(interval=None)
+        backend.virtual_memory()
+        backend.load_average()
+        backend.net_io_counters()
+    return tick
+
+
+def measure(tick, ticks):
+    """Average wall and CPU time per tick, in microseconds"""
+    tick()  # warm up
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    for _ in range(ticks):
+        tick()
+    wall = (time.perf_counter() - wall_start) / ticks * 1e6
+    cpu = (time.process_time() - cpu_start) / ticks * 1e6
+    return {'wall_us': round(wall, 2), 'cpu_us': round(cpu, 2)}
+
+
+def main():
+    """Run the benchmark and print the results"""
+    parser = argparse.ArgumentParser(description='Compare procfs and psutil collection cost')
+    parser.add_argument('--ticks', type=int, default=2000, help='Ticks to average over')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args()
+
+    if not sys.platform.startswith('linux'):
+        print("The procfs backend is only available on Linux")
+        return 1
+
+    backend = ProcfsBackend()
+    results = {
+        'ticks': args.ticks,
+        'psutil': measure(psutil_tick, args.ticks),
+        'procfs': measure(make_procfs_tick(backend), args.ticks),
+    }
+    backend.close()
+    results['speedup'] = round(results['psutil']['cpu_us'] / max(results['procfs']['cpu_us'], 0.01), 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for name in ('psutil', 'procfs'):
+            print(f"{name:>7}: {results[name]['wall_us']:9.1f} us wall  {results[name]['cpu_us']:9.1f} us CPU per tick")
+        print(f"speedup: {results['speedup']}x")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import threading
+
+from yalla.modules.collector import BackgroundCollector, CollectorScheduler
+from yalla.modules.registry import CollectorSpec
+
+
+def make_collector():
+    counter = {'cpu': 0}
+
+    def cpu():
+        counter['cpu'] += 1
+        return {'cpu_percent': float(counter['cpu'])}
+
+    scheduler = CollectorScheduler([
+        CollectorSpec('cpu', 'system', cpu, 1.0, 'low'),
+        CollectorSpec('io_stats', 'network', lambda: {'io_rates': {}}, 1.0, 'low'),
+        CollectorSpec('connections', 'network', lambda: {'connections': []}, 1.0, 'high'),
+    ])
+    return BackgroundCollector(scheduler)
+
+
+def test_subscribers_get_each_pass_and_what_ran():
+    collector = make_collector()
+    passes = []
+    collector.subscribe(lambda snapshot, ran: passes.append((snapshot, ran)))
+    try:
+        assert collector.snapshot is None
+        snapshot = collector.collect_once()
+        assert snapshot is collector.snapshot
+        assert snapshot.system == {'cpu_percent': 1.0}
+        assert snapshot.network == {'io_rates': {}, 'connections': []}
+        # One callback per pass, after every cost tier has been published
+        assert passes == [(snapshot, {'cpu', 'io_stats', 'connections'})]
+
+        # Nothing is due again until the interval passes: no new snapshot, no callback
+        assert collector.collect_once() is snapshot
+        assert len(passes) == 1
+    finally:
+        collector.stop()
+
+
+def test_failing_subscriber_does_not_stop_the_others():
+    collector = make_collector()
+    seen = []
+
+    def broken(snapshot, ran):
+        raise RuntimeError('boom')
+
+    collector.subscribe(broken)
+    collector.subscribe(lambda snapshot, ran: seen.append(ran))
+    try:
+        collector.collect_once()
+        assert seen == [{'cpu', 'io_stats', 'connections'}]
+    finally:
+        collector.stop()
+
+
+def test_thread_publishes_until_stopped():
+    collector = make_collector()
+    published = threading.Event()
+    collector.subscribe(lambda snapshot, ran: published.set())
+    collector.start()
+    try:
+        assert published.wait(5)
+        assert collector.snapshot.system['cpu_percent'] >= 1.0
+        thread = collector._thread
+        assert thread.is_alive()
+    finally:
+        collector.stop()
+    assert not thread.is_alive()
+    assert collector._thread is None
+
+
+def test_each_collector_keeps_its_own_cadence():
+    calls = []
+
+    def spec(name, interval, cost='low'):
+        return CollectorSpec(name, 'system', lambda: calls.append(name) or {name: len(calls)}, interval, cost)
+
+    scheduler = CollectorScheduler([spec('cpu', 1.5), spec('disk', 10.0, 'medium'), spec('cpu_count', None)])
+    try:
+        ticks = [i * 1.5 for i in range(10)]  # 0 .. 13.5 s
+        ran = [scheduler.run_due(now=now) for now in ticks]
+        assert all('cpu' in names for names in ran)
+        # The 10 s collector is skipped on the 1.5 s ticks in between
+        assert [now for now, names in zip(ticks, ran) if 'disk' in names] == [0.0, 10.5]
+        # A collector without an interval runs once and is never due again
+        assert calls.count('cpu_count') == 1
+        assert scheduler.next_due() == 15.0
+    finally:
+        scheduler.close()
+
+
+def test_run_due_can_run_one_cost_tier_at_a_time():
+    scheduler = CollectorScheduler([
+        CollectorSpec('cpu', 'system', lambda: {'cpu_percent': 1.0}, 1.0, 'low'),
+        CollectorSpec('top_processes', 'system', lambda: {'top_processes': []}, 1.0, 'high'),
+    ])
+    try:
+        assert scheduler.run_due(now=0.0, cost='low') == ['cpu']
+        assert scheduler.sections['system'] == {'cpu_percent': 1.0}
+        assert scheduler.run_due(now=0.0, cost='high') == ['top_processes']
+        assert scheduler.run_due(now=0.5) == []
+    finally:
+        scheduler.close()
@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+import pytest
+
+from yalla.modules import daemon
+from yalla.modules.snapshot import Snapshot
+
+pytestmark = pytest.mark.skipif(not daemon.HAS_UNIX_SOCKETS, reason='needs Unix domain sockets')
+
+
+@pytest.fixture
+def server(tmp_path):
+    path = str(tmp_path / 'yalla.sock')
+    cache = daemon.SnapshotCache()
+    server = daemon.make_server(path, cache)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path, cache
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetch_returns_latest_snapshot(server):
+    path, cache = server
+    assert daemon.fetch_snapshot(path) is None
+
+    snapshot = Snapshot(time.time(), {'cpu_percent': 12.5, 'load_avg': [0.5, 0.25, 0.75]},
+                        {'io_rates': {'lo': {'bytes_recv': 10.0}}})
+    cache.update(snapshot)
+    assert daemon.fetch_snapshot(path) == snapshot
+
+
+def test_stale_snapshot_is_ignored(server):
+    path, cache = server
+    cache.update(Snapshot(time.time() - 60, {'cpu_percent': 1.0}, {}))
+    assert daemon.fetch_snapshot(path, max_age=10) is None
+
+
+def test_second_daemon_refuses_live_socket(server):
+    path, cache = server
+    with pytest.raises(OSError):
+        daemon.make_server(path, daemon.SnapshotCache())
+
+
+def test_missing_daemon_falls_back(tmp_path):
+    assert daemon.fetch_snapshot(str(tmp_path / 'missing.sock')) is None
+
+
+def test_socket_of_another_user_is_not_trusted(server, monkeypatch):
+    path, cache = server
+    cache.update(Snapshot(time.time(), {'cpu_percent': 1.0}, {}))
+    assert daemon.fetch_snapshot(path) is not None
+    monkeypatch.setattr(daemon, 'peer_uid', lambda sock, path: os.getuid() + 1)
+    assert daemon.fetch_snapshot(path) is None
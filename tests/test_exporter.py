@@ -0,0 +1,50 @@
+import threading
+import urllib.request
+
+from yalla.modules.exporter import MetricsCache, make_server, render_openmetrics
+from yalla.modules.snapshot import Snapshot
+
+SNAPSHOT = Snapshot(1_700_000_000.0,
+                    {'cpu_percent': 12.5, 'load_avg': (0.5, 0.25, 0.125)},
+                    {'io_stats': {'eth0': {'bytes_recv': 300, 'bytes_sent': 100}},
+                     'connection_states': {'ESTABLISHED': 3}},
+                    {})
+
+
+def test_both_formats():
+    openmetrics = render_openmetrics(SNAPSHOT).decode()
+    assert '# TYPE yalla_build info\n' in openmetrics
+    assert 'yalla_build_info{version="' in openmetrics
+    assert '# TYPE yalla_network_receive_bytes counter\n' in openmetrics
+    assert 'yalla_network_receive_bytes_total{interface="eth0"} 300\n' in openmetrics
+    assert openmetrics.endswith('# EOF\n')
+
+    text = render_openmetrics(SNAPSHOT, openmetrics=False).decode()
+    assert ' info\n' not in text and '# EOF' not in text
+    assert '# TYPE yalla_build_info gauge\n' in text
+    assert '# TYPE yalla_network_receive_bytes_total counter\n' in text
+    assert 'yalla_network_receive_bytes_total{interface="eth0"} 300\n' in text
+    # Every sample belongs to the family declared for it
+    families = {line.split()[2] for line in text.splitlines() if line.startswith('# TYPE')}
+    for line in text.splitlines():
+        if not line.startswith('#'):
+            assert line.split('{')[0].split()[0] in families
+
+
+def test_content_negotiation():
+    cache = MetricsCache()
+    cache.update(SNAPSHOT)
+    server = make_server('127.0.0.1:0', cache)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'http://127.0.0.1:{server.server_address[1]}/metrics'
+    try:
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+            assert b'# EOF' not in response.read()
+        request = urllib.request.Request(url, headers={'Accept': 'application/openmetrics-text; version=1.0.0'})
+        with urllib.request.urlopen(request, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('application/openmetrics-text')
+            assert response.read().endswith(b'# EOF\n')
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,96 @@
+import asyncio
+import re
+import threading
+import time
+
+from yalla.modules.agent import AgentServer, apply_frame, delta_frame, full_frame, parse_target
+from yalla.modules.fleet import HostState, build_fleet, follow_host
+from yalla.modules.snapshot import Snapshot
+
+
+def sample(timestamp, cpu, recv):
+    return Snapshot(timestamp,
+                    {'cpu_percent': cpu, 'memory_used': 512, 'memory_total': 1024, 'load_avg': [0.5, 0.25, 0.75]},
+                    {'io_rates': {'eth0': {'bytes_recv': recv, 'bytes_sent': 1.0}, 'lo': {'bytes_recv': 0.0, 'bytes_sent': 0.0}}})
+
+
+def test_delta_frames_carry_only_changes():
+    first, second = sample(1.0, 10.0, 100.0), sample(2.0, 10.0, 250.0)
+    del second.system['load_avg']
+    delta = delta_frame(first, second)
+    assert delta['network'] == {'io_rates': {'eth0': {'bytes_recv': 250.0}}}
+    assert delta['system'] == {'__removed__': ['load_avg']}
+    assert apply_frame(apply_frame(None, full_frame(first, 'web1')), delta) == second
+
+
+def test_parse_target():
+    assert parse_target('web1') == ('web1', 9185)
+    assert parse_target('web1:9200') == ('web1', 9200)
+    assert parse_target('[::1]:9200') == ('::1', 9200)
+    assert parse_target(':9200') == ('', 9200)
+
+
+def start_agent(port=0):
+    server = AgentServer(('127.0.0.1', port), host_name='test')
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_agent(server):
+    server.shutdown()
+    server.server_close()
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        await asyncio.sleep(0.02)
+
+
+def test_fleet_follows_reconnects_and_marks_stale():
+    server = start_agent()
+    port = server.server_address[1]
+    state = HostState(f'127.0.0.1:{port}')
+
+    async def scenario():
+        nonlocal server
+        task = asyncio.ensure_future(follow_host(state, stale_after=0.5, backoff=(0.05, 0.2)))
+        try:
+            server.publish(sample(1.0, 10.0, 100.0))
+            await wait_for(lambda: state.snapshot == sample(1.0, 10.0, 100.0))
+            server.publish(sample(2.0, 20.0, 100.0))
+            await wait_for(lambda: state.snapshot == sample(2.0, 20.0, 100.0))
+            assert state.status() == 'live'
+
+            # The agent stops reporting: the host goes stale but keeps its data
+            stop_agent(server)
+            await wait_for(lambda: state.status() == 'stale')
+            assert state.snapshot.system['cpu_percent'] == 20.0
+
+            # A new agent on the same port is picked up with a fresh full frame
+            server = start_agent(port)
+            server.publish(sample(3.0, 30.0, 100.0))
+            await wait_for(lambda: state.status() == 'live' and state.snapshot.timestamp == 3.0)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        stop_agent(server)
+
+
+def test_grid_shows_every_host_with_its_status():
+    live, stale, down = HostState('web1'), HostState('web2'), HostState('db1')
+    now = time.monotonic()
+    for state, seen in ((live, now), (stale, now - 30)):
+        state.receive(full_frame(sample(1.0, 50.0, 10.0), state.name))
+        state.last_seen = seen
+        state.connected = True
+
+    text = re.sub(r'\033\[[0-9;]*m', '', '\n'.join(build_fleet([live, stale, down], now, width=120)))
+    assert '3 hosts: 1 live, 1 stale, 1 down' in text
+    assert 'web1 live' in text and 'web2 STALE 30s' in text and 'db1 DOWN' in text
+    assert text.count('CPU ') == 2
@@ -0,0 +1,139 @@
+import json
+import time
+
+from yalla.modules import history_store
+from yalla.modules.history_store import HistoryStore, choose_tier, connect, query, run_history, snapshot_rows
+from yalla.modules.snapshot import Snapshot
+
+START = 1_700_006_400  # A whole hour
+
+
+def snapshot(ts, cpu):
+    rates = {'eth0': {'bytes_sent': 100.0, 'bytes_recv': 300.0, 'packets_sent': 1.0, 'packets_recv': 2.0}}
+    return Snapshot(ts, {'cpu_percent': cpu, 'memory_percent': 50.0}, {'io_rates': rates})
+
+
+def rows(path, table, metric):
+    conn = connect(path, readonly=True)
+    try:
+        return conn.execute(f'SELECT * FROM {table} JOIN metrics ON metrics.id = metric '
+                            'WHERE name = ? ORDER BY ts', (metric,)).fetchall()
+    finally:
+        conn.close()
+
+
+def test_samples_are_batched_and_rolled_up(tmp_path):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path, flush_interval=3600)
+    # Two hours at 10 s; CPU counts up from 0 within every minute
+    for ts in range(START, START + 7200, 10):
+        store.record_snapshot(snapshot(ts, float(ts % 60)))
+    store.flush(now=START + 7200)
+
+    assert len(rows(path, 'raw', 'cpu_percent')) == 720
+    minutes = rows(path, 'rollup_1m', 'cpu_percent')
+    assert len(minutes) == 120
+    assert minutes[0][1:6] == (START, 6, 0.0, 25.0, 50.0)
+    hours = rows(path, 'rollup_1h', 'cpu_percent')
+    assert [row[1:6] for row in hours] == [(START, 360, 0.0, 25.0, 50.0), (START + 3600, 360, 0.0, 25.0, 50.0)]
+    assert rows(path, 'rollup_1h', 'net.bytes_recv')[0][3:6] == (300.0, 300.0, 300.0)
+
+    # Nothing is rolled up twice, and the partial minute waits for the next flush
+    store.record_snapshot(snapshot(START + 7200, 10.0))
+    store.flush(now=START + 7230)
+    assert len(rows(path, 'rollup_1m', 'cpu_percent')) == 120
+    store.close()
+
+
+def test_only_fields_of_collectors_that_ran_are_stored():
+    pass_ = Snapshot(START, {'cpu_percent': 5.0, 'memory_percent': 50.0, 'disk_percent': 30.0,
+                             'load_avg': (1.0, 0.5, 0.25)}, {})
+    assert [row[0] for row in snapshot_rows(pass_, {'cpu'})] == ['cpu_percent']
+    names = [row[0] for row in snapshot_rows(pass_, {'disk', 'load_avg'})]
+    assert names == ['disk_percent', 'load_1', 'load_5', 'load_15']
+    assert len(snapshot_rows(pass_)) == 6
+
+
+def test_retention(tmp_path, monkeypatch):
+    path = str(tmp_path / 'history.db')
+    monkeypatch.setattr(history_store, 'TIERS', (
+        ('raw', 'raw', 1, 600), ('1m', 'rollup_1m', 60, 3600), ('1h', 'rollup_1h', 3600, 86400)))
+    store = HistoryStore(path)
+    for ts in range(START, START + 7200, 30):
+        store.record_snapshot(snapshot(ts, 1.0))
+    store.flush(now=START + 7200)
+    store.close()
+
+    assert rows(path, 'raw', 'cpu_percent')[0][1] == START + 6600
+    assert rows(path, 'rollup_1m', 'cpu_percent')[0][1] == START + 3600
+    assert len(rows(path, 'rollup_1h', 'cpu_percent')) == 2
+
+
+def test_query_fills_pruned_periods_from_coarser_tiers(tmp_path, monkeypatch):
+    path = str(tmp_path / 'history.db')
+    monkeypatch.setattr(history_store, 'TIERS', (
+        ('raw', 'raw', 1, 600), ('1m', 'rollup_1m', 60, 3600), ('1h', 'rollup_1h', 3600, 86400)))
+    store = HistoryStore(path)
+    for ts in range(START, START + 7200, 30):
+        store.record_snapshot(snapshot(ts, 1.0))
+    store.flush(now=START + 7200)
+    store.close()
+
+    conn = connect(path, readonly=True)
+    try:
+        points = query(conn, 'cpu_percent', START, START + 7200, 30)
+    finally:
+        conn.close()
+    # Every sample counted once: an hour row, then minute rows, then the raw samples
+    assert sum(point[1] for point in points) == 240
+    assert points[0][:2] == (START, 120)
+    assert points[1][:2] == (START + 3600, 2)
+    assert points[-1][:2] == (START + 7170, 1)
+
+
+def test_query_uses_the_cheapest_tier_and_fills_the_tail(tmp_path):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path)
+    for ts in range(START, START + 5400, 10):
+        store.record_snapshot(snapshot(ts, float(ts % 60)))
+    # The second hour is only half over: its minutes exist, its hour does not
+    store.flush(now=START + 5400)
+
+    assert [choose_tier(step) for step in (1, 30, 60, 90, 300, 3600, 86400)] == [0, 0, 1, 0, 1, 2, 2]
+    conn = connect(path, readonly=True)
+    try:
+        hours = query(conn, 'cpu_percent', START, START + 5400, 3600)
+        assert [row[:2] for row in hours] == [(START, 360), (START + 3600, 180)]
+        assert hours[1][2:] == (0.0, 25.0, 50.0)
+        assert len(query(conn, 'cpu_percent', START + 5, START + 600, 60)) == 10
+        assert query(conn, 'no_such_metric', START, START + 60, 60) == []
+    finally:
+        conn.close()
+    store.close()
+
+
+def test_history_command(tmp_path, capsys):
+    path = str(tmp_path / 'history.db')
+    store = HistoryStore(path)
+    now = int(time.time())
+    for ts in range(now - 600, now, 10):
+        store.record_snapshot(snapshot(ts, 40.0))
+    store.close()
+
+    assert run_history('cpu', '10m', step='1m', output='json', path=path) == 0
+    document = json.loads(capsys.readouterr().out)
+    assert document['metric'] == 'cpu_percent' and document['tier'] == '1m'
+    assert sum(point['samples'] for point in document['points']) == 60
+    assert run_history('cpu', '10m', step='5m', chart=True, path=path) == 0
+    assert '40.0%' in capsys.readouterr().out
+    assert run_history('nope', '10m', path=path) == 1
+    assert run_history('cpu', 'soon', path=path) == 1
+
+
+def test_history_flags_leave_the_subcommand_alone():
+    from yalla.index import parse_arguments
+
+    args = parse_arguments(['--history', 'daemon'])
+    assert args.history and args.history_db is None and args.command == 'daemon'
+    args = parse_arguments(['--history-db', 'x.db', 'record', '--out', 'x.log'])
+    assert args.history_db == 'x.db' and args.command == 'record'
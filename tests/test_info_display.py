@@ -0,0 +1,35 @@
+import json
+
+from yalla.modules import info_display
+from yalla.modules.snapshot import Snapshot
+from yalla.modules.registry import CollectorSpec
+
+
+def test_shared_snapshot_runs_each_collector_once(monkeypatch):
+    calls = []
+
+    def fake_collector(name):
+        def func():
+            calls.append(name)
+            return {name: len(calls)}
+        return CollectorSpec(name, 'system', func, 1, 'low')
+
+    monkeypatch.setattr(info_display, 'get_collector', fake_collector)
+    snapshot = info_display.collect_snapshot(['cpu', 'disk', 'stats', 'uptime'])
+
+    assert sorted(calls) == sorted(set(calls))
+    assert set(calls) == {'cpu', 'cpu_count', 'load_avg', 'disk', 'memory', 'uptime', 'process_count'}
+    assert snapshot.system['cpu'] == calls.index('cpu') + 1
+
+
+def test_ndjson_prints_one_line_per_section(capsys):
+    snapshot = Snapshot(100.0, {'cpu_percent': 12.5, 'cpu_count': 4, 'load_avg': (0.5, 0.25, 0.75),
+                                'uptime': 60.0, 'boot_time': 40.0}, {})
+    info_display.print_json(['cpu', 'uptime'], snapshot, ndjson=True)
+
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {'section': 'cpu', 'timestamp': 100.0,
+         'data': {'cpu_percent': 12.5, 'cpu_count': 4, 'load_avg': [0.5, 0.25, 0.75]}},
+        {'section': 'uptime', 'timestamp': 100.0, 'data': {'uptime': 60.0, 'boot_time': 40.0}},
+    ]
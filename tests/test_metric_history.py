@@ -0,0 +1,25 @@
+from yalla.modules.metric_history import MetricHistory, RingBuffer
+from yalla.modules.snapshot import Snapshot
+
+
+def test_ring_buffer_wraps():
+    buffer = RingBuffer(4)
+    assert buffer.last() is None and buffer.values() == []
+    for value in range(6):
+        buffer.append(value)
+    assert len(buffer) == 4
+    assert buffer.values() == [2.0, 3.0, 4.0, 5.0]
+    assert buffer.values(3) == [3.0, 4.0, 5.0]
+    assert buffer.last() == 5.0
+
+
+def test_buffers_of_vanished_interfaces_are_dropped():
+    history = MetricHistory(capacity=8)
+    rate = {'bytes_recv': 1.0, 'bytes_sent': 2.0}
+    for i in range(100):
+        # A fresh veth per pass, as when containers are started and stopped
+        interfaces = {'eth0': rate, f'veth{i}': rate}
+        history.record_snapshot(Snapshot(i, {}, {'io_stats': interfaces, 'io_rates': interfaces}))
+    assert 'net_recv:eth0' in history and 'net_sent:veth99' in history
+    assert 'net_recv:veth98' not in history
+    assert len(history._buffers) == 4
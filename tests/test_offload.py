@@ -0,0 +1,69 @@
+import os
+import signal
+
+import pytest
+
+from yalla.modules.offload import WorkerProcess, WorkerError
+
+
+@pytest.fixture
+def worker():
+    worker = WorkerProcess('sim:processes=200,sockets=300,churn=0')
+    yield worker
+    worker.close()
+
+
+def test_worker_runs_collectors_on_the_source(worker):
+    states = worker.call('connection_states')['connection_states']
+    assert sum(states.values()) == 300
+    assert states['ESTABLISHED'] == 180
+
+    connections = worker.call('connections')['connections']
+    assert connections and all(isinstance(c, dict) for c in connections)
+    # The process table persists in the worker between calls
+    assert worker.call('top_processes')['top_processes']
+    assert worker.call('top_processes')['top_processes']
+
+
+def test_worker_reports_errors_and_restarts(worker):
+    with pytest.raises(WorkerError):
+        worker.call('no_such_collector')
+
+    first = worker.pid
+    os.kill(first, signal.SIGKILL)
+    worker._process.join(5)
+    assert sum(worker.call('connection_states')['connection_states'].values()) == 300
+    assert worker.pid != first
+
+
+def test_hung_worker_is_replaced_within_its_deadline():
+    worker = WorkerProcess('sim:stall=30', reply_timeout=0.5)
+    try:
+        with pytest.raises(TimeoutError):
+            worker.call('disk')
+        assert worker.pid is None
+    finally:
+        worker.close()
+
+
+def test_each_collector_gets_its_own_worker():
+    from yalla.modules import offload, system_monitor, network_monitor  # noqa: F401
+    from yalla.modules.registry import get_collector, override_collector
+    from yalla.modules.supervisor import collector_timeout
+
+    names = ('connection_states', 'top_processes')
+    originals = {name: get_collector(name).func for name in names}
+    try:
+        workers = offload.enable_offload(names)
+        for name in names:
+            assert workers[name].reply_timeout == collector_timeout(get_collector(name))
+            get_collector(name).func()
+        assert workers['connection_states'].pid != workers['top_processes'].pid
+        processes = [worker._process for worker in workers.values()]
+        offload.shutdown_offload()
+        assert not offload._workers
+        assert not any(process.is_alive() for process in processes)
+    finally:
+        offload.shutdown_offload()
+        for name, func in originals.items():
+            override_collector(name, func)
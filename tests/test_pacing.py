@@ -0,0 +1,82 @@
+from yalla.modules.collector import CollectorScheduler
+from yalla.modules.pacing import AdaptivePacer, next_deadline
+from yalla.modules.registry import CollectorSpec
+from yalla.modules.snapshot import Snapshot
+
+
+class FakeClocks:
+    def __init__(self):
+        self.wall = 0.0
+        self.cpu = 0.0
+
+    def tick(self, seconds=1.0, cpu_share=0.0):
+        self.wall += seconds
+        self.cpu += seconds * cpu_share
+
+
+def snapshot(cpu, memory=40.0):
+    return Snapshot(0.0, {'cpu_percent': cpu, 'memory_percent': memory}, {})
+
+
+def make_pacer():
+    clocks = FakeClocks()
+    pacer = AdaptivePacer(base=1.5, minimum=0.5, maximum=6.0, cpu_budget=5.0,
+                          clock=lambda: clocks.wall, cpu_clock=lambda: clocks.cpu)
+    return pacer, clocks
+
+
+def test_next_deadline_keeps_phase_and_skips_missed_ticks():
+    assert next_deadline(10.0, 1.0, 10.4) == 11.0
+    assert next_deadline(10.0, 1.0, 13.7) == 14.7
+
+
+def test_scheduler_does_not_drift_with_slow_collectors():
+    scheduler = CollectorScheduler([CollectorSpec('cpu', 'system', lambda: {}, 1.0, 'low')])
+    for now in (0.0, 1.3, 2.3, 3.3):
+        scheduler.run_due(now=now)
+    assert scheduler.next_due() == 4.0
+
+
+def test_flat_values_slow_down_until_the_maximum():
+    pacer, clocks = make_pacer()
+    for _ in range(30):
+        clocks.tick()
+        pacer.update(snapshot(20.0))
+    assert pacer.period == 6.0
+    assert pacer.reason == 'flat'
+
+
+def test_threshold_crossing_jumps_to_the_minimum():
+    pacer, clocks = make_pacer()
+    pacer.update(snapshot(65.0))
+    clocks.tick()
+    pacer.update(snapshot(72.0))
+    assert pacer.period == 0.5
+    assert pacer.reason == 'fast change'
+
+
+def test_cpu_budget_wins_over_fast_change():
+    pacer, clocks = make_pacer()
+    for cpu in (10.0, 60.0, 10.0, 60.0):
+        clocks.tick(cpu_share=0.2)
+        pacer.update(snapshot(cpu))
+    assert pacer.period == 6.0
+    assert pacer.reason == 'cpu budget'
+
+
+def test_scale_pulls_pending_runs_closer():
+    scheduler = CollectorScheduler([CollectorSpec('cpu', 'system', lambda: {}, 2.0, 'low')])
+    scheduler.run_due(now=0.0)
+    scheduler.set_scale(0.25, now=0.5)
+    assert scheduler.next_due() == 1.0
+
+
+def test_dashboard_footer_shows_the_current_period():
+    from yalla.modules.ui_renderer import build_dashboard
+
+    pacer, clocks = make_pacer()
+    for _ in range(30):
+        clocks.tick()
+        pacer.update(snapshot(20.0))
+    assert 'Auto-refresh every 6.0s (flat)' in build_dashboard({}, {}, pacer=pacer)[-2]
+    assert 'Auto-refresh every 1.5s' in build_dashboard({}, {})[-2]
@@ -0,0 +1,101 @@
+import itertools
+import os
+import socket
+
+from yalla.modules import proc_net
+from yalla.modules.proc_net import SocketOwnerIndex, iter_connections
+
+HEADER = '  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode\n'
+
+
+def row(local, remote, state, inode):
+    return f'   0: {local} {remote} {state} 00000000:00000000 00:00000000 00000000  1000        0 {inode} 1\n'
+
+
+def make_proc(root):
+    (root / 'net').mkdir()
+    (root / 'net' / 'tcp').write_text(HEADER + ''.join([
+        row('0100007F:1F90', '00000000:0000', '0A', 1001),         # 127.0.0.1:8080 listening
+        row('0100007F:1F90', '0100007F:D431', '01', 1002),         # accepted from :54321
+        row('0A00000A:C350', '08080808:0035', '06', 1003),         # 10.0.0.10:50000 -> 8.8.8.8:53
+        '   3: not a connection\n',
+    ]))
+    (root / 'net' / 'tcp6').write_text(HEADER + row(
+        '00000000000000000000000001000000:01BB', '00000000000000000000000000000000:0000', '0A', 1004))
+    (root / 'net' / 'udp').write_text(HEADER + row('00000000:0044', '00000000:0000', '07', 1005))
+
+
+def test_iter_connections(tmp_path):
+    make_proc(tmp_path)
+    connections = list(iter_connections(root=str(tmp_path)))
+    assert [c.inode for c in connections] == [1001, 1002, 1003, 1004, 1005]
+
+    listening, accepted, waiting, ipv6, udp = connections
+    assert (listening.local_ip, listening.local_port, listening.status) == ('127.0.0.1', 8080, 'LISTEN')
+    assert listening.remote_ip is None
+    assert (accepted.remote_ip, accepted.remote_port, accepted.status) == ('127.0.0.1', 54321, 'ESTABLISHED')
+    assert (waiting.local_ip, waiting.remote_ip, waiting.status) == ('10.0.0.10', '8.8.8.8', 'TIME_WAIT')
+    assert (ipv6.family, ipv6.local_ip, ipv6.local_port) == (socket.AF_INET6, '::1', 443)
+    assert (udp.type, udp.status, udp.local_port) == (socket.SOCK_DGRAM, 'NONE', 68)
+
+    assert [c.inode for c in iter_connections(states={'LISTEN'}, root=str(tmp_path))] == [1001, 1004]
+    assert [c.inode for c in iter_connections(ports={53}, root=str(tmp_path))] == [1003]
+    assert [c.inode for c in iter_connections(kinds=('tcp6',), root=str(tmp_path))] == [1004]
+
+
+def test_addresses_follow_host_byte_order(monkeypatch):
+    monkeypatch.setattr(proc_net.sys, 'byteorder', 'big')
+    assert proc_net._decode_ip('7F000001', socket.AF_INET) == '127.0.0.1'
+    assert proc_net._decode_ip('00000000000000000000000000000001', socket.AF_INET6) == '::1'
+
+
+def test_early_stop_skips_the_rest(tmp_path, monkeypatch):
+    make_proc(tmp_path)
+    decoded = []
+    real = proc_net._decode_ip
+    monkeypatch.setattr(proc_net, '_decode_ip', lambda hex_ip, family: decoded.append(hex_ip) or real(hex_ip, family))
+    first = list(itertools.islice(iter_connections(root=str(tmp_path)), 1))
+    assert [c.inode for c in first] == [1001]
+    # Only the first row's local address was decoded
+    assert decoded == ['0100007F']
+
+
+def add_process(root, pid, inodes):
+    fd_dir = root / str(pid) / 'fd'
+    fd_dir.mkdir(parents=True)
+    for fd, inode in enumerate(inodes, 3):
+        os.symlink(f'socket:[{inode}]', fd_dir / str(fd))
+    os.symlink('/dev/null', fd_dir / '0')
+
+
+def test_socket_owner_index_is_incremental(tmp_path, monkeypatch):
+    add_process(tmp_path, 100, [1001, 1002])
+    index = SocketOwnerIndex(root=str(tmp_path))
+    scanned = []
+    real = index._socket_inodes
+    monkeypatch.setattr(index, '_socket_inodes', lambda pid: scanned.append(pid) or real(pid))
+
+    assert index.lookup([1001, 1002]) == {1001: 100, 1002: 100}
+    assert scanned == [100]
+
+    # A new socket is looked for in the new process first, and only there
+    add_process(tmp_path, 200, [2001])
+    scanned.clear()
+    assert index.lookup([1001, 2001]) == {1001: 100, 2001: 200}
+    assert scanned == [200]
+
+    # An unknown inode scans everything once, then waits for retry_after
+    scanned.clear()
+    assert index.lookup([9999]) == {9999: None}
+    assert sorted(scanned) == [100, 200]
+    scanned.clear()
+    assert index.lookup([9999]) == {9999: None}
+    assert scanned == []
+
+    # Sockets of a process that exited are forgotten at the next scan
+    for fd in (tmp_path / '100' / 'fd').iterdir():
+        fd.unlink()
+    (tmp_path / '100' / 'fd').rmdir()
+    (tmp_path / '100').rmdir()
+    add_process(tmp_path, 300, [3001])
+    assert index.lookup([1001, 3001]) == {1001: None, 3001: 300}
@@ -0,0 +1,104 @@
+from types import SimpleNamespace
+
+import pytest
+
+from yalla.modules import network_monitor, system_monitor
+from yalla.modules.procfs import ProcfsBackend
+
+STAT = (
+    'cpu  100 20 30 800 50 0 0 0 0 0\n'
+    'cpu0 100 20 30 800 50 0 0 0 0 0\n'
+    'intr 12345 0 0\n'
+)
+
+MEMINFO = (
+    'MemTotal:        8000000 kB\n'
+    'MemFree:         1000000 kB\n'
+    'MemAvailable:    6000000 kB\n'
+    'Buffers:          500000 kB\n'
+    'Cached:          2000000 kB\n'
+)
+
+NET_DEV = (
+    'Inter-|   Receive                                                |  Transmit\n'
+    ' face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n'
+    '    lo:    1000      10    0    0    0     0          0         0     1000      10    0    0    0     0       0          0\n'
+    '  eth0: 5000000    4000    1    2    0     0          0         0   300000    2000    3    4    0     0       0          0\n'
+)
+
+
+def make_proc(root, stat=STAT, meminfo=MEMINFO):
+    (root / 'net').mkdir()
+    (root / 'stat').write_text(stat)
+    (root / 'meminfo').write_text(meminfo)
+    (root / 'loadavg').write_text('0.52 0.58 0.59 2/1234 56789\n')
+    (root / 'net' / 'dev').write_text(NET_DEV)
+    return ProcfsBackend(root=str(root))
+
+
+@pytest.fixture
+def backend(tmp_path):
+    backend = make_proc(tmp_path)
+    yield backend
+    backend.close()
+
+
+def test_cpu_times_counts_idle_and_iowait_as_idle(backend):
+    assert backend.cpu_times() == (150, 1000)
+
+
+def test_cpu_percent_measures_since_the_previous_call(tmp_path, backend):
+    assert backend.cpu_percent() == 0.0
+    # 100 more jiffies, 60 of them busy
+    (tmp_path / 'stat').write_text('cpu  140 20 50 830 60 0 0 0 0 0\n')
+    assert backend.cpu_percent() == 60.0
+
+
+def test_virtual_memory(backend):
+    memory = backend.virtual_memory()
+    assert memory['total'] == 8000000 * 1024
+    assert memory['available'] == 6000000 * 1024
+    assert memory['used'] == 2000000 * 1024
+    assert memory['free'] == 1000000 * 1024
+    assert memory['percent'] == 25.0
+
+
+def test_virtual_memory_without_memavailable(tmp_path):
+    old_kernel = ''.join(line + '\n' for line in MEMINFO.splitlines() if not line.startswith('MemAvailable'))
+    backend = make_proc(tmp_path, meminfo=old_kernel)
+    try:
+        # MemFree + Buffers + Cached
+        assert backend.virtual_memory()['available'] == 3500000 * 1024
+    finally:
+        backend.close()
+
+
+def test_load_average(backend):
+    assert backend.load_average() == (0.52, 0.58, 0.59)
+
+
+def test_net_io_counters_use_psutil_field_order(backend):
+    counters = backend.net_io_counters()
+    assert set(counters) == {'lo', 'eth0'}
+    # bytes_sent, bytes_recv, packets_sent, packets_recv, errin, errout, dropin, dropout
+    assert counters['eth0'] == (300000, 5000000, 2000, 4000, 1, 3, 2, 4)
+
+
+def test_unreadable_files_fall_back_to_psutil(tmp_path, monkeypatch):
+    backend = make_proc(tmp_path)
+    # Reading a closed descriptor raises OSError, as a vanished /proc would
+    backend.close()
+    source = SimpleNamespace(
+        virtual_memory=lambda: SimpleNamespace(total=100, used=40, available=60, percent=40.0),
+        getloadavg=lambda: (1.0, 2.0, 3.0),
+        net_io_counters=lambda pernic: {'eth0': SimpleNamespace(
+            bytes_sent=1, bytes_recv=2, packets_sent=3, packets_recv=4,
+            errin=5, errout=6, dropin=7, dropout=8)},
+    )
+    for module in (system_monitor, network_monitor):
+        monkeypatch.setattr(module, 'get_procfs_backend', lambda: backend)
+        monkeypatch.setattr(module, 'get_source', lambda: source)
+
+    assert system_monitor.collect_memory()['memory_percent'] == 40.0
+    assert system_monitor.collect_load_avg() == {'load_avg': (1.0, 2.0, 3.0)}
+    assert network_monitor._read_io_counters()['eth0']['dropout'] == 8
@@ -0,0 +1,45 @@
+import threading
+
+from yalla.modules.collector import CollectorScheduler
+from yalla.modules.profiling import SamplingProfiler, stage_timer
+from yalla.modules.registry import CollectorSpec
+
+
+def test_collectors_are_timed_only_when_enabled():
+    scheduler = CollectorScheduler([CollectorSpec('fake', 'system', lambda: {'fake': 1}, 1, 'low')])
+    stage_timer.reset()
+    scheduler.run_due(now=0)
+    assert stage_timer.durations() == {}
+
+    stage_timer.enabled = True
+    try:
+        scheduler.run_due(now=10)
+    finally:
+        stage_timer.enabled = False
+    assert list(stage_timer.durations()) == ['collect:fake']
+    stage_timer.reset()
+
+
+def test_sampler_writes_collapsed_stacks(tmp_path):
+    release = threading.Event()
+
+    def parked_worker():
+        release.wait()
+
+    worker = threading.Thread(target=parked_worker, name='worker')
+    worker.start()
+    profiler = SamplingProfiler()
+    try:
+        profiler.sample()
+        profiler.sample()
+    finally:
+        release.set()
+        worker.join()
+
+    path = tmp_path / 'out.folded'
+    profiler.start()
+    profiler.stop(str(path))
+    lines = path.read_text().splitlines()
+    stack, count = next(line for line in lines if line.startswith('worker;')).rsplit(' ', 1)
+    assert 'parked_worker (test_profiling.py:' in stack
+    assert int(count) == 2
@@ -0,0 +1,67 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from yalla.modules import public_ip
+
+# path -> (delay in seconds, response body)
+RESPONSES = {
+    '/slow': (2.0, {'ip': '192.0.2.1'}),
+    '/fast': (0.0, {'origin': '198.51.100.7, 10.0.0.1'}),
+    '/broken': (0.0, {'ip': 'not an address'}),
+}
+
+INTERFACES = [{'name': 'eth0', 'ip': '10.0.0.2', 'is_up': True}]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        delay, body = RESPONSES[self.path]
+        time.sleep(delay)
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
+def test_fastest_valid_answer_wins(base_url):
+    started = time.monotonic()
+    address = public_ip.resolve_public_ip([f'{base_url}/slow', f'{base_url}/broken', f'{base_url}/fast'])
+    assert address == '198.51.100.7'
+    assert time.monotonic() - started < 1.5
+
+
+def test_no_valid_answer(base_url):
+    assert public_ip.resolve_public_ip([f'{base_url}/broken', 'http://127.0.0.1:9/']) is None
+
+
+def test_cache_expires_and_follows_interfaces(base_url, tmp_path):
+    cache_path = str(tmp_path / 'public_ip.json')
+    services = [f'{base_url}/fast']
+    assert public_ip.lookup_public_ip(INTERFACES, services, cache_path=cache_path) == '198.51.100.7'
+
+    # Answered from the cache while the services are unreachable
+    assert public_ip.lookup_public_ip(INTERFACES, ['http://127.0.0.1:9/'], cache_path=cache_path) == '198.51.100.7'
+
+    fingerprint = public_ip.interface_fingerprint(INTERFACES)
+    assert public_ip.read_cache(cache_path, fingerprint, ttl=300) == '198.51.100.7'
+    assert public_ip.read_cache(cache_path, fingerprint, ttl=300, now=time.time() + 301) is None
+    moved = [{'name': 'eth0', 'ip': '172.16.0.9', 'is_up': True}]
+    assert public_ip.read_cache(cache_path, public_ip.interface_fingerprint(moved), ttl=300) is None
@@ -0,0 +1,32 @@
+from yalla.modules.rates import RateTracker, counter_delta
+
+
+def test_counter_delta():
+    assert counter_delta(1000, 1500) == 500
+    # A drop is a reset unless a wrap of a 32-bit counter fits the limit
+    assert counter_delta(3_000_000_000, 1000) is None
+    assert counter_delta(3_000_000_000, 1000, limit=200_000_000) is None
+    assert counter_delta(2 ** 32 - 10, 5, limit=200_000_000) == 15
+    # 64-bit counters never wrap in practice
+    assert counter_delta(2 ** 33, 5, limit=2 ** 40) is None
+
+
+def test_wrap_on_a_known_link_keeps_the_rate():
+    tracker = RateTracker(link_speed=lambda interface: 1000)
+    tracker.update({'eth0': {'bytes_recv': 2 ** 32 - 50_000_000, 'packets_recv': 2 ** 32 - 10}}, now=0)
+    rates = tracker.update({'eth0': {'bytes_recv': 50_000_000, 'packets_recv': 10}}, now=1)
+    assert rates['eth0']['bytes_recv'] == 100_000_000
+    assert rates['eth0']['packets_recv'] == 20
+
+
+def test_reset_starts_over_without_a_spike():
+    # 1.3 GB in a second cannot cross a 1 Gbit/s link, so this is a reset
+    tracker = RateTracker(link_speed=lambda interface: 1000)
+    assert tracker.update({'eth0': {'bytes_recv': 3_000_000_000}}, now=0) == {}
+    assert tracker.update({'eth0': {'bytes_recv': 1000}}, now=1) == {}
+    rates = tracker.update({'eth0': {'bytes_recv': 3000}}, now=3)
+    assert rates['eth0']['bytes_recv'] == 1000
+    # Without a known link speed every drop is a reset
+    tracker = RateTracker()
+    tracker.update({'eth0': {'bytes_recv': 2 ** 32 - 10}}, now=0)
+    assert tracker.update({'eth0': {'bytes_recv': 5}}, now=1) == {}
@@ -0,0 +1,168 @@
+import os
+
+from yalla.modules.recorder import LogWriter, read_log
+
+
+def sample(i):
+    return {
+        'cpu_percent': 10.0 + (i % 7),
+        'memory_total': 8 * 1024 ** 3,
+        'memory_used': 2 * 1024 ** 3 + i * 4096,
+        'memory_available': 6 * 1024 ** 3 - i * 4096,
+        'memory_percent': 25.0,
+        'disk_total': 500 * 1024 ** 3,
+        'disk_used': 100 * 1024 ** 3,
+        'disk_free': 400 * 1024 ** 3,
+        'disk_percent': 20.0,
+        'process_count': 300 + i % 3,
+        'boot_time': 1700000000.0,
+        'cpu_count': 8,
+        'load_avg': (0.5, 0.25, 0.75),
+    }
+
+
+def test_round_trip_and_size(tmp_path):
+    """Records decode back to the values written, and deltas stay small"""
+    path = str(tmp_path / 'yalla.log')
+    writer = LogWriter(path, keyframe_every=100)
+    for i in range(1000):
+        writer.write(1700001000.0 + i, sample(i))
+    writer.close()
+
+    records = list(read_log(path))
+    assert len(records) == 1000
+    timestamp, stats = records[500]
+    assert timestamp == 1700001500.0
+    assert stats['cpu_percent'] == sample(500)['cpu_percent']
+    assert stats['memory_used'] == sample(500)['memory_used']
+    assert stats['process_count'] == sample(500)['process_count']
+    assert stats['load_avg'] == (0.5, 0.25, 0.75)
+    assert stats['uptime'] == 1500.0
+    # Well under 16 bytes per one-second sample
+    assert os.path.getsize(path) < 1000 * 16
+
+
+def test_rotation_keeps_each_file_readable(tmp_path):
+    """Rotated files start with a keyframe and decode on their own"""
+    path = str(tmp_path / 'yalla.log')
+    writer = LogWriter(path, max_bytes=2048, backups=2)
+    for i in range(2000):
+        writer.write(1700001000.0 + i, sample(i))
+    writer.close()
+
+    assert os.path.exists(path + '.1')
+    assert os.path.exists(path + '.2')
+    assert not os.path.exists(path + '.3')
+    last = list(read_log(path))
+    assert last[-1][0] == 1700001000.0 + 1999
+    assert list(read_log(path + '.1'))
+
+
+def test_seek_uses_keyframe_index(tmp_path):
+    """Seeking lands on the first record at or after the requested time"""
+    from yalla.modules.recorder import LogReader
+
+    path = str(tmp_path / 'yalla.log')
+    writer = LogWriter(path, keyframe_every=50)
+    for i in range(1000):
+        writer.write(1700001000.0 + i, sample(i))
+    writer.close()
+
+    with LogReader(path) as reader:
+        assert len(reader.index) == 20
+        assert reader.start_time == 1700001000.0
+        assert reader.end_time == 1700001999.0
+        timestamp, values = next(reader.records(1700001777.5))
+        assert timestamp == 1700001778.0
+
+    # Without the sidecar index the reader rebuilds it by scanning
+    os.remove(path + '.idx')
+    with LogReader(path) as reader:
+        assert len(reader.index) == 20
+        assert next(reader.records(1700001100.0))[0] == 1700001100.0
+
+
+def test_restart_after_a_torn_record(tmp_path):
+    """A writer reopening a log cut mid-record continues after the last complete one"""
+    from yalla.modules.recorder import LogReader
+
+    path = str(tmp_path / 'yalla.log')
+    writer = LogWriter(path, keyframe_every=50)
+    for i in range(120):
+        writer.write(1700001000.0 + i, sample(i))
+    writer.close()
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) - 3)
+    # The index can lag the log; the writer must restore the missing keyframe
+    with open(path + '.idx', 'r+b') as f:
+        f.truncate(os.path.getsize(path + '.idx') - 16)
+
+    writer = LogWriter(path, keyframe_every=50)
+    for i in range(200, 210):
+        writer.write(1700001000.0 + i, sample(i))
+    writer.close()
+
+    with LogReader(path) as reader:
+        timestamps = [timestamp for timestamp, _ in reader.records()]
+        assert len(reader.index) == 4
+    assert timestamps == [1700001000.0 + i for i in list(range(119)) + list(range(200, 210))]
+
+
+def test_corrupt_record_resyncs_at_next_keyframe(tmp_path):
+    """Readers skip from a corrupt record to the next indexed keyframe instead of failing"""
+    from yalla.modules.recorder import LogReader, iter_raw_records
+
+    path = str(tmp_path / 'yalla.log')
+    writer = LogWriter(path, keyframe_every=50)
+    for i in range(150):
+        writer.write(1700001000.0 + i, sample(i))
+    writer.close()
+    with LogReader(path) as reader:
+        first, second = reader.index[0][1], reader.index[1][1]
+        # A record type byte a few deltas into the first segment
+        offsets = [offset for offset, _, _, _ in iter_raw_records(reader.data) if first < offset < second]
+    with open(path, 'r+b') as f:
+        f.seek(offsets[10])
+        f.write(b'X')
+
+    with LogReader(path) as reader:
+        timestamps = [timestamp for timestamp, _ in reader.records()]
+        assert reader.end_time == 1700001149.0
+    assert timestamps == [1700001000.0 + i for i in list(range(11)) + list(range(51, 150))]
+
+
+def test_recorder_feeds_subscribe_all_callbacks(tmp_path, monkeypatch):
+    """yalla --history record: every recorded pass reaches the history store"""
+    import signal
+    from yalla.modules import collector, datasource
+    from yalla.modules.recorder import run_recorder
+
+    passes = []
+
+    def subscriber(snapshot, ran):
+        passes.append((snapshot, ran))
+        if len(passes) == 2:
+            raise KeyboardInterrupt
+
+    monkeypatch.setattr(collector, '_default_subscribers', [subscriber])
+    datasource.set_source('sim:processes=50')
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        run_recorder(str(tmp_path / 'yalla.log'), interval=0.01)
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+        datasource.set_source('psutil')
+
+    snapshot, ran = passes[0]
+    assert 'cpu' in ran and 'cpu_percent' in snapshot.system
+    assert len(list(read_log(str(tmp_path / 'yalla.log')))) == 2
+
+
+def test_recorder_refuses_a_file_that_is_not_a_recording(tmp_path, capsys):
+    from yalla.modules.recorder import run_recorder
+
+    path = tmp_path / 'notes.txt'
+    path.write_text('not a recording\n')
+    assert run_recorder(str(path)) == 1
+    assert 'Cannot record to' in capsys.readouterr().out
+    assert path.read_text() == 'not a recording\n'
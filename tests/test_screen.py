@@ -0,0 +1,35 @@
+import io
+import os
+
+from yalla.modules import screen as screen_module
+from yalla.modules.screen import Screen, move_cursor
+from yalla.modules.ui_renderer import clip_visible, visible_length
+
+RED, RESET = '\033[91m', '\033[0m'
+
+
+def test_clip_visible_keeps_escapes():
+    text = f'{RED}abcdef{RESET}ghij'
+    assert clip_visible(text, 20) == text
+    clipped = clip_visible(text, 8)
+    assert visible_length(clipped) == 8
+    assert clipped.startswith(f'{RED}abcdef{RESET}gh')
+    assert visible_length(clip_visible(text, 3)) == 3
+
+
+def test_draw_clips_to_width_and_sends_only_changed_lines(monkeypatch):
+    monkeypatch.setattr(screen_module.shutil, 'get_terminal_size', lambda: os.terminal_size((10, 5)))
+    stream = io.StringIO()
+    screen = Screen(stream)
+    screen.draw(['x' * 30, f'{RED}{"y" * 30}{RESET}', 'short'])
+    assert 'x' * 11 not in stream.getvalue()
+    assert 'y' * 11 not in stream.getvalue()
+
+    stream.seek(0)
+    stream.truncate()
+    # Changes past the right edge are invisible and send nothing
+    assert screen.draw(['x' * 40, f'{RED}{"y" * 30}{RESET}', 'short']) == 0
+    screen.draw(['x' * 30, f'{RED}{"y" * 30}{RESET}', 'longer'])
+    output = stream.getvalue()
+    assert move_cursor(3) + 'longer' in output
+    assert move_cursor(1) not in output and move_cursor(2) not in output
@@ -0,0 +1,55 @@
+import pytest
+
+from yalla.modules import datasource, network_monitor, system_monitor
+from yalla.modules.simulator import SimulatedHost, parse_options
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def simulated():
+    clock = ManualClock()
+    host = SimulatedHost(clock=clock, processes=1000, sockets=2000, churn=0.05)
+    datasource.set_source(host)
+    yield host, clock
+    datasource.set_source('psutil')
+
+
+def test_parse_options():
+    assert parse_options('processes=50k,sockets=1.5M,churn=0.02,cpus=256') == {
+        'processes': 50_000, 'sockets': 1_500_000, 'churn': 0.02, 'cpus': 256}
+    with pytest.raises(ValueError):
+        parse_options('threads=4')
+    with pytest.raises(ValueError):
+        datasource.parse_source('dtrace')
+
+
+def test_same_options_give_the_same_host():
+    first, second = (SimulatedHost(clock=lambda: 42.0, processes=50) for _ in range(2))
+    assert first.pids() == second.pids()
+    assert first.net_connections() == second.net_connections()
+    assert first.net_io_counters(pernic=True) == second.net_io_counters(pernic=True)
+
+
+def test_monitors_read_the_simulated_host(simulated):
+    host, clock = simulated
+    assert datasource.get_procfs_backend() is None
+
+    stats = system_monitor.get_system_stats()
+    assert stats['process_count'] == 1000
+    assert stats['cpu_count'] == host.cpus
+    assert network_monitor.get_connection_state_counts()['ESTABLISHED'] == 1200
+
+    before = network_monitor.get_network_io_stats()
+    old_pids = set(host.pids())
+    clock.now += 10
+    after = network_monitor.get_network_io_stats()
+    assert all(after[name]['bytes_recv'] > before[name]['bytes_recv'] for name in before)
+    # 10 ticks at 5% churn replaced half of the processes
+    assert len(old_pids & set(host.pids())) == 500
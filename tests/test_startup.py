@@ -0,0 +1,68 @@
+"""Cold-start budget: each CLI path imports only what it uses"""
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from yalla.modules import daemon
+from yalla.modules.snapshot import Snapshot
+
+# Import time of yalla's own modules for `yalla --version`; generous because CI machines are noisy
+STARTUP_BUDGET_MS = float(os.environ.get('YALLA_STARTUP_BUDGET_MS', 60))
+
+# Never needed by the flag modes (urllib.request and json only serve -p and --json)
+FORBIDDEN = {'colorama', 'termios', 'urllib.request', 'json', 'http.client', 'asyncio'}
+
+
+def import_times(*args, env=None):
+    """Module name -> (cumulative microseconds, is top level) for one `python -m yalla` run"""
+    cp = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'yalla', *args],
+                        capture_output=True, text=True, env=env)
+    assert cp.returncode == 0, cp.stderr
+    modules = {}
+    for line in cp.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = (int(cumulative), not name[1:].startswith(' '))
+    return modules
+
+
+def yalla_import_ms(modules):
+    """Milliseconds spent in imports started by yalla itself"""
+    return sum(us for name, (us, top_level) in modules.items()
+               if top_level and name.split('.')[0] == 'yalla') / 1000
+
+
+def test_version_stays_within_budget():
+    import_times('--version')  # Warm up bytecode caches
+    modules = import_times('--version')
+    assert 'psutil' not in modules
+    assert not FORBIDDEN & set(modules)
+    assert yalla_import_ms(modules) < STARTUP_BUDGET_MS
+
+
+def test_direct_query_skips_unused_dependencies():
+    modules = import_times('-u', '--no-daemon')
+    assert 'psutil' in modules
+    assert not FORBIDDEN & set(modules)
+    assert 'yalla.modules.daemon' not in modules
+
+
+@pytest.mark.skipif(not daemon.HAS_UNIX_SOCKETS, reason='needs Unix domain sockets')
+def test_daemon_query_never_loads_psutil(tmp_path):
+    path = str(tmp_path / 'yalla.sock')
+    cache = daemon.SnapshotCache()
+    cache.update(Snapshot(time.time(), {'uptime': 60.0, 'boot_time': time.time() - 60}, {}))
+    server = daemon.make_server(path, cache)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        modules = import_times('-u', env=dict(os.environ, YALLA_SOCKET=path))
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert 'psutil' not in modules
+    assert not (FORBIDDEN - {'json'}) & set(modules)
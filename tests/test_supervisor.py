@@ -0,0 +1,62 @@
+import threading
+
+from yalla.modules.collector import BackgroundCollector, CollectorScheduler
+from yalla.modules.registry import CollectorSpec
+from yalla.modules.ui_renderer import build_health_lines
+
+
+def test_hung_collector_keeps_its_value_and_is_paused():
+    release = threading.Event()
+    hang = []
+
+    def disk():
+        if hang:
+            release.wait(5)
+        return {'disk_percent': 40.0}
+
+    scheduler = CollectorScheduler([
+        CollectorSpec('cpu', 'system', lambda: {'cpu_percent': 5.0}, 1.0, 'low'),
+        CollectorSpec('disk', 'system', disk, 1.0, 'low', timeout=0.05),
+    ])
+    collector = BackgroundCollector(scheduler)
+    try:
+        assert scheduler.run_due(now=0.0) == ['cpu', 'disk']
+        hang.append(True)
+        for now in (1.0, 2.0, 3.0):
+            assert scheduler.run_due(now=now) == ['cpu']
+        collector._publish()
+        snapshot = collector.snapshot
+
+        assert snapshot.system == {'cpu_percent': 5.0, 'disk_percent': 40.0}
+        problem = snapshot.health['disk']
+        assert problem['failures'] == 3
+        assert problem['error'].startswith('still running after')
+        assert problem['retry_at'] is not None
+        # Paused: skipped until twice its interval has passed
+        assert scheduler.run_due(now=4.0) == ['cpu']
+        assert scheduler._due['disk'] == 5.0
+        lines = build_health_lines(snapshot.health, 'system', now=problem['last_ok'] + 12)
+        assert 'disk stale 12s' in lines[0] and 'paused' in lines[0]
+    finally:
+        release.set()
+        scheduler.close()
+
+
+def test_errors_are_reported_until_the_collector_recovers():
+    failing = [True]
+
+    def memory():
+        if failing:
+            raise PermissionError('denied')
+        return {'memory_percent': 50.0}
+
+    scheduler = CollectorScheduler([CollectorSpec('memory', 'system', memory, 1.0, 'low')])
+    try:
+        assert scheduler.run_due(now=0.0) == []
+        assert scheduler.failed == ['memory']
+        assert scheduler.problems()['memory']['error'] == 'PermissionError: denied'
+        failing.clear()
+        assert scheduler.run_due(now=1.0) == ['memory']
+        assert scheduler.problems() == {}
+    finally:
+        scheduler.close()
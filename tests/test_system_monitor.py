@@ -0,0 +1,57 @@
+import pytest
+
+from yalla.modules import datasource, system_monitor
+from yalla.modules.simulator import SimulatedHost, SimulatedProcess
+
+
+class ManualClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def simulated():
+    clock = ManualClock()
+    host = SimulatedHost(clock=clock, processes=1000, churn=0.05)
+    datasource.set_source(host)
+    yield host, clock
+    datasource.set_source('psutil')
+
+
+def test_process_table_follows_churn(simulated):
+    host, clock = simulated
+    table = system_monitor.ProcessTable()
+    table.top()
+    clock.now += 3
+    top = table.top(limit=3)
+    assert len(table) == 1000
+    assert all(host.is_running(process['pid']) for process in top)
+
+
+def test_process_table_replaces_reused_pids(simulated):
+    host, clock = simulated
+    reused = set()
+
+    class ReusedProcess(SimulatedProcess):
+        def create_time(self):
+            return super().create_time() + (1000 if self.pid in reused else 0)
+
+    host.Process = lambda pid: ReusedProcess(host, pid)
+    table = system_monitor.ProcessTable()
+    list(table.sample())
+    clock.now += 60  # Churn retires some PIDs and starts others
+    pids = host.pids()
+    list(table.sample())
+    before = dict(table._processes)
+    # Other processes now hold two of the PIDs
+    reused.update(pids[:2])
+    list(table.sample())
+
+    assert len(table) == len(pids)
+    for pid in pids[:2]:
+        assert (pid, host.boot + pid) not in table._processes
+        assert table._processes[(pid, host.boot + pid + 1000)] is not before[(pid, host.boot + pid)]
+    assert table._processes[(pids[2], host.boot + pids[2])] is before[(pids[2], host.boot + pids[2])]
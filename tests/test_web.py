@@ -0,0 +1,139 @@
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import threading
+
+import pytest
+
+from yalla.modules.snapshot import Snapshot
+from yalla.modules.web import WebServer, accept_key, unmask
+
+
+def sample(timestamp, cpu):
+    return Snapshot(timestamp, {'cpu_percent': cpu, 'memory_percent': 40.0},
+                    {'io_rates': {'eth0': {'bytes_recv': 10.0}}, 'connections': [{'pid': int(cpu)}]})
+
+
+@pytest.fixture
+def server():
+    server = WebServer(host_name='wall')
+    loop = asyncio.new_event_loop()
+    bound = threading.Event()
+    address = []
+
+    def ready(sockname):
+        address.append(sockname[1])
+        bound.set()
+
+    task = loop.create_task(server.serve('127.0.0.1', 0, ready))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert bound.wait(5)
+    yield server, address[0]
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(5)
+
+
+def request(port, path, headers=''):
+    sock = socket.create_connection(('127.0.0.1', port), timeout=5)
+    sock.sendall(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n{headers}\r\n'.encode())
+    return sock
+
+
+def read_head(sock):
+    data = b''
+    while b'\r\n\r\n' not in data:
+        data += sock.recv(1)
+    return data.decode()
+
+
+def read_frame(sock):
+    def exactly(count):
+        data = b''
+        while len(data) < count:
+            chunk = sock.recv(count - len(data))
+            assert chunk
+            data += chunk
+        return data
+
+    first, second = exactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', exactly(2))[0]
+    return first & 0x0F, exactly(length)
+
+
+def send_frame(sock, opcode, payload):
+    mask = os.urandom(4)
+    sock.sendall(bytes((0x80 | opcode, 0x80 | len(payload))) + mask + unmask(payload, mask))
+
+
+def upgrade(port, origin=None):
+    key = base64.b64encode(os.urandom(16)).decode()
+    headers = f'Upgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n'
+    if origin:
+        headers += f'Origin: {origin}\r\n'
+    sock = request(port, '/ws', headers)
+    return sock, key, read_head(sock)
+
+
+def test_accept_key_matches_the_rfc_example():
+    assert accept_key('dGhlIHNhbXBsZSBub25jZQ==') == 's3pPLMBiTxaQ9kYGzzhZRbK+xOo='
+
+
+def test_page_and_unknown_paths(server):
+    _, port = server
+    with request(port, '/') as sock:
+        response = sock.makefile('rb').read().decode()
+    assert response.startswith('HTTP/1.1 200 OK') and 'new WebSocket' in response
+    assert '__THRESHOLDS__' not in response
+    assert '"disk": [80, 95]' in response and 'THRESHOLDS.disk' in response
+    with request(port, '/nope') as sock:
+        assert sock.makefile('rb').read().startswith(b'HTTP/1.1 404')
+
+
+def test_clients_get_a_full_frame_then_deltas(server):
+    web, port = server
+    web.publish(sample(1.0, 10.0))
+    clients = [upgrade(port) for _ in range(3)]
+    for sock, key, head in clients:
+        assert head.startswith('HTTP/1.1 101') and accept_key(key) in head
+        opcode, payload = read_frame(sock)
+        full = json.loads(payload)
+        assert full['type'] == 'full' and full['host'] == 'wall'
+        assert 'connections' not in full['network']
+
+    web.publish(sample(2.0, 55.0))
+    for sock, _, _ in clients:
+        delta = json.loads(read_frame(sock)[1])
+        assert delta == {'type': 'delta', 'timestamp': 2.0, 'system': {'cpu_percent': 55.0}}
+
+    sock = clients[0][0]
+    send_frame(sock, 0x9, b'hi')
+    assert read_frame(sock) == (0xA, b'hi')
+    send_frame(sock, 0x8, struct.pack('!H', 1000))
+    assert read_frame(sock)[0] == 0x8
+    for sock, _, _ in clients:
+        sock.close()
+
+
+def test_cross_origin_sockets_are_refused(server):
+    _, port = server
+    sock, _, head = upgrade(port, origin='http://evil.example')
+    assert head.startswith('HTTP/1.1 403')
+    sock.close()
+    sock, _, head = upgrade(port, origin=f'http://127.0.0.1:{port}')
+    assert head.startswith('HTTP/1.1 101')
+    sock.close()
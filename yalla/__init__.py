@@ -2,6 +2,13 @@
 Yalla package initializer
 """
 from ._version import __version__
-from .index import main
 
 __all__ = ["__version__", "main"]
+
+
+def __getattr__(name):
+    # Deferred so `import yalla` does not load the CLI and its dependencies
+    if name == 'main':
+        from .index import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,10 @@
+import sys
+
 from .index import main
 
 if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # Lets a PyInstaller build start the --offload worker process
+        import multiprocessing
+        multiprocessing.freeze_support()
     main()
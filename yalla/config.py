@@ -5,6 +5,37 @@ Configuration settings for Yalla Security Dashboard
 # Refresh interval in seconds
 REFRESH_INTERVAL = 1.5
 
+# The dashboard adapts its refresh period within these bounds: faster while
+# values move quickly or cross a threshold, slower while they are flat or
+# while yalla itself uses more than REFRESH_CPU_BUDGET percent of a core
+REFRESH_ADAPTIVE = True
+REFRESH_MIN_INTERVAL = 0.5
+REFRESH_MAX_INTERVAL = 6.0
+REFRESH_CPU_BUDGET = 5.0
+
+# Interval in seconds between redraws of the interactive dashboard
+FRAME_INTERVAL = 0.25
+
+# Collector supervision: each collector runs on its own worker thread and a
+# pass waits at most this long for it before showing its last value as stale
+COLLECTOR_TIMEOUT = 2.0
+COLLECTOR_SLOW_TIMEOUT = 10.0  # For high-cost collectors (connection tables, process scans)
+COLLECTOR_FAILURE_LIMIT = 3  # Errors or overruns in a row before a collector is paused
+COLLECTOR_BACKOFF_MAX = 120  # Longest pause in seconds; pauses double from twice the interval
+
+# Run the connection and process scans in a separate worker process so they
+# do not compete with the dashboard for the GIL (also: yalla --offload)
+OFFLOAD_HEAVY_COLLECTORS = False
+OFFLOADED_COLLECTORS = ('connections', 'connection_states', 'top_processes')
+
+# On Linux, read CPU, memory, load and network counters straight from /proc
+# instead of going through psutil
+USE_PROCFS_BACKEND = True
+
+# Where metrics come from: 'psutil', or a simulated host such as
+# 'sim:processes=50k,sockets=500k,cpus=256' (see yalla/modules/simulator.py)
+DATA_SOURCE = 'psutil'
+
 # Color theme settings
 class Colors:
     """Terminal color codes - Dark violet/red/dark grey/blue theme"""
@@ -38,6 +69,8 @@ CPU_WARNING_THRESHOLD = 70
 CPU_CRITICAL_THRESHOLD = 90
 MEMORY_WARNING_THRESHOLD = 75
 MEMORY_CRITICAL_THRESHOLD = 90
+DISK_WARNING_THRESHOLD = 80
+DISK_CRITICAL_THRESHOLD = 95
 
 # Display preferences
 SHOW_PROCESS_COUNT = True
@@ -50,3 +83,49 @@ MAX_PROCESSES_DISPLAY = 5
 PROGRESS_BAR_LENGTH = 30
 PROGRESS_BAR_FILLED = '█'
 PROGRESS_BAR_EMPTY = '░'
+
+# Recording settings (yalla record)
+RECORD_INTERVAL = 1.0  # Seconds between samples
+RECORD_MAX_BYTES = 16 * 1024 * 1024  # Rotate the log past this size
+RECORD_BACKUPS = 4  # Rotated logs to keep
+RECORD_KEYFRAME_EVERY = 300  # Full records are written at least this often
+
+# Metrics exporter (yalla serve)
+METRICS_ADDRESS = ':9184'  # [host]:port; an empty host listens on all interfaces
+
+# Web dashboard (yalla web)
+WEB_ADDRESS = '127.0.0.1:9186'  # [host]:port; the page has no login, so only this machine by default
+
+# Public IP lookup (-p)
+PUBLIC_IP_SERVICES = (
+    'https://api.ipify.org?format=json',
+    'https://httpbin.org/ip',
+    'https://api.myip.com',
+)
+PUBLIC_IP_TIMEOUT = 3  # Seconds to wait for the fastest service
+PUBLIC_IP_CACHE_TTL = 300  # Seconds an answer is reused; 0 disables the cache
+PUBLIC_IP_CACHE_FILE = None  # None: $XDG_CACHE_HOME/yalla/public_ip.json
+
+# Fleet settings
+AGENT_PORT = 9185  # TCP port yalla agent listens on and yalla fleet connects to
+FLEET_STALE_AFTER = 10  # Seconds without a frame before a host is marked stale
+FLEET_BACKOFF_MIN = 1  # Reconnect delay after a failure, doubling on each retry
+FLEET_BACKOFF_MAX = 30
+FLEET_CELL_WIDTH = 34  # Columns per host box
+
+# Daemon settings
+DAEMON_SOCKET = None  # None: $XDG_RUNTIME_DIR/yalla.sock, else /tmp/yalla-<uid>.sock
+DAEMON_MAX_AGE = 10  # Seconds after which a daemon snapshot is ignored
+
+# Persistent history (--history, yalla history)
+HISTORY_STORE = False  # Store metric history even without --history
+HISTORY_DB = None  # None: $XDG_DATA_HOME/yalla/history.db (~/.local/share)
+HISTORY_FLUSH_INTERVAL = 10  # Seconds of samples written per transaction
+HISTORY_RAW_RETENTION = 24 * 3600  # Seconds each tier is kept: raw samples,
+HISTORY_MINUTE_RETENTION = 30 * 86400  # 1-minute rollups
+HISTORY_HOUR_RETENTION = 730 * 86400  # and 1-hour rollups
+
+# History and sparkline settings
+HISTORY_LENGTH = 300  # Samples kept per metric
+SPARKLINE_LENGTH = 30
+SPARKLINE_CHARS = '▁▂▃▄▅▆▇█'
@@ -7,124 +7,150 @@ import sys
 import time
 import argparse
 
-from .config import REFRESH_INTERVAL
+from .config import Colors, FRAME_INTERVAL, REFRESH_ADAPTIVE, OFFLOAD_HEAVY_COLLECTORS, HISTORY_STORE
+from .config import RECORD_INTERVAL, RECORD_MAX_BYTES, RECORD_BACKUPS, METRICS_ADDRESS, AGENT_PORT, WEB_ADDRESS
 from ._version import __version__
-from .modules.system_monitor import get_system_stats
-from .modules.network_monitor import get_network_stats
-from .modules.ui_renderer import render_dashboard, clear_screen
-from .modules.info_display import (
-    display_cpu_info, display_memory_info, display_disk_info,
-    display_private_ip, display_public_ip, display_network_info,
-    display_system_stats, display_uptime
-)
-
-# Platform-specific imports
-try:
-    import select
-    import termios
-    import tty
-    HAS_UNIX_TERMINAL = True
-except ImportError:
-    HAS_UNIX_TERMINAL = False
+
+
+# Subcommands without a terminal UI; their warnings go to stderr
+HEADLESS_COMMANDS = ('record', 'serve', 'agent', 'daemon', 'web')
+
+
+def setup_logging(path, command):
+    """Write yalla's log to `path`, or warnings to stderr for headless subcommands"""
+    if not path and command not in HEADLESS_COMMANDS:
+        return
+    import logging
+    
+    handler = logging.FileHandler(path) if path else logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    logger = logging.getLogger('yalla')
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO if path else logging.WARNING)
+
+
+def init_colors():
+    """Initialize colorama on Windows; other terminals understand ANSI natively"""
+    if sys.platform != 'win32':
+        return
     try:
-        import msvcrt
+        import colorama
+        colorama.init()
     except ImportError:
-        msvcrt = None
+        pass
 
 
 class Dashboard:
     """Main dashboard controller"""
     
     def __init__(self):
+        from .modules.collector import BackgroundCollector
+        from .modules.metric_history import MetricHistory
+        from .modules.pacing import AdaptivePacer
+        from .modules.terminal import Terminal
+        
         self.running = True
-        self.old_settings = None
+        self.terminal = Terminal()
+        self.pacer = AdaptivePacer() if REFRESH_ADAPTIVE else None
+        self.collector = BackgroundCollector(pacer=self.pacer)
+        self.history = MetricHistory()
+        self.collector.subscribe(self.history.record_snapshot)
         
     def setup_terminal(self):
         """Configure terminal for non-blocking input"""
-        if HAS_UNIX_TERMINAL:
-            try:
-                self.old_settings = termios.tcgetattr(sys.stdin)
-                tty.setcbreak(sys.stdin.fileno())
-            except:
-                pass
+        self.terminal.setup()
     
     def restore_terminal(self):
         """Restore terminal settings"""
-        if HAS_UNIX_TERMINAL and self.old_settings:
-            try:
-                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.old_settings)
-            except:
-                pass
-    
-    def check_input(self):
-        """Check for keyboard input (non-blocking)"""
-        if HAS_UNIX_TERMINAL:
-            try:
-                if select.select([sys.stdin], [], [], 0) == ([sys.stdin], [], []):
-                    char = sys.stdin.read(1)
-                    if char == 'q' or char == 'Q':
-                        return 'quit'
-                    elif char == 'r' or char == 'R':
-                        return 'refresh'
-            except:
-                pass
-        elif msvcrt:
-            # Windows
-            try:
-                if msvcrt.kbhit():
-                    char = msvcrt.getch().decode('utf-8').lower()
-                    if char == 'q':
-                        return 'quit'
-                    elif char == 'r':
-                        return 'refresh'
-            except:
-                pass
+        self.terminal.restore()
+    
+    def check_input(self, timeout=0):
+        """Check for keyboard input, waiting at most `timeout` seconds"""
+        char = self.terminal.read_key(timeout)
+        if char in ('q', 'Q'):
+            return 'quit'
+        elif char in ('r', 'R'):
+            return 'refresh'
+        elif char in ('p', 'P'):
+            return 'profile'
         return None
     
     def run(self):
         """Main dashboard loop"""
+        from .modules.pacing import next_deadline
+        from .modules.profiling import stage_timer, ProcessUsage
+        from .modules.ui_renderer import build_dashboard, build_profile_overlay, get_screen
+        
+        usage = ProcessUsage()
         self.setup_terminal()
         
         try:
-            # Initialize colorama for Windows
-            try:
-                import colorama
-                colorama.init()
-            except ImportError:
-                pass
+            init_colors()
+            
+            # Collection runs in the background so a slow collector never
+            # delays key handling or redraws
+            self.collector.start()
             
+            screen = get_screen()
+            next_frame = time.monotonic()
             while self.running:
-                # Check for user input
-                action = self.check_input()
+                # Wait for a key until the next frame is due
+                action = self.check_input(max(0.0, next_frame - time.monotonic()))
                 if action == 'quit':
                     break
+                if action == 'refresh':
+                    self.collector.request_refresh()
+                    screen.invalidate()
+                if action == 'profile':
+                    # Timing is only recorded while the overlay is shown
+                    stage_timer.enabled = not stage_timer.enabled
+                    stage_timer.reset()
+                    usage.sample()
+                    next_frame = time.monotonic()
                 
-                # Collect data
-                system_data = get_system_stats()
-                network_data = get_network_stats()
+                now = time.monotonic()
+                if now < next_frame:
+                    continue
+                next_frame = next_deadline(next_frame, FRAME_INTERVAL, now)
                 
-                # Render dashboard
-                render_dashboard(system_data, network_data)
-                
-                # Wait for next refresh
-                time.sleep(REFRESH_INTERVAL)
+                # Render the latest snapshot; unchanged lines cost nothing
+                timed = stage_timer.enabled
+                if timed:
+                    started = time.perf_counter()
+                snapshot = self.collector.snapshot
+                if snapshot is None:
+                    lines = [f"{Colors.DARK_GREY}Collecting system data...{Colors.RESET}"]
+                else:
+                    lines = build_dashboard(snapshot.system, snapshot.network, self.history,
+                                            health=snapshot.health, pacer=self.pacer)
+                if timed:
+                    laid_out = time.perf_counter()
+                    stage_timer.record('layout', laid_out - started)
+                    lines = build_profile_overlay(stage_timer.durations(), *usage.sample()) + lines
+                screen.draw(lines)
+                if timed:
+                    stage_timer.record('write', time.perf_counter() - laid_out)
         
         except KeyboardInterrupt:
             # Handle Ctrl+C gracefully
             pass
         
         finally:
+            self.collector.stop()
             self.cleanup()
     
     def cleanup(self):
         """Clean up terminal and exit"""
+        from .modules.ui_renderer import clear_screen, get_screen
+        
         self.restore_terminal()
+        get_screen().close()
         clear_screen()
         print("Yalla dashboard closed. Stay secure! 🔒\n")
 
 
-def parse_arguments():
-    """Parse command-line arguments"""
+def parse_arguments(argv=None):
+    """Parse command-line arguments (sys.argv[1:] by default)"""
     parser = argparse.ArgumentParser(
         description='Yalla - Interactive Security Dashboard',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -136,6 +162,18 @@ Examples:
   yalla -p           # Show public IP address
   yalla -c -m        # Show CPU and memory info
   yalla -s           # Show system stats summary
+  yalla -c -m --json # CPU and memory as a JSON object
+  yalla -s --ndjson  # One JSON line per section, for scripts
+  yalla record --out yalla.log   # Record snapshots without a terminal
+  yalla replay yalla.log         # Play a recording back
+  yalla serve --metrics :9184    # Prometheus/OpenMetrics endpoint
+  yalla daemon &                 # Later flag queries read its snapshot
+  yalla agent                    # Stream snapshots to fleet viewers
+  yalla fleet web1 web2 db1:9200 # One box per agent
+  yalla web                      # Dashboard for browsers on this machine
+  yalla --source sim:processes=50k,sockets=500k,cpus=256  # Simulated host
+  yalla --history daemon         # Keep metric history while collecting
+  yalla history --metric cpu --since 6h --step 1m --chart
         """
     )
     
@@ -156,63 +194,193 @@ Examples:
                         help='Display system statistics summary')
     parser.add_argument('-u', '--uptime', action='store_true',
                         help='Display system uptime')
+    
+    # Output format for the flags above
+    output_group = parser.add_mutually_exclusive_group()
+    output_group.add_argument('--json', action='store_true',
+                              help='Print the selected sections as one JSON object')
+    output_group.add_argument('--ndjson', action='store_true',
+                              help='Print one JSON line per selected section')
+    parser.add_argument('--no-daemon', action='store_true',
+                        help='Collect directly even if yalla daemon is running')
+    parser.add_argument('--source', metavar='SPEC',
+                        help="Read metrics from 'psutil' (default) or a simulated host, "
+                             "e.g. 'sim:processes=50k,sockets=500k,cpus=256,churn=0.02'")
 
+    parser.add_argument('--offload', action='store_true',
+                        help='Scan connections and processes in a separate worker process')
+    parser.add_argument('--history', action='store_true',
+                        help='Keep metric history in an SQLite database (~/.local/share/yalla/history.db)')
+    parser.add_argument('--history-db', metavar='FILE',
+                        help='Keep metric history in FILE instead of the default database')
+    parser.add_argument('--log', metavar='FILE',
+                        help='Append collector errors, timeouts and recoveries to FILE')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='Profile the run; FILE.folded/.collapsed gets collapsed stacks, anything else cProfile stats')
     parser.add_argument('--version', action='version',
                         version=f'%(prog)s {__version__}')
     
-    return parser.parse_args()
+    # Subcommands
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    
+    record_parser = subparsers.add_parser('record', help='Record system snapshots to a binary log')
+    record_parser.add_argument('--out', required=True, metavar='FILE',
+                               help='Log file to append to')
+    record_parser.add_argument('--interval', type=float, default=RECORD_INTERVAL, metavar='SECONDS',
+                               help=f'Seconds between samples (default: {RECORD_INTERVAL})')
+    record_parser.add_argument('--max-bytes', type=int, default=RECORD_MAX_BYTES, metavar='BYTES',
+                               help='Rotate the log once it reaches this size')
+    record_parser.add_argument('--backups', type=int, default=RECORD_BACKUPS, metavar='N',
+                               help=f'Rotated logs to keep (default: {RECORD_BACKUPS})')
+    
+    replay_parser = subparsers.add_parser('replay', help='Replay a recorded log in the dashboard')
+    replay_parser.add_argument('file', help='Log written by yalla record')
+    replay_parser.add_argument('--speed', type=float, default=1, metavar='X',
+                               help='Playback speed multiplier (default: 1)')
+    replay_parser.add_argument('--start', metavar='TIME',
+                               help='Start at HH:MM[:SS], YYYY-MM-DD HH:MM[:SS] or +offset like +15m')
+    
+    serve_parser = subparsers.add_parser('serve', help='Expose metrics for Prometheus')
+    serve_parser.add_argument('--metrics', default=METRICS_ADDRESS, metavar='[HOST]:PORT',
+                              help=f'Address for the OpenMetrics endpoint (default: {METRICS_ADDRESS})')
+    
+    agent_parser = subparsers.add_parser('agent', help='Stream snapshots to yalla fleet viewers over TCP')
+    agent_parser.add_argument('--listen', default=f':{AGENT_PORT}', metavar='[HOST][:PORT]',
+                              help=f'Address to listen on (default: :{AGENT_PORT})')
+    
+    fleet_parser = subparsers.add_parser('fleet', help='Watch several agents in one grid')
+    fleet_parser.add_argument('hosts', nargs='+', metavar='HOST[:PORT]',
+                              help=f'Agents to follow (default port: {AGENT_PORT})')
+    
+    web_parser = subparsers.add_parser('web', help='Serve a live dashboard to web browsers')
+    web_parser.add_argument('--listen', default=WEB_ADDRESS, metavar='[HOST]:PORT',
+                            help=f'Address to listen on (default: {WEB_ADDRESS})')
+    
+    daemon_parser = subparsers.add_parser('daemon', help='Collect continuously and serve snapshots to flag queries')
+    daemon_parser.add_argument('--socket', metavar='PATH',
+                               help='Unix socket to listen on (default: $YALLA_SOCKET or a per-user path)')
+    
+    history_parser = subparsers.add_parser('history', help='Query metrics stored with --history')
+    history_parser.add_argument('--metric', default='cpu', metavar='NAME',
+                                help='cpu, memory, disk, load, processes, rx, tx or a stored name '
+                                     'such as net.eth0.bytes_recv (default: cpu)')
+    history_parser.add_argument('--since', default='1h', metavar='DURATION',
+                                help='How far back to go, e.g. 15m, 6h, 30d (default: 1h)')
+    history_parser.add_argument('--step', metavar='DURATION',
+                                help='Bucket size, e.g. 10s, 1m, 1h (default: about 120 rows)')
+    history_parser.add_argument('--format', dest='output', choices=('table', 'csv', 'json'), default='table',
+                                help='Output format (default: table)')
+    history_parser.add_argument('--chart', action='store_true',
+                                help='Add a bar of each average to the table')
+    history_parser.add_argument('--db', metavar='FILE',
+                                help='Database to read (default: --history-db or ~/.local/share/yalla/history.db)')
+    
+    return parser.parse_args(argv)
 
 
 def main():
     """Entry point"""
     args = parse_arguments()
+    if not args.profile:
+        run_command(args)
+        return
     
-    # Initialize colorama for Windows
+    from .modules.profiling import start_profiler
+    profiler = start_profiler(args.profile)
     try:
-        import colorama
-        colorama.init()
-    except ImportError:
-        pass
+        run_command(args)
+    finally:
+        profiler.stop(args.profile)
+        print(f"Profile written to {args.profile}", file=sys.stderr)
+
+
+def enable_history_store(path=None):
+    """Store the metrics of every collection pass from now on"""
+    import atexit
+    from .modules.collector import subscribe_all
+    from .modules.history_store import HistoryStore
+
+    store = HistoryStore(path or None)
+    subscribe_all(store.record_snapshot)
+    # Writes the last partial batch however the mode exits
+    atexit.register(store.close)
+    return store
+
+
+def run_command(args):
+    """Run the mode selected on the command line"""
+    setup_logging(args.log, args.command)
+    if args.source:
+        from .modules.datasource import set_source
+        try:
+            set_source(args.source)
+        except ValueError as e:
+            print(f"{Colors.RED}Invalid --source: {e}{Colors.RESET}")
+            sys.exit(1)
+    
+    if args.offload or OFFLOAD_HEAVY_COLLECTORS:
+        from .modules.offload import enable_offload
+        enable_offload()
+    
+    if args.command == 'history':
+        from .modules.history_store import run_history
+        sys.exit(run_history(args.metric, args.since, step=args.step, output=args.output,
+                             chart=args.chart, path=args.db or args.history_db))
+    
+    if args.history or args.history_db or HISTORY_STORE:
+        enable_history_store(args.history_db)
+    
+    if args.command == 'record':
+        from .modules.recorder import run_recorder
+        sys.exit(run_recorder(args.out, interval=args.interval, max_bytes=args.max_bytes,
+                              backups=args.backups))
+    
+    if args.command == 'replay':
+        from .modules.replay import run_replay
+        sys.exit(run_replay(args.file, speed=args.speed, start=args.start))
+    
+    if args.command == 'serve':
+        from .modules.exporter import run_exporter
+        sys.exit(run_exporter(args.metrics))
+    
+    if args.command == 'agent':
+        from .modules.agent import run_agent
+        sys.exit(run_agent(args.listen))
+    
+    if args.command == 'fleet':
+        from .modules.fleet import run_fleet
+        sys.exit(run_fleet(args.hosts))
+    
+    if args.command == 'web':
+        from .modules.web import run_web
+        sys.exit(run_web(args.listen))
+    
+    if args.command == 'daemon':
+        from .modules.daemon import run_daemon
+        sys.exit(run_daemon(args.socket))
+    
+    from .modules.info_display import SECTION_DISPLAYS, DEFAULT_JSON_SECTIONS, load_snapshot, print_json
+    from .modules.info_display import display_problems
     
     # Check if any specific info flags are set
-    flags_set = [
-        args.cpu, args.memory, args.disk, args.ip,
-        args.public_ip, args.network, args.stats, args.uptime
-    ]
-    
-    if any(flags_set):
-        # Display specific information based on flags
-        if args.cpu:
-            display_cpu_info()
-            print()  # Add spacing between multiple outputs
-        
-        if args.memory:
-            display_memory_info()
-            print()
-        
-        if args.disk:
-            display_disk_info()
-            print()
-        
-        if args.ip:
-            display_private_ip()
-            print()
-        
-        if args.public_ip:
-            display_public_ip()
-            print()
-        
-        if args.network:
-            display_network_info()
-            print()
-        
-        if args.stats:
-            display_system_stats()
-            print()
-        
-        if args.uptime:
-            display_uptime()
-            print()
+    sections = [name for name, _ in SECTION_DISPLAYS if getattr(args, name)]
+    output_json = args.json or args.ndjson
+    if output_json and not sections:
+        sections = list(DEFAULT_JSON_SECTIONS)
+    
+    if sections:
+        # One snapshot shared by every requested section; a daemon would
+        # answer for the real host, not the requested source
+        snapshot = load_snapshot(sections, use_daemon=not (args.no_daemon or args.source))
+        if output_json:
+            print_json(sections, snapshot, ndjson=args.ndjson)
+            return
+        init_colors()
+        for name, display in SECTION_DISPLAYS:
+            if name in sections:
+                display(snapshot)
+                print()  # Add spacing between multiple outputs
+        display_problems(snapshot)
     else:
         # No flags set, run full interactive dashboard
         dashboard = Dashboard()
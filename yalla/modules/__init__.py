@@ -1,9 +1,44 @@
-"""yalla.modules package"""
-from .system_monitor import get_system_stats, get_top_processes, get_memory_info
-from .network_monitor import get_network_stats, get_public_ip
-from .ui_renderer import render_dashboard, clear_screen
-from .info_display import (
-    display_cpu_info, display_memory_info, display_disk_info,
-    display_private_ip, display_public_ip, display_network_info,
-    display_system_stats, display_uptime
-)
+"""yalla.modules package
+
+Submodules are imported on first use (PEP 562), so a CLI path only pays
+for the modules it needs; psutil in particular is loaded by the monitors.
+"""
+import importlib
+import logging
+
+# Modules log to 'yalla.*'. Nothing is printed unless --log or a headless
+# subcommand adds a handler, so warnings never tear the dashboard
+logging.getLogger('yalla').addHandler(logging.NullHandler())
+
+_EXPORTS = {
+    'get_system_stats': 'system_monitor',
+    'get_top_processes': 'system_monitor',
+    'get_memory_info': 'system_monitor',
+    'get_network_stats': 'network_monitor',
+    'get_public_ip': 'network_monitor',
+    'render_dashboard': 'ui_renderer',
+    'clear_screen': 'ui_renderer',
+    'display_cpu_info': 'info_display',
+    'display_memory_info': 'info_display',
+    'display_disk_info': 'info_display',
+    'display_private_ip': 'info_display',
+    'display_public_ip': 'info_display',
+    'display_network_info': 'info_display',
+    'display_system_stats': 'info_display',
+    'display_uptime': 'info_display',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
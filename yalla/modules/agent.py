@@ -0,0 +1,217 @@
+"""
+Agent Module
+Streams delta-encoded snapshots to fleet viewers over TCP
+
+Frames are JSON lines. A viewer first receives a full frame holding both
+sections, then one delta frame per collection pass carrying only the
+values that changed, recursing into nested dicts (per-interface counters
+and so on). A delta is encoded once and queued to every viewer; a viewer
+that falls too far behind is dropped and resynchronises on reconnect.
+"""
+
+import json
+import queue
+import socket
+import socketserver
+import threading
+
+from yalla.config import Colors, AGENT_PORT
+from yalla.modules.snapshot import Snapshot
+
+SECTIONS = ('system', 'network')
+
+# Marks keys that disappeared inside a delta
+REMOVED_KEY = '__removed__'
+
+# Frames a viewer may have queued before it is dropped
+VIEWER_QUEUE_SIZE = 64
+
+# How often idle viewer threads check whether they should exit
+VIEWER_POLL_INTERVAL = 1.0
+
+
+def parse_target(text, default_port=AGENT_PORT):
+    """Split "host", "host:port", ":port" or "[v6 address]:port" into (host, port)"""
+    if text.startswith('[') and ']' in text:
+        host, _, rest = text[1:].partition(']')
+        port = rest.lstrip(':')
+    elif text.count(':') == 1:
+        host, port = text.split(':')
+    else:
+        # A bare host name, or an IPv6 address without brackets
+        host, port = text, ''
+    return host, int(port) if port else default_port
+
+
+def diff_values(old, new):
+    """Nested dict of the values in `new` that differ from `old`"""
+    delta = {}
+    for key, value in new.items():
+        previous = old.get(key)
+        if key in old and (previous is value or previous == value):
+            continue
+        if isinstance(previous, dict) and isinstance(value, dict):
+            delta[key] = diff_values(previous, value)
+        else:
+            delta[key] = value
+    removed = [key for key in old if key not in new]
+    if removed:
+        delta[REMOVED_KEY] = removed
+    return delta
+
+
+def merge_delta(values, delta):
+    """Copy of `values` with a delta from diff_values() applied"""
+    merged = dict(values)
+    for key, value in delta.items():
+        if key == REMOVED_KEY:
+            for removed in value:
+                merged.pop(removed, None)
+        elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_delta(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def full_frame(snapshot, host):
+    """Frame carrying a complete snapshot"""
+    return {'type': 'full', 'host': host, 'timestamp': snapshot.timestamp,
+            'system': snapshot.system, 'network': snapshot.network}
+
+
+def delta_frame(previous, snapshot):
+    """Frame carrying what changed since `previous`; with no changes it is a heartbeat"""
+    frame = {'type': 'delta', 'timestamp': snapshot.timestamp}
+    for section in SECTIONS:
+        delta = diff_values(getattr(previous, section), getattr(snapshot, section))
+        if delta:
+            frame[section] = delta
+    return frame
+
+
+def encode_frame(frame):
+    """Wire form of a frame: one line of JSON"""
+    return json.dumps(frame, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+
+
+def apply_frame(snapshot, frame):
+    """Snapshot after receiving `frame`; `snapshot` is None before the first full frame"""
+    if frame['type'] == 'full':
+        return Snapshot(frame['timestamp'], frame['system'], frame['network'])
+    if snapshot is None:
+        raise ValueError('delta frame before the first full frame')
+    sections = {section: merge_delta(getattr(snapshot, section), frame.get(section, {}))
+                for section in SECTIONS}
+    return Snapshot(frame['timestamp'], sections['system'], sections['network'])
+
+
+class _Viewer:
+    """Frames waiting to be sent to one connected viewer"""
+
+    def __init__(self):
+        self.frames = queue.Queue(VIEWER_QUEUE_SIZE)
+        self.dropped = False
+
+
+class AgentHandler(socketserver.BaseRequestHandler):
+    """Send a full frame, then every delta, until the viewer goes away"""
+
+    def handle(self):
+        viewer = self.server.attach()
+        self.request.settimeout(self.server.send_timeout)
+        try:
+            while True:
+                try:
+                    data = viewer.frames.get(timeout=VIEWER_POLL_INTERVAL)
+                except queue.Empty:
+                    if viewer.dropped or self.server.closing:
+                        return
+                    continue
+                self.request.sendall(data)
+        except OSError:
+            pass
+        finally:
+            self.server.detach(viewer)
+
+
+class AgentServer(socketserver.ThreadingTCPServer):
+    """TCP server broadcasting published snapshots to every viewer"""
+
+    allow_reuse_address = True
+    daemon_threads = True
+    send_timeout = 10
+
+    def __init__(self, address, host_name=None):
+        super().__init__(address, AgentHandler)
+        self.host_name = host_name or socket.gethostname()
+        self.closing = False
+        self._snapshot = None
+        self._viewers = set()
+        self._lock = threading.Lock()
+
+    def attach(self):
+        """Register a viewer, starting it with a full frame if data exists"""
+        viewer = _Viewer()
+        with self._lock:
+            if self._snapshot is not None:
+                viewer.frames.put_nowait(encode_frame(full_frame(self._snapshot, self.host_name)))
+            self._viewers.add(viewer)
+        return viewer
+
+    def detach(self, viewer):
+        """Forget a viewer"""
+        with self._lock:
+            self._viewers.discard(viewer)
+
+    def publish(self, snapshot, ran=None):
+        """Collector subscriber: queue the change since the last snapshot to every viewer"""
+        with self._lock:
+            previous, self._snapshot = self._snapshot, snapshot
+            if previous is None:
+                frame = full_frame(snapshot, self.host_name)
+            else:
+                frame = delta_frame(previous, snapshot)
+            data = encode_frame(frame)
+            for viewer in list(self._viewers):
+                try:
+                    viewer.frames.put_nowait(data)
+                except queue.Full:
+                    # Its next frame would be a delta against data it never got
+                    viewer.dropped = True
+                    self._viewers.discard(viewer)
+
+    def server_close(self):
+        self.closing = True
+        super().server_close()
+
+
+def run_agent(address=f':{AGENT_PORT}'):
+    """Collect in the background and stream snapshots until interrupted"""
+    import signal
+    from yalla.modules.collector import BackgroundCollector
+
+    try:
+        server = AgentServer(parse_target(address))
+    except (OSError, ValueError) as e:
+        print(f"{Colors.RED}Cannot listen on {address}: {e}{Colors.RESET}")
+        return 1
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+    collector = BackgroundCollector()
+    collector.subscribe(server.publish)
+    collector.start()
+    host, port = server.server_address[:2]
+    print(f"{Colors.BLUE}Streaming snapshots on {host or '*'}:{port}{Colors.RESET} "
+          f"{Colors.DARK_GREY}(Ctrl+C to stop){Colors.RESET}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        collector.stop()
+    return 0
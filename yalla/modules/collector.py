@@ -0,0 +1,218 @@
+"""
+Background Collector Module
+Runs the registered collectors off the render thread, each at its own cadence, and publishes snapshots
+"""
+
+import logging
+import threading
+import time
+
+from yalla.config import REFRESH_INTERVAL
+from yalla.modules.registry import get_collectors, COST_LOW, COST_MEDIUM, COST_HIGH
+from yalla.modules.snapshot import Snapshot
+from yalla.modules.pacing import next_deadline
+from yalla.modules.supervisor import Supervisor
+# Imported for their side effect of registering collectors
+from yalla.modules import system_monitor, network_monitor  # noqa: F401
+
+# Cheap collectors run (and are published) before expensive ones
+COST_ORDER = (COST_LOW, COST_MEDIUM, COST_HIGH)
+
+log = logging.getLogger(__name__)
+
+# Callbacks every BackgroundCollector starts with (see subscribe_all())
+_default_subscribers = []
+
+
+def subscribe_all(callback):
+    """Subscribe `callback` to every collection loop started from now on"""
+    _default_subscribers.append(callback)
+
+
+def default_subscribers():
+    """Callbacks registered with subscribe_all()"""
+    return list(_default_subscribers)
+
+
+def notify_subscribers(callbacks, snapshot, ran):
+    """Call every `callback(snapshot, ran)`, logging the ones that fail"""
+    for callback in callbacks:
+        try:
+            callback(snapshot, ran)
+        except Exception:
+            log.exception("snapshot subscriber %r failed", callback)
+
+
+class CollectorScheduler:
+    """Run each registered collector only when its own interval has elapsed
+
+    Intervals are multiplied by `scale` (see set_scale()). The next run is
+    scheduled from the previous due time, not from when the run finished,
+    so slow collectors do not drift. Due collectors run concurrently under
+    the supervisor's deadlines; one that fails or overruns keeps its last
+    value and is listed in problems().
+    """
+
+    def __init__(self, collectors=None):
+        self.collectors = list(collectors) if collectors is not None else get_collectors()
+        self.sections = {'system': {}, 'network': {}}
+        self.scale = 1.0
+        self.supervisor = Supervisor()
+        self.failed = []
+        self._due = {spec.name: 0.0 for spec in self.collectors}
+
+    def force(self):
+        """Make every periodic collector due now"""
+        for spec in self.collectors:
+            if spec.interval is not None:
+                self._due[spec.name] = 0.0
+
+    def set_scale(self, scale, now=None):
+        """Stretch every periodic interval by `scale`; pending runs move closer when it shrinks"""
+        if scale < self.scale:
+            if now is None:
+                now = time.monotonic()
+            for spec in self.collectors:
+                due = self._due[spec.name]
+                if spec.interval is not None and due is not None:
+                    self._due[spec.name] = min(due, now + spec.interval * scale)
+        self.scale = scale
+
+    def next_due(self):
+        """Monotonic time at which the next collector becomes due, or None"""
+        pending = [due for due in self._due.values() if due is not None]
+        return min(pending) if pending else None
+
+    def run_due(self, now=None, cost=None):
+        """Run the collectors that are due (optionally of one cost) and merge their results
+
+        Returns the names of the collectors that succeeded; the ones that
+        failed or timed out are left in `failed`.
+        """
+        if now is None:
+            now = time.monotonic()
+        due_specs = [spec for spec in self.collectors
+                     if self._due[spec.name] is not None and self._due[spec.name] <= now
+                     and (cost is None or spec.cost == cost)]
+        results = self.supervisor.run(due_specs, now) if due_specs else {}
+        ran = []
+        self.failed = []
+        updates = {}
+        for spec in due_specs:
+            result = results.get(spec.name)
+            due = self._due[spec.name]
+            if spec.interval is not None:
+                due = next_deadline(due, spec.interval * self.scale, now)
+            elif spec.name not in results:
+                # A one-shot collector that failed is retried later
+                due = now + REFRESH_INTERVAL
+            else:
+                due = None
+            paused_until = self.supervisor.paused_until(spec.name)
+            if due is not None and paused_until is not None:
+                due = max(due, paused_until)
+            self._due[spec.name] = due
+            if spec.name not in results:
+                self.failed.append(spec.name)
+                continue
+            if result:
+                updates.setdefault(spec.section, {}).update(result)
+            ran.append(spec.name)
+
+        # Copy-on-write so previously published snapshots stay untouched
+        for section, values in updates.items():
+            merged = dict(self.sections.get(section, {}))
+            merged.update(values)
+            self.sections[section] = merged
+        return ran
+
+    def problems(self):
+        """Collectors currently failing, as published in Snapshot.health"""
+        return self.supervisor.problems()
+
+    def close(self):
+        """Stop the worker threads"""
+        self.supervisor.close()
+
+
+class BackgroundCollector:
+    """Collect system and network data in a daemon thread
+
+    With a `pacer` (an AdaptivePacer), every pass adjusts how often the
+    collectors run; without one they keep their configured intervals.
+    """
+
+    def __init__(self, scheduler=None, pacer=None):
+        self.scheduler = scheduler if scheduler is not None else CollectorScheduler()
+        self.pacer = pacer
+        self._snapshot = None
+        self._subscribers = default_subscribers()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def snapshot(self):
+        """Latest published snapshot, or None before the first collection"""
+        return self._snapshot
+
+    def start(self):
+        """Start the collection thread"""
+        if self._thread is not None:
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name='yalla-collector', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Ask the collection thread to exit and wait briefly for it"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.scheduler.close()
+
+    def request_refresh(self):
+        """Re-run every periodic collector now instead of waiting for its interval"""
+        self.scheduler.force()
+        self._wakeup.set()
+
+    def subscribe(self, callback):
+        """Call `callback(snapshot, ran)` on the collector thread after every pass
+
+        `ran` is the set of collector names that ran during the pass.
+        """
+        self._subscribers.append(callback)
+
+    def collect_once(self):
+        """Run every collector that is due, publishing after each cost tier"""
+        ran = set()
+        published = False
+        for cost in COST_ORDER:
+            names = self.scheduler.run_due(cost=cost)
+            if names or self.scheduler.failed:
+                ran.update(names)
+                self._publish()
+                published = True
+        if published:
+            notify_subscribers(self._subscribers, self._snapshot, ran)
+            if self.pacer is not None:
+                self.pacer.update(self._snapshot, ran)
+                self.scheduler.set_scale(self.pacer.scale)
+        return self._snapshot
+
+    def _publish(self):
+        """Publish the scheduler's current sections as a new snapshot"""
+        sections = self.scheduler.sections
+        self._snapshot = Snapshot(time.time(), sections['system'], sections['network'],
+                                  self.scheduler.problems())
+
+    def _run(self):
+        """Collection loop"""
+        while not self._stopped.is_set():
+            self.collect_once()
+            next_due = self.scheduler.next_due()
+            timeout = REFRESH_INTERVAL if next_due is None else max(0.0, next_due - time.monotonic())
+            self._wakeup.wait(timeout)
+            self._wakeup.clear()
@@ -0,0 +1,173 @@
+"""
+Daemon Module
+Collects continuously and serves the latest snapshot over a Unix domain socket
+
+A client connects, reads one JSON document and the connection is closed.
+The document is encoded once per collection pass, so a query costs the
+daemon a single sendall() and the client never touches psutil.
+"""
+
+import os
+import socket
+import struct
+import time
+
+from yalla.config import Colors, DAEMON_SOCKET, DAEMON_MAX_AGE
+
+HAS_UNIX_SOCKETS = hasattr(socket, 'AF_UNIX')
+
+# How long a client waits for the daemon before collecting by itself
+CLIENT_TIMEOUT = 0.5
+
+
+def default_socket_path():
+    """Socket path from $YALLA_SOCKET, the config, or a per-user default"""
+    path = os.environ.get('YALLA_SOCKET') or DAEMON_SOCKET
+    if path:
+        return path
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'yalla.sock')
+    import tempfile
+    uid = os.getuid() if hasattr(os, 'getuid') else os.getpid()
+    return os.path.join(tempfile.gettempdir(), f'yalla-{uid}.sock')
+
+
+def encode_snapshot(snapshot):
+    """Wire form of a snapshot"""
+    import json
+
+    document = {'timestamp': snapshot.timestamp, 'system': snapshot.system, 'network': snapshot.network,
+                'health': snapshot.health}
+    return json.dumps(document, separators=(',', ':'), default=str).encode('utf-8')
+
+
+def decode_snapshot(data):
+    """Snapshot from its wire form"""
+    import json
+    from yalla.modules.snapshot import Snapshot
+
+    document = json.loads(data.decode('utf-8'))
+    return Snapshot(document['timestamp'], document['system'], document['network'], document.get('health'))
+
+
+def peer_uid(sock, path):
+    """User ID of the process listening on a connected Unix socket"""
+    if hasattr(socket, 'SO_PEERCRED'):
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+        return struct.unpack('3i', credentials)[1]
+    # No peer credentials: trust whoever created the socket file
+    return os.stat(path).st_uid
+
+
+def fetch_snapshot(path=None, timeout=CLIENT_TIMEOUT, max_age=DAEMON_MAX_AGE):
+    """Latest snapshot from a running daemon, or None if there is no usable one"""
+    if not HAS_UNIX_SOCKETS:
+        return None
+    path = path or default_socket_path()
+    chunks = []
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path)
+            # In a shared /tmp another user could bind the socket first and feed us made-up numbers
+            if hasattr(os, 'getuid') and peer_uid(sock, path) not in (os.getuid(), 0):
+                return None
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+        snapshot = decode_snapshot(b''.join(chunks))
+    except (OSError, ValueError, KeyError):
+        # No daemon, or it has not finished its first pass yet
+        return None
+    if time.time() - snapshot.timestamp > max_age:
+        return None
+    return snapshot
+
+
+class SnapshotCache:
+    """Holds the latest encoded snapshot"""
+
+    def __init__(self):
+        self.data = None
+
+    def update(self, snapshot, ran=None):
+        """Collector subscriber: re-encode after every pass"""
+        self.data = encode_snapshot(snapshot)
+
+
+def _is_listening(path):
+    """Whether another process accepts connections on `path`"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(CLIENT_TIMEOUT)
+            sock.connect(path)
+        return True
+    except OSError:
+        return False
+
+
+def make_server(path, cache):
+    """Listening Unix socket server answering with `cache`, readable by this user only"""
+    import socketserver
+
+    class SnapshotHandler(socketserver.BaseRequestHandler):
+        def handle(self):
+            data = cache.data
+            if data is not None:
+                self.request.sendall(data)
+
+    if os.path.exists(path):
+        if _is_listening(path):
+            raise OSError(f"a daemon is already listening on {path}")
+        # Left behind by a daemon that did not shut down cleanly
+        os.unlink(path)
+
+    old_umask = os.umask(0o177)
+    try:
+        server = socketserver.ThreadingUnixStreamServer(path, SnapshotHandler)
+    finally:
+        os.umask(old_umask)
+    server.daemon_threads = True
+    return server
+
+
+def run_daemon(path=None):
+    """Collect in the background and serve snapshots until interrupted"""
+    if not HAS_UNIX_SOCKETS:
+        print(f"{Colors.RED}yalla daemon needs Unix domain sockets, which this platform lacks{Colors.RESET}")
+        return 1
+    import signal
+    from yalla.modules.collector import BackgroundCollector
+
+    path = path or default_socket_path()
+    cache = SnapshotCache()
+    collector = BackgroundCollector()
+    collector.subscribe(cache.update)
+    try:
+        server = make_server(path, cache)
+    except OSError as e:
+        print(f"{Colors.RED}Cannot listen on {path}: {e}{Colors.RESET}")
+        return 1
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, terminate)
+    collector.start()
+    print(f"{Colors.BLUE}Serving snapshots on {path}{Colors.RESET} "
+          f"{Colors.DARK_GREY}(Ctrl+C to stop){Colors.RESET}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        collector.stop()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    return 0
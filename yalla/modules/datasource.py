@@ -0,0 +1,67 @@
+"""
+Data Source Module
+Chooses where the monitors read the host from: psutil, or a simulated host
+
+A source is any object offering the psutil calls the monitors make
+(cpu_percent, virtual_memory, pids, Process, net_connections, ...) and
+psutil's exception classes. The /proc readers describe the real machine,
+so they are only used while the source is psutil itself.
+"""
+
+from yalla.config import DATA_SOURCE
+from yalla.modules.procfs import get_backend
+
+_source = None
+_spec = None
+_native = True
+
+
+def parse_source(spec):
+    """Source for a spec such as 'psutil' or 'sim:processes=50k,sockets=500k,cpus=256'"""
+    name, _, options = spec.partition(':')
+    if name == 'psutil':
+        if options:
+            raise ValueError('the psutil source takes no options')
+        import psutil
+        return psutil
+    if name in ('sim', 'simulator'):
+        from yalla.modules.simulator import SimulatedHost, parse_options
+        return SimulatedHost(**parse_options(options))
+    raise ValueError(f"unknown data source {name!r} (expected 'psutil' or 'sim')")
+
+
+def set_source(source):
+    """Make the monitors read from `source`, a spec string or a source object"""
+    global _source, _spec, _native
+    if isinstance(source, str):
+        _spec, source = source, parse_source(source)
+    else:
+        _spec = None
+    _source = source
+    _native = getattr(source, '__name__', None) == 'psutil'
+
+
+def get_source():
+    """The active source, DATA_SOURCE until set_source() picks another"""
+    if _source is None:
+        set_source(DATA_SOURCE)
+    return _source
+
+
+def get_source_spec():
+    """The spec the active source was built from, or None for a source object"""
+    get_source()
+    return _spec
+
+
+def is_simulated():
+    """True when the monitors are not reading the real host"""
+    get_source()
+    return not _native
+
+
+def get_procfs_backend():
+    """The /proc backend, or None when it is unavailable or the source is simulated"""
+    if is_simulated():
+        return None
+    return get_backend()
@@ -0,0 +1,192 @@
+"""
+Exporter Module
+Serves the latest snapshot as OpenMetrics text for Prometheus
+
+The exposition bodies are rendered once per collection pass by the
+background collector; scrapes only return the cached bytes, so any
+number of concurrent scrapers never trigger collection themselves.
+Scrapers that do not ask for OpenMetrics get the Prometheus 0.0.4 text
+format, which has no info type, no _total convention and no # EOF.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from yalla.config import Colors
+from yalla._version import __version__
+
+OPENMETRICS_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+TEXT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# (metric, type, help, system stats key)
+_SYSTEM_METRICS = (
+    ('yalla_cpu_usage_percent', 'gauge', 'System-wide CPU utilisation.', 'cpu_percent'),
+    ('yalla_cpu_count', 'gauge', 'Number of logical CPUs.', 'cpu_count'),
+    ('yalla_memory_total_bytes', 'gauge', 'Total physical memory.', 'memory_total'),
+    ('yalla_memory_used_bytes', 'gauge', 'Memory in use.', 'memory_used'),
+    ('yalla_memory_available_bytes', 'gauge', 'Memory available for new processes.', 'memory_available'),
+    ('yalla_disk_total_bytes', 'gauge', 'Size of the system drive.', 'disk_total'),
+    ('yalla_disk_used_bytes', 'gauge', 'Space used on the system drive.', 'disk_used'),
+    ('yalla_disk_free_bytes', 'gauge', 'Space free on the system drive.', 'disk_free'),
+    ('yalla_processes', 'gauge', 'Number of running processes.', 'process_count'),
+    ('yalla_boot_time_seconds', 'gauge', 'System boot time as a Unix timestamp.', 'boot_time'),
+)
+
+# Collectors whose output is not exported; skipping them keeps the exporter cheap
+_UNUSED_COLLECTORS = ('top_processes', 'connections', 'interfaces', 'memory_info')
+
+# (metric, help, io counter key)
+_NETWORK_COUNTERS = (
+    ('yalla_network_receive_bytes', 'Bytes received.', 'bytes_recv'),
+    ('yalla_network_transmit_bytes', 'Bytes sent.', 'bytes_sent'),
+    ('yalla_network_receive_packets', 'Packets received.', 'packets_recv'),
+    ('yalla_network_transmit_packets', 'Packets sent.', 'packets_sent'),
+    ('yalla_network_receive_errors', 'Receive errors.', 'errin'),
+    ('yalla_network_transmit_errors', 'Transmit errors.', 'errout'),
+    ('yalla_network_receive_drops', 'Dropped incoming packets.', 'dropin'),
+    ('yalla_network_transmit_drops', 'Dropped outgoing packets.', 'dropout'),
+)
+
+
+def _escape(value):
+    """Escape a label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_openmetrics(snapshot, openmetrics=True):
+    """OpenMetrics exposition of a snapshot, or Prometheus 0.0.4 text, as bytes"""
+    system_data, network_data = snapshot.system, snapshot.network
+    lines = []
+
+    def family(name, metric_type, help_text):
+        if not openmetrics and metric_type != 'gauge':
+            # 0.0.4 names the family after its samples and has no info type
+            name += '_info' if metric_type == 'info' else '_total'
+            metric_type = 'gauge' if metric_type == 'info' else metric_type
+        lines.append(f'# TYPE {name} {metric_type}')
+        lines.append(f'# HELP {name} {help_text}')
+
+    family('yalla_build', 'info', 'Yalla exporter version.')
+    lines.append(f'yalla_build_info{{version="{_escape(__version__)}"}} 1')
+
+    for name, metric_type, help_text, key in _SYSTEM_METRICS:
+        value = system_data.get(key)
+        if value is None:
+            continue
+        family(name, metric_type, help_text)
+        lines.append(f'{name} {value}')
+
+    if system_data.get('load_avg'):
+        family('yalla_load_average', 'gauge', 'System load average.')
+        for period, value in zip(('1m', '5m', '15m'), system_data['load_avg']):
+            lines.append(f'yalla_load_average{{period="{period}"}} {value}')
+
+    io_stats = network_data.get('io_stats') or {}
+    if io_stats:
+        for name, help_text, key in _NETWORK_COUNTERS:
+            family(name, 'counter', help_text)
+            for interface_name, counters in io_stats.items():
+                lines.append(f'{name}_total{{interface="{_escape(interface_name)}"}} {counters.get(key, 0)}')
+
+    states = network_data.get('connection_states')
+    if states is not None:
+        family('yalla_network_connections', 'gauge', 'Inet connections by state.')
+        for state, count in sorted(states.items()):
+            lines.append(f'yalla_network_connections{{state="{_escape(state)}"}} {count}')
+
+    if snapshot.health:
+        family('yalla_collector_failures', 'gauge', 'Consecutive failures or timeouts of a collector whose value is stale.')
+        for collector, problem in sorted(snapshot.health.items()):
+            lines.append(f'yalla_collector_failures{{collector="{_escape(collector)}"}} {problem["failures"]}')
+
+    family('yalla_last_collection_timestamp_seconds', 'gauge', 'When the exposed values were collected.')
+    lines.append(f'yalla_last_collection_timestamp_seconds {snapshot.timestamp:.3f}')
+
+    if openmetrics:
+        lines.append('# EOF')
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+class MetricsCache:
+    """Holds the latest pre-rendered exposition bodies"""
+
+    def __init__(self):
+        self.bodies = None  # (OpenMetrics, 0.0.4 text)
+
+    def update(self, snapshot, ran=None):
+        """Collector subscriber: re-render both bodies from a new snapshot"""
+        self.bodies = (render_openmetrics(snapshot), render_openmetrics(snapshot, openmetrics=False))
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Serve the cached body on /metrics"""
+
+    server_version = f'yalla/{__version__}'
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        if self.path == '/':
+            body = b'<html><body><a href="/metrics">Metrics</a></body></html>\n'
+            content_type = 'text/html; charset=utf-8'
+        else:
+            bodies = self.server.cache.bodies
+            if bodies is None:
+                self.send_error(503, 'First collection still running')
+                return
+            if 'application/openmetrics-text' in self.headers.get('Accept', ''):
+                body, content_type = bodies[0], OPENMETRICS_TYPE
+            else:
+                body, content_type = bodies[1], TEXT_TYPE
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the terminal
+        pass
+
+
+def parse_address(address):
+    """Split "[host]:port" into (host, port); an empty host listens everywhere"""
+    host, _, port = address.rpartition(':')
+    return host.strip('[]'), int(port)
+
+
+def make_server(address, cache):
+    """HTTP server bound to `address` serving `cache`"""
+    server = ThreadingHTTPServer(parse_address(address), MetricsHandler)
+    server.daemon_threads = True
+    server.cache = cache
+    return server
+
+
+def run_exporter(address):
+    """Collect in the background and serve /metrics until interrupted"""
+    from yalla.modules.collector import BackgroundCollector, CollectorScheduler
+    from yalla.modules.registry import get_collectors
+
+    cache = MetricsCache()
+    collectors = [spec for spec in get_collectors() if spec.name not in _UNUSED_COLLECTORS]
+    collector = BackgroundCollector(CollectorScheduler(collectors))
+    collector.subscribe(cache.update)
+    try:
+        server = make_server(address, cache)
+    except (OSError, ValueError) as e:
+        print(f"{Colors.RED}Cannot listen on {address}: {e}{Colors.RESET}")
+        return 1
+
+    collector.start()
+    host, port = server.server_address[:2]
+    print(f"{Colors.BLUE}Serving metrics on http://{host}:{port}/metrics{Colors.RESET} "
+          f"{Colors.DARK_GREY}(Ctrl+C to stop){Colors.RESET}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        collector.stop()
+    return 0
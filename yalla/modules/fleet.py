@@ -0,0 +1,197 @@
+"""
+Fleet Module
+Follows many yalla agents at once and shows one compact box per host
+
+One asyncio task per agent keeps a persistent connection, applies the
+frames it receives to that host's snapshot and reconnects with
+exponential backoff when the agent goes away. Hosts that have not
+reported for FLEET_STALE_AFTER seconds are marked stale.
+"""
+
+import asyncio
+import json
+import time
+
+from yalla.config import Colors, FRAME_INTERVAL, FLEET_STALE_AFTER, FLEET_BACKOFF_MIN, FLEET_BACKOFF_MAX
+from yalla.config import FLEET_CELL_WIDTH
+from yalla.modules.agent import apply_frame, parse_target
+from yalla.modules.ui_renderer import (
+    create_progress_bar, create_section, format_rate, format_uptime, get_terminal_size, pad_visible
+)
+
+# Agents send full frames of a few KB; leave plenty of headroom
+READ_LIMIT = 1024 * 1024
+
+# Bar length inside a host box
+CELL_BAR_LENGTH = 14
+
+
+class HostState:
+    """What the fleet view knows about one agent"""
+
+    def __init__(self, target):
+        self.name = target
+        self.host, self.port = parse_target(target)
+        self.snapshot = None
+        self.last_seen = None
+        self.connected = False
+        self.error = None
+        self.retry_at = None
+
+    def receive(self, frame):
+        """Apply one frame from the agent"""
+        self.snapshot = apply_frame(self.snapshot, frame)
+        self.last_seen = time.monotonic()
+
+    def disconnect(self, error):
+        """Record a lost connection; the last snapshot is kept"""
+        self.connected = False
+        self.error = getattr(error, 'strerror', None) or str(error) or type(error).__name__
+
+    def status(self, now=None, stale_after=FLEET_STALE_AFTER):
+        """'live', 'stale' or 'down' (never reported)"""
+        if self.last_seen is None:
+            return 'down'
+        if now is None:
+            now = time.monotonic()
+        if self.connected and now - self.last_seen <= stale_after:
+            return 'live'
+        return 'stale'
+
+
+async def follow_host(state, stale_after=FLEET_STALE_AFTER,
+                      backoff=(FLEET_BACKOFF_MIN, FLEET_BACKOFF_MAX)):
+    """Keep `state` up to date from its agent, reconnecting forever"""
+    delay = backoff[0]
+    while True:
+        writer = None
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(state.host, state.port, limit=READ_LIMIT), stale_after)
+            state.connected = True
+            first = True
+            while True:
+                # An agent sends at least one frame per collection pass, so
+                # silence this long means the connection is dead
+                line = await asyncio.wait_for(reader.readline(), stale_after)
+                if not line:
+                    raise ConnectionError('agent closed the connection')
+                frame = json.loads(line)
+                if first and frame.get('type') != 'full':
+                    raise ValueError('stream did not start with a full frame')
+                state.receive(frame)
+                first = False
+                delay = backoff[0]
+        except (OSError, ValueError, KeyError, asyncio.TimeoutError) as e:
+            state.disconnect(e)
+        finally:
+            if writer is not None:
+                writer.close()
+        state.retry_at = time.monotonic() + delay
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, backoff[1])
+
+
+def build_host_box(state, now, width=FLEET_CELL_WIDTH, stale_after=FLEET_STALE_AFTER):
+    """Lines of one host's box, each padded to `width` columns"""
+    status = state.status(now, stale_after)
+    name = state.name if len(state.name) <= width - 14 else state.name[:width - 15] + '…'
+    if status == 'live':
+        title, color = f"{name} {Colors.GREEN}live{Colors.RESET}", Colors.DARK_VIOLET
+    elif status == 'stale':
+        title, color = f"{name} {Colors.YELLOW}STALE {now - state.last_seen:.0f}s{Colors.RESET}", Colors.YELLOW
+    else:
+        title, color = f"{name} {Colors.RED}DOWN{Colors.RESET}", Colors.RED
+
+    content = []
+    if state.snapshot is not None:
+        system_data, network_data = state.snapshot.system, state.snapshot.network
+        bars = (('CPU', system_data.get('cpu_percent', 0), 100),
+                ('MEM', system_data.get('memory_used', 0), system_data.get('memory_total', 0)),
+                ('DSK', system_data.get('disk_used', 0), system_data.get('disk_total', 0)))
+        for label, value, max_value in bars:
+            content.append(create_progress_bar(value or 0, max_value or 0, f"{label} ", CELL_BAR_LENGTH))
+        rates = (network_data.get('io_rates') or {}).values()
+        sent = sum(r.get('bytes_sent', 0) for r in rates)
+        recv = sum(r.get('bytes_recv', 0) for r in rates)
+        content.append(f"↑ {Colors.RED}{format_rate(sent)}{Colors.RESET} ↓ {Colors.BLUE}{format_rate(recv)}{Colors.RESET}")
+        load = system_data.get('load_avg')
+        details = f"load {load[0]:.2f}" if load else ''
+        if system_data.get('uptime'):
+            details += f"  up {format_uptime(system_data['uptime'])}"
+        content.append(f"{Colors.DARK_GREY}{details[:width]}{Colors.RESET}")
+    else:
+        content.append(f"{Colors.DARK_GREY}no data{Colors.RESET}")
+    if not state.connected and state.retry_at is not None:
+        retry = max(0, state.retry_at - now)
+        reason = (state.error or '')[:width - 16]
+        content.append(f"{Colors.DARK_GREY}retry {retry:.0f}s {reason}{Colors.RESET}")
+
+    section = create_section(title, '\n'.join(content), color, width)
+    return [pad_visible(line, width) for line in section.rstrip('\n').split('\n')]
+
+
+def build_fleet(hosts, now=None, width=None, stale_after=FLEET_STALE_AFTER):
+    """Lay out every host's box in a grid, as screen lines"""
+    if now is None:
+        now = time.monotonic()
+    if width is None:
+        width = get_terminal_size()[0]
+    statuses = [state.status(now, stale_after) for state in hosts]
+    output = [f"{Colors.DARK_VIOLET}{Colors.BOLD}Yalla fleet{Colors.RESET} "
+              f"{len(hosts)} hosts: {Colors.GREEN}{statuses.count('live')} live{Colors.RESET}, "
+              f"{Colors.YELLOW}{statuses.count('stale')} stale{Colors.RESET}, "
+              f"{Colors.RED}{statuses.count('down')} down{Colors.RESET}  "
+              f"{Colors.DARK_GREY}(q to quit){Colors.RESET}", '']
+
+    columns = max(1, (width + 2) // (FLEET_CELL_WIDTH + 2))
+    for start in range(0, len(hosts), columns):
+        boxes = [build_host_box(state, now, FLEET_CELL_WIDTH, stale_after)
+                 for state in hosts[start:start + columns]]
+        height = max(len(box) for box in boxes)
+        for row in range(height):
+            output.append('  '.join(box[row] if row < len(box) else ' ' * FLEET_CELL_WIDTH
+                                    for box in boxes).rstrip())
+        output.append('')
+    return output
+
+
+async def _run_fleet(hosts, terminal, screen):
+    """Follow every host and redraw until 'q' is pressed"""
+    tasks = [asyncio.ensure_future(follow_host(state)) for state in hosts]
+    try:
+        while True:
+            key = terminal.read_key(0)
+            if key in ('q', 'Q'):
+                break
+            screen.draw(build_fleet(hosts))
+            await asyncio.sleep(FRAME_INTERVAL)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def run_fleet(targets):
+    """Show the fleet view for `targets` ("host[:port]") until quit"""
+    from yalla.modules.terminal import Terminal
+    from yalla.modules.ui_renderer import clear_screen, get_screen
+
+    try:
+        hosts = [HostState(target) for target in targets]
+    except ValueError as e:
+        print(f"{Colors.RED}Invalid host: {e}{Colors.RESET}")
+        return 1
+
+    terminal = Terminal()
+    screen = get_screen()
+    terminal.setup()
+    try:
+        asyncio.run(_run_fleet(hosts, terminal, screen))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        terminal.restore()
+        screen.close()
+        clear_screen()
+    return 0
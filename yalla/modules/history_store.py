@@ -0,0 +1,480 @@
+"""
+History Store Module
+Persistent metric history in SQLite with 1-minute and 1-hour rollups
+
+Samples from the collector are buffered and written in one transaction
+every HISTORY_FLUSH_INTERVAL seconds to a WAL-mode database, so readers
+such as `yalla history` never block the writer. Each write also folds
+completed minutes of raw samples into the 1m tier and completed hours of
+the 1m tier into the 1h tier (count, min, avg, max), then drops rows past
+each tier's retention. Every table is keyed by (metric, ts) without a
+rowid, so a range query for one metric is a single index range scan.
+
+The raw tier holds at most one sample per metric and second. Network
+values are stored as per-second rates rather than raw counters, so they
+can be averaged like everything else. Queries (`yalla history`) read the
+coarsest tier whose rows divide the requested step, fill the periods it
+has not rolled up yet from the finer tiers and the periods its retention
+has already dropped from the coarser ones.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from yalla.config import Colors, HISTORY_DB, HISTORY_FLUSH_INTERVAL
+from yalla.config import CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD
+from yalla.config import MEMORY_WARNING_THRESHOLD, MEMORY_CRITICAL_THRESHOLD
+from yalla.config import DISK_WARNING_THRESHOLD, DISK_CRITICAL_THRESHOLD
+from yalla.config import HISTORY_RAW_RETENTION, HISTORY_MINUTE_RETENTION, HISTORY_HOUR_RETENTION
+
+log = logging.getLogger(__name__)
+
+# Stored fields of the system section, by the collector producing them; a field
+# is only stored on passes where its collector ran, so slow collectors are not
+# re-stored at the fast ones' cadence. load_avg is split into load_1/5/15.
+SYSTEM_FIELDS = {
+    'cpu': ('cpu_percent',),
+    'memory': ('memory_percent', 'memory_used', 'memory_available'),
+    'disk': ('disk_percent', 'disk_used', 'disk_free'),
+    'process_count': ('process_count',),
+}
+LOAD_FIELDS = ('load_1', 'load_5', 'load_15')
+
+# Per-second rates stored per interface as net.<interface>.<field> and summed as net.<field>
+NETWORK_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv')
+
+# Collectors providing the stored network rates
+NETWORK_COLLECTORS = frozenset(('io_stats',))
+
+# Short names accepted by `yalla history --metric`
+METRIC_ALIASES = {
+    'cpu': 'cpu_percent',
+    'memory': 'memory_percent',
+    'disk': 'disk_percent',
+    'load': 'load_1',
+    'processes': 'process_count',
+    'rx': 'net.bytes_recv',
+    'tx': 'net.bytes_sent',
+}
+
+# Steps picked when none is given: the first one giving at most DEFAULT_POINTS rows
+DEFAULT_STEPS = (1, 10, 60, 300, 900, 3600, 6 * 3600, 86400)
+DEFAULT_POINTS = 120
+
+# Bar width of the --chart column
+CHART_LENGTH = 20
+
+# (name, table, seconds per row, seconds kept), finest first
+TIERS = (
+    ('raw', 'raw', 1, HISTORY_RAW_RETENTION),
+    ('1m', 'rollup_1m', 60, HISTORY_MINUTE_RETENTION),
+    ('1h', 'rollup_1h', 3600, HISTORY_HOUR_RETENTION),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS metrics (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS raw (
+    metric INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (metric, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1m (
+    metric INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    min REAL NOT NULL,
+    avg REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (metric, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_1h (
+    metric INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    min REAL NOT NULL,
+    avg REAL NOT NULL,
+    max REAL NOT NULL,
+    PRIMARY KEY (metric, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# Colour thresholds of the percentage metrics
+THRESHOLDS = {
+    'cpu_percent': (CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD),
+    'memory_percent': (MEMORY_WARNING_THRESHOLD, MEMORY_CRITICAL_THRESHOLD),
+    'disk_percent': (DISK_WARNING_THRESHOLD, DISK_CRITICAL_THRESHOLD),
+}
+
+# Rollup of raw samples into minutes; the CROSS JOIN makes SQLite walk the
+# (metric, ts) key once per metric instead of scanning the table
+ROLLUP_RAW = """
+INSERT OR REPLACE INTO {target} (metric, ts, count, min, avg, max)
+SELECT r.metric, r.ts - r.ts % {step}, count(*), min(r.value), avg(r.value), max(r.value)
+FROM metrics AS m CROSS JOIN raw AS r ON r.metric = m.id
+WHERE r.ts >= ? AND r.ts < ?
+GROUP BY r.metric, r.ts - r.ts % {step}
+"""
+
+# Rollup of a rollup tier; averages are weighted by sample count
+ROLLUP_TIER = """
+INSERT OR REPLACE INTO {target} (metric, ts, count, min, avg, max)
+SELECT r.metric, r.ts - r.ts % {step}, sum(r.count), min(r.min),
+       sum(r.avg * r.count) / sum(r.count), max(r.max)
+FROM metrics AS m CROSS JOIN {source} AS r ON r.metric = m.id
+WHERE r.ts >= ? AND r.ts < ?
+GROUP BY r.metric, r.ts - r.ts % {step}
+"""
+
+
+def default_history_path():
+    """Database path from the config, or under $XDG_DATA_HOME (~/.local/share)"""
+    if HISTORY_DB:
+        return HISTORY_DB
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_home, 'yalla', 'history.db')
+
+
+def snapshot_rows(snapshot, ran=None):
+    """(metric, ts, value) rows for the stored values in a snapshot"""
+    ts = int(snapshot.timestamp)
+    rows = []
+    for collector, fields in SYSTEM_FIELDS.items():
+        if ran is not None and collector not in ran:
+            continue
+        for field in fields:
+            value = snapshot.system.get(field)
+            if isinstance(value, (int, float)):
+                rows.append((field, ts, float(value)))
+    load = snapshot.system.get('load_avg')
+    if load and (ran is None or 'load_avg' in ran):
+        rows.extend((field, ts, float(value)) for field, value in zip(LOAD_FIELDS, load))
+    if ran is None or NETWORK_COLLECTORS & ran:
+        totals = dict.fromkeys(NETWORK_FIELDS, 0.0)
+        rates = snapshot.network.get('io_rates') or {}
+        for interface_name, interface_rates in rates.items():
+            for field in NETWORK_FIELDS:
+                value = interface_rates.get(field, 0.0)
+                rows.append((f'net.{interface_name}.{field}', ts, value))
+                totals[field] += value
+        if rates:
+            rows.extend((f'net.{field}', ts, value) for field, value in totals.items())
+    return rows
+
+
+def connect(path, readonly=False):
+    """Connection to the history database at `path`, created on first use unless `readonly`"""
+    if readonly:
+        from urllib.parse import quote
+        return sqlite3.connect(f'file:{quote(os.path.abspath(path))}?mode=ro', uri=True)
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    # WAL plus NORMAL survives application crashes; only a power loss can lose the last batch
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class HistoryStore:
+    """Buffers collector samples and writes them to the history database in batches"""
+
+    def __init__(self, path=None, flush_interval=HISTORY_FLUSH_INTERVAL):
+        self.path = path or default_history_path()
+        self.flush_interval = flush_interval
+        self._conn = None
+        self._metric_ids = {}
+        self._pending = []
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def record_snapshot(self, snapshot, ran=None):
+        """Collector subscriber: buffer the pass's values, writing once the batch is due"""
+        rows = snapshot_rows(snapshot, ran)
+        if not rows:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._pending.extend(rows)
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self, now=None):
+        """Write buffered samples, roll up completed periods and apply retention"""
+        with self._lock:
+            self._flush(now)
+
+    def close(self):
+        """Write what is buffered and close the database"""
+        with self._lock:
+            if self._closed:
+                return
+            self._flush()
+            self._closed = True
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _metric_id(self, name):
+        metric_id = self._metric_ids.get(name)
+        if metric_id is None:
+            self._conn.execute('INSERT OR IGNORE INTO metrics (name) VALUES (?)', (name,))
+            metric_id = self._conn.execute('SELECT id FROM metrics WHERE name = ?', (name,)).fetchone()[0]
+            self._metric_ids[name] = metric_id
+        return metric_id
+
+    def _flush(self, now=None):
+        self._last_flush = time.monotonic()
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+        if now is None:
+            now = time.time()
+        try:
+            if self._conn is None:
+                self._conn = connect(self.path)
+            with self._conn:
+                self._conn.executemany('INSERT OR REPLACE INTO raw (metric, ts, value) VALUES (?, ?, ?)',
+                                       [(self._metric_id(name), ts, value) for name, ts, value in pending])
+                roll_up(self._conn, now)
+                prune(self._conn, now)
+        except (sqlite3.Error, OSError) as e:
+            # Graceful degradation: the batch is dropped, the next one tries again
+            log.warning("history store %s: write failed: %s", self.path, e)
+            self._metric_ids = {}
+
+
+def roll_up(conn, now):
+    """Fold every completed minute and hour since the last rollup into its tier"""
+    for (_, source, _, _), (name, target, step, _) in zip(TIERS, TIERS[1:]):
+        key = f'rolled_up:{name}'
+        row = conn.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        start = row[0] if row else 0
+        end = int(now) - int(now) % step
+        if end <= start:
+            continue
+        template = ROLLUP_RAW if source == 'raw' else ROLLUP_TIER
+        conn.execute(template.format(source=source, target=target, step=step), (start, end))
+        conn.execute('INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)', (key, end))
+
+
+def prune(conn, now):
+    """Delete rows older than each tier's retention"""
+    metric_ids = [row[0] for row in conn.execute('SELECT id FROM metrics')]
+    for _, table, _, retention in TIERS:
+        cutoff = int(now - retention)
+        conn.executemany(f'DELETE FROM {table} WHERE metric = ? AND ts < ?',
+                         [(metric_id, cutoff) for metric_id in metric_ids])
+
+
+def choose_tier(step):
+    """Index of the coarsest tier whose rows divide evenly into `step` seconds"""
+    chosen = 0
+    for index, (_, _, seconds, _) in enumerate(TIERS):
+        if seconds <= step and step % seconds == 0:
+            chosen = index
+    return chosen
+
+
+def _read_tier(conn, index, metric_id, start, end, step, buckets, fill_older=True):
+    """Add [start, end) of tier `index`, grouped into `step` buckets, to {bucket: [count, min, sum, max]}"""
+    if start >= end:
+        return
+    name, table, seconds, _ = TIERS[index]
+    if fill_older and index + 1 < len(TIERS):
+        # Periods already pruned from this tier come from the next coarser one,
+        # up to the first coarse period this tier covers completely
+        first = conn.execute(f'SELECT min(ts) FROM {table} WHERE metric = ?', (metric_id,)).fetchone()[0]
+        coarse = TIERS[index + 1][2]
+        oldest = end if first is None else min(end, max(start, first + -first % coarse))
+        _read_tier(conn, index + 1, metric_id, start, oldest, step, buckets)
+        start = max(start, oldest)
+        if start >= end:
+            return
+    if index > 0:
+        # Periods this tier has not rolled up yet come from the next finer one
+        row = conn.execute('SELECT value FROM state WHERE key = ?', (f'rolled_up:{name}',)).fetchone()
+        split = min(end, max(start, row[0] if row else start))
+        _read_tier(conn, index - 1, metric_id, split, end, step, buckets, fill_older=False)
+        if split <= start:
+            return
+        columns = ('ts', 'count', 'min', 'avg * count', 'max')
+        grouped = ('ts - ts % :step', 'sum(count)', 'min(min)', 'sum(avg * count)', 'max(max)')
+    else:
+        split = end
+        columns = ('ts', '1', 'value', 'value', 'value')
+        grouped = ('ts - ts % :step', 'count(*)', 'min(value)', 'sum(value)', 'max(value)')
+    if step == seconds:
+        # One row per bucket already: read the key range in order, no grouping
+        sql = f'SELECT {", ".join(columns)} FROM {table} WHERE metric = :metric AND ts >= :start AND ts < :end'
+    else:
+        sql = (f'SELECT {", ".join(grouped)} FROM {table} WHERE metric = :metric AND ts >= :start AND ts < :end '
+               'GROUP BY 1')
+    parameters = {'step': step, 'metric': metric_id, 'start': start, 'end': split}
+    for bucket, count, low, total, high in conn.execute(sql, parameters):
+        current = buckets.get(bucket)
+        if current is None:
+            buckets[bucket] = [count, low, total, high]
+        else:
+            # A bucket straddling the rolled-up boundary
+            current[0] += count
+            current[1] = min(current[1], low)
+            current[2] += total
+            current[3] = max(current[3], high)
+
+
+def query(conn, metric, start, end, step):
+    """[(bucket start, samples, min, avg, max)] for `metric` in [start, end), one row per `step` seconds"""
+    row = conn.execute('SELECT id FROM metrics WHERE name = ?', (metric,)).fetchone()
+    if row is None:
+        return []
+    step = int(step)
+    start = int(start) - int(start) % step
+    buckets = {}
+    _read_tier(conn, choose_tier(step), row[0], start, int(end), step, buckets)
+    return [(bucket, count, low, total / count, high)
+            for bucket, (count, low, total, high) in sorted(buckets.items())]
+
+
+def metric_names(conn):
+    """Every metric in the database, sorted"""
+    return sorted(row[0] for row in conn.execute('SELECT name FROM metrics'))
+
+
+def default_step(span):
+    """A step giving at most DEFAULT_POINTS rows over `span` seconds"""
+    for step in DEFAULT_STEPS:
+        if span / step <= DEFAULT_POINTS:
+            return step
+    return DEFAULT_STEPS[-1]
+
+
+def format_step(seconds):
+    """'90s', '15m', '6h' or '1d' for a step"""
+    for unit, size in (('d', 86400), ('h', 3600), ('m', 60)):
+        if seconds >= size and seconds % size == 0:
+            return f'{seconds // size}{unit}'
+    return f'{seconds}s'
+
+
+def value_formatter(metric):
+    """Function formatting a stored value in the metric's own unit"""
+    from yalla.modules.ui_renderer import format_bytes, format_rate
+
+    if metric.endswith('_percent'):
+        return '{:.1f}%'.format
+    if metric.startswith('net.'):
+        return format_rate if 'bytes' in metric else '{:.0f}/s'.format
+    if metric.startswith(('memory_', 'disk_')):
+        return format_bytes
+    if metric.startswith('load_'):
+        return '{:.2f}'.format
+    return '{:.0f}'.format
+
+
+def print_table(metric, rows, step, chart=False):
+    """Aligned rows of time, min, avg, max and sample count, optionally with a bar of the average"""
+    from datetime import datetime
+    from yalla.modules.ui_renderer import create_progress_bar, get_color_for_percentage
+
+    pattern = '%Y-%m-%d %H:%M' if step % 60 == 0 else '%Y-%m-%d %H:%M:%S'
+    peak = max(row[4] for row in rows)
+    thresholds = THRESHOLDS.get(metric)
+    fmt = value_formatter(metric)
+    lines = [f"{Colors.BOLD}{'TIME':<19} {'MIN':>12} {'AVG':>12} {'MAX':>12} {'SAMPLES':>8}{Colors.RESET}"]
+    for bucket, count, low, average, high in rows:
+        color = get_color_for_percentage(high, *thresholds) if thresholds else ''
+        line = (f"{datetime.fromtimestamp(bucket).strftime(pattern):<19} {fmt(low):>12} "
+                f"{fmt(average):>12} {color}{fmt(high):>12}{Colors.RESET} "
+                f"{Colors.DARK_GREY}{count:>8}{Colors.RESET}")
+        if chart:
+            # Percentages are charted on their own scale, anything else against the peak
+            line += '  ' + create_progress_bar(average, 100 if thresholds else peak, length=CHART_LENGTH)
+        lines.append(line)
+    print('\n'.join(lines))
+
+
+def print_csv(rows):
+    """CSV with a header row"""
+    import csv
+    import sys
+    from datetime import datetime
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(('timestamp', 'time', 'min', 'avg', 'max', 'samples'))
+    for bucket, count, low, average, high in rows:
+        writer.writerow((bucket, datetime.fromtimestamp(bucket).isoformat(), low, average, high, count))
+
+
+def print_json(metric, rows, step, tier):
+    """One JSON document with the query and its points"""
+    import json
+
+    points = [{'timestamp': bucket, 'min': low, 'avg': average, 'max': high, 'samples': count}
+              for bucket, count, low, average, high in rows]
+    print(json.dumps({'metric': metric, 'step': step, 'tier': tier, 'points': points}))
+
+
+def run_history(metric, since, step=None, output='table', chart=False, path=None):
+    """Print the history of one metric; returns the exit status"""
+    from yalla.modules.timeparse import parse_duration
+
+    path = path or default_history_path()
+    span = parse_duration(since)
+    if not span or span <= 0:
+        print(f"{Colors.RED}Cannot parse --since: {since}{Colors.RESET}")
+        return 1
+    if step is None:
+        step_seconds = default_step(span)
+    else:
+        step_seconds = parse_duration(step)
+        if not step_seconds or step_seconds < 1:
+            print(f"{Colors.RED}--step must be at least one second: {step}{Colors.RESET}")
+            return 1
+        step_seconds = int(step_seconds)
+    if not os.path.exists(path):
+        print(f"{Colors.RED}No history at {path}; run yalla with --history to record it{Colors.RESET}")
+        return 1
+
+    metric = METRIC_ALIASES.get(metric, metric)
+    try:
+        conn = connect(path, readonly=True)
+        try:
+            now = time.time()
+            rows = query(conn, metric, now - span, now, step_seconds)
+            names = metric_names(conn) if not rows else None
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        print(f"{Colors.RED}Cannot read {path}: {e}{Colors.RESET}")
+        return 1
+
+    tier = TIERS[choose_tier(step_seconds)][0]
+    if output == 'json':
+        print_json(metric, rows, step_seconds, tier)
+    elif output == 'csv':
+        print_csv(rows)
+    elif rows:
+        print(f"{Colors.BLUE}{metric}{Colors.RESET} {Colors.DARK_GREY}over the last {since}, "
+              f"{format_step(step_seconds)} steps from the {tier} tier{Colors.RESET}")
+        print_table(metric, rows, step_seconds, chart)
+    elif metric not in names:
+        print(f"{Colors.RED}No metric {metric!r} in {path}{Colors.RESET}")
+        print(f"Known metrics: {', '.join(list(METRIC_ALIASES) + names)}")
+        return 1
+    else:
+        print(f"{Colors.DARK_GREY}No {metric} samples in the last {since}{Colors.RESET}")
+    return 0
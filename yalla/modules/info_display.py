@@ -3,15 +3,156 @@ Info Display Module
 Functions to display specific information based on command-line flags
 """
 
+import time
+
 from yalla.config import Colors
-from yalla.modules.system_monitor import get_system_stats, get_memory_info
-from yalla.modules.network_monitor import get_network_interfaces, get_public_ip
-from yalla.modules.ui_renderer import format_bytes, format_uptime, create_progress_bar
+from yalla.modules.registry import get_collector
+from yalla.modules.snapshot import Snapshot
+from yalla.modules.ui_renderer import format_age, format_bytes, format_rate, format_uptime, create_progress_bar
+
+# Minimum time between the two counter samples used for -n throughput rates
+RATE_SAMPLE_INTERVAL = 0.5
+
+# Flag sections in display order, with the collectors each one reads
+SECTION_COLLECTORS = {
+    'cpu': ('cpu', 'cpu_count', 'load_avg'),
+    'memory': ('memory_info',),
+    'disk': ('disk',),
+    'ip': ('interfaces',),
+    'public_ip': (),
+    'network': ('interfaces', 'connections', 'io_stats'),
+    'stats': ('cpu', 'cpu_count', 'memory', 'disk', 'uptime', 'process_count'),
+    'uptime': ('uptime',),
+}
+
+# Sections printed by --json / --ndjson when no flag picks any
+DEFAULT_JSON_SECTIONS = ('cpu', 'memory', 'disk', 'uptime')
+
+
+def _run_collector(name, snapshot, supervisor):
+    """Run one registered collector under its deadline and merge its result into the snapshot"""
+    spec = get_collector(name)
+    result = supervisor.run([spec], time.monotonic()).get(name)
+    if result:
+        getattr(snapshot, spec.section).update(result)
+
+
+def collect_snapshot(sections):
+    """One snapshot holding everything the given flag sections need
+
+    Each collector runs once no matter how many sections read it. One that
+    fails or hangs past its deadline is reported in the snapshot's health.
+    """
+    # Imported here so psutil is only loaded when something is collected;
+    # importing the monitors registers their collectors
+    from yalla.modules import system_monitor, network_monitor  # noqa: F401
+    from yalla.modules.supervisor import Supervisor
+
+    names = []
+    for section in sections:
+        for name in SECTION_COLLECTORS[section]:
+            if name not in names:
+                names.append(name)
+
+    supervisor = Supervisor()
+    snapshot = Snapshot(time.time(), {}, {}, {})
+    if 'io_stats' in names:
+        # First counter sample; the other collectors run during the rate window
+        names.remove('io_stats')
+        _run_collector('io_stats', snapshot, supervisor)
+        rate_deadline = time.monotonic() + RATE_SAMPLE_INTERVAL
+        for name in names:
+            _run_collector(name, snapshot, supervisor)
+        time.sleep(max(0.0, rate_deadline - time.monotonic()))
+        _run_collector('io_stats', snapshot, supervisor)
+    else:
+        for name in names:
+            _run_collector(name, snapshot, supervisor)
+    supervisor.close()
+    snapshot.health.update(supervisor.problems())
+
+    if 'public_ip' in sections:
+        snapshot.network['public_ip'] = network_monitor.get_public_ip()
+    return snapshot
+
 
+def load_snapshot(sections, use_daemon=True):
+    """Snapshot from a running daemon when there is one, else collected directly"""
+    snapshot = None
+    if use_daemon:
+        from yalla.modules.daemon import fetch_snapshot
+        snapshot = fetch_snapshot()
+    if snapshot is None:
+        return collect_snapshot(sections)
+    if 'public_ip' in sections:
+        from yalla.modules.network_monitor import get_public_ip
+        snapshot.network['public_ip'] = get_public_ip()
+    return snapshot
 
-def display_cpu_info():
+
+def section_data(section, snapshot):
+    """Plain data for one flag section, as written by --json and --ndjson"""
+    system_data, network_data = snapshot.system, snapshot.network
+    if section == 'cpu':
+        return {key: system_data.get(key) for key in ('cpu_percent', 'cpu_count', 'load_avg')}
+    if section == 'memory':
+        return system_data.get('memory_info')
+    if section == 'disk':
+        if not system_data.get('disk_usage'):
+            return None
+        return {key: system_data.get('disk_' + key) for key in ('total', 'used', 'free', 'percent')}
+    if section == 'ip':
+        return {'interfaces': network_data.get('interfaces', [])}
+    if section == 'public_ip':
+        return {'public_ip': network_data.get('public_ip')}
+    if section == 'network':
+        return {key: network_data.get(key) for key in ('interfaces', 'connections', 'io_rates')}
+    if section == 'stats':
+        keys = ('cpu_percent', 'cpu_count', 'memory_percent', 'memory_used', 'memory_total',
+                'disk_percent', 'disk_used', 'disk_total', 'uptime', 'process_count')
+        return {key: system_data.get(key) for key in keys}
+    if section == 'uptime':
+        return {key: system_data.get(key) for key in ('uptime', 'boot_time')}
+    raise ValueError(f"unknown section: {section}")
+
+
+def print_json(sections, snapshot, ndjson=False):
+    """Print the sections as one JSON object, or one compact line per section"""
+    import json
+
+    errors = snapshot.health or None
+    if ndjson:
+        for section in sections:
+            record = {'section': section, 'timestamp': snapshot.timestamp,
+                      'data': section_data(section, snapshot)}
+            print(json.dumps(record, separators=(',', ':'), default=str))
+        if errors:
+            record = {'section': 'errors', 'timestamp': snapshot.timestamp, 'data': errors}
+            print(json.dumps(record, separators=(',', ':'), default=str))
+    else:
+        document = {'timestamp': snapshot.timestamp}
+        for section in sections:
+            document[section] = section_data(section, snapshot)
+        if errors:
+            document['errors'] = errors
+        print(json.dumps(document, indent=2, default=str))
+
+
+def display_problems(snapshot):
+    """Warn about collectors that failed or timed out; their values may be missing or stale"""
+    if not snapshot.health:
+        return
+    print(f"{Colors.YELLOW}{Colors.BOLD}Collection problems{Colors.RESET}")
+    for name, problem in sorted(snapshot.health.items()):
+        age = ''
+        if problem.get('last_ok'):
+            age = f" {Colors.DARK_GREY}(last good value {format_age(snapshot.timestamp - problem['last_ok'])} old){Colors.RESET}"
+        print(f"  {Colors.YELLOW}⚠ {name}{Colors.RESET}: {problem.get('error')}{age}")
+
+
+def display_cpu_info(snapshot=None):
     """Display CPU information only"""
-    stats = get_system_stats()
+    stats = (snapshot or collect_snapshot(['cpu'])).system
     
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}CPU Information{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
@@ -29,10 +170,9 @@ def display_cpu_info():
     print(f"\n{create_progress_bar(cpu_percent, 100, '')}")
 
 
-def display_memory_info():
+def display_memory_info(snapshot=None):
     """Display memory information only"""
-    stats = get_system_stats()
-    memory_info = get_memory_info()
+    memory_info = (snapshot or collect_snapshot(['memory'])).system.get('memory_info')
     
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}Memory Information{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
@@ -53,9 +193,9 @@ def display_memory_info():
             print(f"Free: {Colors.GREEN}{format_bytes(swap['free'])}{Colors.RESET} {Colors.DARK_GREY}<- Available swap space{Colors.RESET}")
 
 
-def display_disk_info():
+def display_disk_info(snapshot=None):
     """Display disk information only"""
-    stats = get_system_stats()
+    stats = (snapshot or collect_snapshot(['disk'])).system
     
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}Disk Information{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
@@ -74,9 +214,9 @@ def display_disk_info():
         print(f"{Colors.YELLOW}Disk information not available{Colors.RESET}")
 
 
-def display_private_ip():
+def display_private_ip(snapshot=None):
     """Display private IP address(es)"""
-    interfaces = get_network_interfaces()
+    interfaces = (snapshot or collect_snapshot(['ip'])).network.get('interfaces')
     
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}Private IP Addresses{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
@@ -102,13 +242,15 @@ def display_private_ip():
         print(f"{Colors.YELLOW}No network interfaces found{Colors.RESET}")
 
 
-def display_public_ip():
+def display_public_ip(snapshot=None):
     """Display public IP address"""
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}Public IP Address{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
     
-    print(f"{Colors.BLUE}Fetching public IP...{Colors.RESET}")
-    public_ip = get_public_ip()
+    if snapshot is None:
+        print(f"{Colors.BLUE}Fetching public IP...{Colors.RESET}")
+        snapshot = collect_snapshot(['public_ip'])
+    public_ip = snapshot.network.get('public_ip')
     
     if public_ip:
         print(f"Public IP: {Colors.BLUE}{public_ip}{Colors.RESET} {Colors.DARK_GREY}<- This is your public IP{Colors.RESET}")
@@ -117,11 +259,9 @@ def display_public_ip():
         print(f"{Colors.DARK_GREY}(Check internet connection){Colors.RESET}")
 
 
-def display_network_info():
+def display_network_info(snapshot=None):
     """Display network interfaces and connections"""
-    from yalla.modules.network_monitor import get_network_stats
-    
-    network_data = get_network_stats()
+    network_data = (snapshot or collect_snapshot(['network'])).network
     
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}Network Information{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
@@ -148,11 +288,23 @@ def display_network_info():
             local = conn.get('local_address', 'N/A')
             remote = conn.get('remote_address', 'N/A')
             print(f"  {status_color}{status}{Colors.RESET} {local} → {remote}")
+    
+    if network_data.get('io_rates'):
+        print(f"\n{Colors.BLUE}{Colors.BOLD}Throughput:{Colors.RESET} {Colors.DARK_GREY}<- Current traffic per interface{Colors.RESET}")
+        for interface_name, rates in network_data['io_rates'].items():
+            line = (f"  {interface_name}: ↑ {Colors.RED}{format_rate(rates['bytes_sent'])}{Colors.RESET}"
+                    f" ↓ {Colors.BLUE}{format_rate(rates['bytes_recv'])}{Colors.RESET}"
+                    f" {Colors.DARK_GREY}({rates['packets_sent']:.0f} / {rates['packets_recv']:.0f} pkt/s){Colors.RESET}")
+            errors = rates['errin'] + rates['errout']
+            drops = rates['dropin'] + rates['dropout']
+            if errors or drops:
+                line += f" {Colors.YELLOW}{errors:.1f} err/s {drops:.1f} drop/s{Colors.RESET}"
+            print(line)
 
 
-def display_system_stats():
+def display_system_stats(snapshot=None):
     """Display system statistics summary"""
-    stats = get_system_stats()
+    stats = (snapshot or collect_snapshot(['stats'])).system
     
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}System Statistics{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
@@ -181,9 +333,9 @@ def display_system_stats():
         print(f"Processes: {Colors.BLUE}{process_count}{Colors.RESET} {Colors.DARK_GREY}<- Running programs{Colors.RESET}")
 
 
-def display_uptime():
+def display_uptime(snapshot=None):
     """Display system uptime"""
-    stats = get_system_stats()
+    stats = (snapshot or collect_snapshot(['uptime'])).system
     
     print(f"{Colors.DARK_VIOLET}{Colors.BOLD}System Uptime{Colors.RESET}")
     print(f"{Colors.DARK_GREY}{'─' * 50}{Colors.RESET}")
@@ -193,3 +345,16 @@ def display_uptime():
         print(f"Uptime: {Colors.BLUE}{uptime_str}{Colors.RESET} {Colors.DARK_GREY}<- Time since last reboot{Colors.RESET}")
     else:
         print(f"{Colors.YELLOW}Uptime information not available{Colors.RESET}")
+
+
+# Flag sections in output order, with the function printing each one
+SECTION_DISPLAYS = (
+    ('cpu', display_cpu_info),
+    ('memory', display_memory_info),
+    ('disk', display_disk_info),
+    ('ip', display_private_ip),
+    ('public_ip', display_public_ip),
+    ('network', display_network_info),
+    ('stats', display_system_stats),
+    ('uptime', display_uptime),
+)
@@ -0,0 +1,105 @@
+"""
+Metric History Module
+Fixed-memory ring buffers holding recent values of each dashboard metric
+"""
+
+from array import array
+
+from yalla.config import HISTORY_LENGTH
+
+
+class RingBuffer:
+    """Fixed-capacity buffer of floats backed by array('d')"""
+
+    __slots__ = ('capacity', '_data', '_next', '_count')
+
+    def __init__(self, capacity=HISTORY_LENGTH):
+        self.capacity = capacity
+        self._data = array('d', bytes(8 * capacity))
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        """Add a value, overwriting the oldest one once full"""
+        self._data[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def last(self):
+        """Most recent value, or None when empty"""
+        if not self._count:
+            return None
+        return self._data[self._next - 1]
+
+    def values(self, count=None):
+        """Up to `count` most recent values, oldest first"""
+        if count is None or count > self._count:
+            count = self._count
+        start = self._next - count
+        if start >= 0:
+            return self._data[start:self._next].tolist()
+        return self._data[start:].tolist() + self._data[:self._next].tolist()
+
+
+# metric name -> collector whose run produces a new sample for it
+_METRIC_COLLECTORS = {
+    'cpu': 'cpu',
+    'memory': 'memory',
+    'disk': 'disk',
+    'load': 'load_avg',
+}
+
+
+class MetricHistory:
+    """One ring buffer per metric: CPU, memory, disk, load and per-NIC rates"""
+
+    def __init__(self, capacity=HISTORY_LENGTH):
+        self.capacity = capacity
+        self._buffers = {}
+
+    def __contains__(self, name):
+        return name in self._buffers
+
+    def record(self, name, value):
+        """Append a value to a metric's buffer, creating it on first use"""
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = self._buffers[name] = RingBuffer(self.capacity)
+        buffer.append(value)
+
+    def values(self, name, count=None):
+        """Recent values of a metric, oldest first"""
+        buffer = self._buffers.get(name)
+        return buffer.values(count) if buffer is not None else []
+
+    def record_snapshot(self, snapshot, ran=None):
+        """Record the metrics whose collectors ran (all of them when `ran` is None)"""
+        system_data, network_data = snapshot.system, snapshot.network
+
+        def fresh(metric):
+            return ran is None or _METRIC_COLLECTORS[metric] in ran
+
+        if fresh('cpu') and 'cpu_percent' in system_data:
+            self.record('cpu', system_data['cpu_percent'])
+        if fresh('memory') and system_data.get('memory_total'):
+            self.record('memory', system_data['memory_used'] * 100.0 / system_data['memory_total'])
+        if fresh('disk') and system_data.get('disk_total'):
+            self.record('disk', system_data['disk_used'] * 100.0 / system_data['disk_total'])
+        if fresh('load') and system_data.get('load_avg'):
+            self.record('load', system_data['load_avg'][0])
+        if (ran is None or 'io_stats' in ran) and 'io_rates' in network_data:
+            io_rates = network_data['io_rates']
+            for interface_name, rates in io_rates.items():
+                self.record(f'net_recv:{interface_name}', rates['bytes_recv'])
+                self.record(f'net_sent:{interface_name}', rates['bytes_sent'])
+            self._drop_interfaces(network_data.get('io_stats') or io_rates)
+
+    def _drop_interfaces(self, present):
+        """Forget the rate buffers of interfaces that no longer exist (containers come and go)"""
+        for name in [name for name in self._buffers if name.startswith('net_')]:
+            if name.partition(':')[2] not in present:
+                del self._buffers[name]
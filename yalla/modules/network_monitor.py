@@ -3,142 +3,262 @@ Network Monitor Module
 Collects network statistics: interfaces, connections, I/O
 """
 
-import psutil
+import logging
 import socket
-from yalla.config import MAX_NETWORK_CONNECTIONS
+from itertools import islice
+from yalla.config import REFRESH_INTERVAL, MAX_NETWORK_CONNECTIONS, PUBLIC_IP_SERVICES, PUBLIC_IP_CACHE_TTL
+from yalla.modules.registry import register_collector, COST_LOW, COST_MEDIUM, COST_HIGH
+from yalla.modules.datasource import get_source, get_procfs_backend
+from yalla.modules.proc_net import iter_connections, SocketOwnerIndex
+from yalla.modules.rates import RateTracker
 
+log = logging.getLogger(__name__)
 
-def get_network_interfaces():
-    """Get all network interfaces with their IP addresses"""
+# Interface addresses rarely change; connection tables are expensive to walk
+INTERFACES_REFRESH_INTERVAL = 30
+CONNECTIONS_REFRESH_INTERVAL = 5
+CONNECTION_STATES_REFRESH_INTERVAL = 10
+
+
+def _read_interfaces():
+    """Interfaces with an IPv4 address; raises if the source fails"""
     interfaces = []
     
-    try:
-        net_if_addrs = psutil.net_if_addrs()
-        net_if_stats = psutil.net_if_stats()
+    source = get_source()
+    net_if_addrs = source.net_if_addrs()
+    net_if_stats = source.net_if_stats()
+    
+    for interface_name, addresses in net_if_addrs.items():
+        interface_info = {
+            'name': interface_name,
+            'ip': None,
+            'netmask': None,
+            'broadcast': None,
+            'is_up': False
+        }
+        
+        # Get interface status
+        if interface_name in net_if_stats:
+            interface_info['is_up'] = net_if_stats[interface_name].isup
+            interface_info['speed'] = net_if_stats[interface_name].speed
+        
+        # Get IPv4 address
+        for addr in addresses:
+            if addr.family == socket.AF_INET:  # IPv4
+                interface_info['ip'] = addr.address
+                interface_info['netmask'] = addr.netmask
+                if addr.broadcast:
+                    interface_info['broadcast'] = addr.broadcast
+                break
         
-        for interface_name, addresses in net_if_addrs.items():
-            interface_info = {
-                'name': interface_name,
-                'ip': None,
-                'netmask': None,
-                'broadcast': None,
-                'is_up': False
-            }
-            
-            # Get interface status
-            if interface_name in net_if_stats:
-                interface_info['is_up'] = net_if_stats[interface_name].isup
-                interface_info['speed'] = net_if_stats[interface_name].speed
-            
-            # Get IPv4 address
-            for addr in addresses:
-                if addr.family == socket.AF_INET:  # IPv4
-                    interface_info['ip'] = addr.address
-                    interface_info['netmask'] = addr.netmask
-                    if addr.broadcast:
-                        interface_info['broadcast'] = addr.broadcast
-                    break
-            
-            # Only include interfaces with IP addresses
-            if interface_info['ip']:
-                interfaces.append(interface_info)
+        # Only include interfaces with IP addresses
+        if interface_info['ip']:
+            interfaces.append(interface_info)
     
+    return interfaces
+
+
+def get_network_interfaces():
+    """Get all network interfaces with their IP addresses"""
+    try:
+        return _read_interfaces()
     except Exception as e:
         # Graceful degradation
-        pass
-    
-    return interfaces
+        log.warning("network interfaces unavailable: %s", e)
+        return []
+
 
+_socket_owners = None
 
-def get_network_connections():
-    """Get active network connections"""
+
+def _get_proc_connections(limit, states, ports):
+    """Connections streamed from /proc/net with owners from the inode index"""
+    global _socket_owners
+    conns = list(islice(iter_connections(states=states, ports=ports), limit))
+    if _socket_owners is None:
+        _socket_owners = SocketOwnerIndex()
+    owners = _socket_owners.lookup([conn.inode for conn in conns])
+    
     connections = []
+    for conn in conns:
+        connections.append({
+            'status': conn.status,
+            'local_address': f"{conn.local_ip}:{conn.local_port}",
+            'remote_address': f"{conn.remote_ip}:{conn.remote_port}" if conn.remote_ip else "N/A",
+            'family': 'IPv4' if conn.family == socket.AF_INET else 'IPv6',
+            'type': 'TCP' if conn.type == socket.SOCK_STREAM else 'UDP',
+            'pid': owners.get(conn.inode)
+        })
+    return connections
+
+
+def _list_connections(limit, states, ports):
+    """Active connections from the best available reader; raises if the source fails"""
+    if get_procfs_backend() is not None:
+        try:
+            return _get_proc_connections(limit, states, ports)
+        except OSError:
+            pass
     
+    connections = []
+    for conn in get_source().net_connections(kind='inet'):
+        if len(connections) >= limit:
+            break
+        if states is not None and conn.status not in states:
+            continue
+        if ports is not None and not (
+                (conn.laddr and conn.laddr.port in ports) or
+                (conn.raddr and conn.raddr.port in ports)):
+            continue
+        conn_info = {
+            'status': conn.status,
+            'local_address': f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A",
+            'remote_address': f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
+            'family': 'IPv4' if conn.family == socket.AF_INET else 'IPv6',
+            'type': 'TCP' if conn.type == socket.SOCK_STREAM else 'UDP',
+            'pid': conn.pid
+        }
+        connections.append(conn_info)
+    return connections
+
+
+def get_network_connections(limit=MAX_NETWORK_CONNECTIONS, states=None, ports=None):
+    """Get active network connections, optionally filtered by status and port"""
+    source = get_source()
     try:
-        # Get all connections
-        net_conns = psutil.net_connections(kind='inet')
-        
-        for conn in net_conns[:MAX_NETWORK_CONNECTIONS]:
-            conn_info = {
-                'status': conn.status,
-                'local_address': f"{conn.laddr.ip}:{conn.laddr.port}" if conn.laddr else "N/A",
-                'remote_address': f"{conn.raddr.ip}:{conn.raddr.port}" if conn.raddr else "N/A",
-                'family': 'IPv4' if conn.family == socket.AF_INET else 'IPv6',
-                'type': 'TCP' if conn.type == socket.SOCK_STREAM else 'UDP'
-            }
-            connections.append(conn_info)
-    
-    except (psutil.AccessDenied, PermissionError):
+        return _list_connections(limit, states, ports)
+    except (source.AccessDenied, PermissionError):
         # Some systems require elevated privileges
-        pass
-    except Exception:
+        log.info("listing connections needs elevated privileges")
+    except Exception as e:
         # Graceful degradation
-        pass
-    
-    return connections
+        log.warning("connections unavailable: %s", e)
+    return []
 
 
-def get_network_io_stats():
-    """Get network I/O statistics per interface"""
-    io_stats = {}
+def _count_connection_states():
+    """Connections per status; raises if the source fails"""
+    counts = {}
     
-    try:
-        net_io = psutil.net_io_counters(pernic=True)
-        
-        for interface_name, stats in net_io.items():
-            io_stats[interface_name] = {
-                'bytes_sent': stats.bytes_sent,
-                'bytes_recv': stats.bytes_recv,
-                'packets_sent': stats.packets_sent,
-                'packets_recv': stats.packets_recv,
-                'errin': stats.errin,
-                'errout': stats.errout,
-                'dropin': stats.dropin,
-                'dropout': stats.dropout
-            }
+    if get_procfs_backend() is not None:
+        # Streamed: nothing but the counters is kept in memory
+        for conn in iter_connections():
+            counts[conn.status] = counts.get(conn.status, 0) + 1
+        return counts
     
-    except Exception:
+    for conn in get_source().net_connections(kind='inet'):
+        counts[conn.status] = counts.get(conn.status, 0) + 1
+    return counts
+
+
+def get_connection_state_counts():
+    """Count every inet connection by status (e.g. ESTABLISHED, LISTEN)"""
+    source = get_source()
+    try:
+        return _count_connection_states()
+    except (source.AccessDenied, PermissionError):
+        log.info("counting connections needs elevated privileges")
+    except Exception as e:
         # Graceful degradation
-        pass
+        log.warning("connection states unavailable: %s", e)
+    return {}
+
+
+_IO_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+              'errin', 'errout', 'dropin', 'dropout')
+
+
+def _read_io_counters():
+    """Per-interface I/O counters; raises if the source fails"""
+    backend = get_procfs_backend()
+    if backend is not None:
+        try:
+            return {interface_name: dict(zip(_IO_FIELDS, counters))
+                    for interface_name, counters in backend.net_io_counters().items()}
+        except (OSError, ValueError, IndexError):
+            pass
     
+    io_stats = {}
+    for interface_name, stats in get_source().net_io_counters(pernic=True).items():
+        io_stats[interface_name] = {
+            'bytes_sent': stats.bytes_sent,
+            'bytes_recv': stats.bytes_recv,
+            'packets_sent': stats.packets_sent,
+            'packets_recv': stats.packets_recv,
+            'errin': stats.errin,
+            'errout': stats.errout,
+            'dropin': stats.dropin,
+            'dropout': stats.dropout
+        }
     return io_stats
 
 
+def get_network_io_stats():
+    """Get network I/O statistics per interface"""
+    try:
+        return _read_io_counters()
+    except Exception as e:
+        # Graceful degradation
+        log.warning("network counters unavailable: %s", e)
+        return {}
+
+
+@register_collector('interfaces', 'network', INTERFACES_REFRESH_INTERVAL, COST_MEDIUM)
+def collect_interfaces():
+    """Interface addresses and link state"""
+    return {'interfaces': _read_interfaces()}
+
+
+@register_collector('connections', 'network', CONNECTIONS_REFRESH_INTERVAL, COST_HIGH)
+def collect_connections():
+    """Active connections"""
+    return {'connections': _list_connections(MAX_NETWORK_CONNECTIONS, None, None)}
+
+
+def _link_speed(interface_name):
+    """Link speed of an interface in Mbit/s, or None when unknown"""
+    try:
+        stats = get_source().net_if_stats().get(interface_name)
+    except Exception:
+        # Graceful degradation: the counter drop is treated as a reset
+        return None
+    return stats.speed if stats is not None and stats.speed > 0 else None
+
+
+_rate_tracker = RateTracker(link_speed=_link_speed)
+
+
+@register_collector('connection_states', 'network', CONNECTION_STATES_REFRESH_INTERVAL, COST_HIGH)
+def collect_connection_states():
+    """Number of connections in each state"""
+    return {'connection_states': _count_connection_states()}
+
+
+@register_collector('io_stats', 'network', REFRESH_INTERVAL, COST_LOW)
+def collect_io_stats():
+    """Per-interface I/O counters and their rates since the previous sample"""
+    io_stats = _read_io_counters()
+    return {'io_stats': io_stats, 'io_rates': _rate_tracker.update(io_stats)}
+
+
 def get_network_stats():
     """Get all network statistics"""
-    stats = {
+    io_stats = get_network_io_stats()
+    return {
         'interfaces': get_network_interfaces(),
         'connections': get_network_connections(),
-        'io_stats': get_network_io_stats()
+        'io_stats': io_stats,
+        'io_rates': _rate_tracker.update(io_stats),
     }
-    
-    return stats
 
 
-def get_public_ip():
-    """Attempt to get public IP address (requires internet)"""
+def get_public_ip(services=None, ttl=None, cache_path=None):
+    """Public IP address (requires internet), cached until the TTL expires or the interfaces change"""
+    from yalla.modules.public_ip import lookup_public_ip
+
     try:
-        import urllib.request
-        import json
-        
-        # Try multiple services
-        services = [
-            'https://api.ipify.org?format=json',
-            'https://httpbin.org/ip',
-            'https://api.myip.com'
-        ]
-        
-        for service in services:
-            try:
-                with urllib.request.urlopen(service, timeout=3) as response:
-                    data = json.loads(response.read().decode())
-                    if 'ip' in data:
-                        return data['ip']
-                    elif 'origin' in data:
-                        return data['origin']
-            except:
-                continue
-    except:
-        pass
-    
-    return None
\ No newline at end of file
+        return lookup_public_ip(get_network_interfaces(), services=services or PUBLIC_IP_SERVICES,
+                                ttl=PUBLIC_IP_CACHE_TTL if ttl is None else ttl, cache_path=cache_path)
+    except Exception:
+        # Graceful degradation
+        return None
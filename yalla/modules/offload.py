@@ -0,0 +1,150 @@
+"""
+Offload Module
+Runs the heavyweight collectors in a persistent worker process
+
+Walking the connection table and scanning every process is CPU-bound
+Python work inside psutil; in the dashboard process it competes for the
+GIL with rendering and key handling. With offloading enabled those
+collectors run in long-lived child processes instead, on other cores.
+Requests and results cross a pipe as marshal-encoded bytes, which is
+compact and several times cheaper than pickle for plain dicts and lists.
+Each collector gets its own worker, so a slow scan never holds up the
+others, and a worker that misses its collector's deadline is killed and
+started again on the next request. The child keeps its own ProcessTable
+between requests, so per-process CPU percentages stay accurate.
+"""
+
+import marshal
+import threading
+
+from yalla.config import OFFLOADED_COLLECTORS
+
+# Default seconds a worker may stay silent before it is killed and restarted
+REPLY_TIMEOUT = 10
+
+
+class WorkerError(Exception):
+    """A collector failed inside the worker process"""
+
+
+class WorkerProcess:
+    """A child process that runs registered collectors on request, one at a time"""
+
+    def __init__(self, source_spec=None, reply_timeout=REPLY_TIMEOUT):
+        self.source_spec = source_spec
+        self.reply_timeout = reply_timeout
+        self._process = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        import multiprocessing
+
+        # Spawn rather than fork: the parent already runs collector threads
+        context = multiprocessing.get_context('spawn')
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=serve, args=(child_conn, self.source_spec),
+                                  name='yalla-offload', daemon=True)
+        process.start()
+        child_conn.close()
+        self._process, self._conn = process, parent_conn
+
+    def _stop(self):
+        if self._conn is not None:
+            # The worker exits when its end of the pipe reports EOF
+            self._conn.close()
+            self._conn = None
+        if self._process is not None:
+            self._process.join(1)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(1)
+            self._process = None
+
+    @property
+    def pid(self):
+        """PID of the running worker, or None"""
+        return self._process.pid if self._process is not None else None
+
+    def call(self, name):
+        """Run collector `name` in the worker and return its result"""
+        with self._lock:
+            if self._process is None or not self._process.is_alive():
+                self._stop()
+                self._start()
+            try:
+                self._conn.send_bytes(marshal.dumps(name))
+                if not self._conn.poll(self.reply_timeout):
+                    raise TimeoutError(f"worker gave no answer in {self.reply_timeout:g}s")
+                ok, payload = marshal.loads(self._conn.recv_bytes())
+            except (EOFError, OSError):
+                # Dead, hung or out of step: start a fresh worker next time
+                self._stop()
+                raise
+        if not ok:
+            raise WorkerError(payload)
+        return payload
+
+    def close(self):
+        """Stop the worker process"""
+        with self._lock:
+            self._stop()
+
+
+def serve(conn, source_spec=None):
+    """Worker process loop: answer collector requests until the pipe closes"""
+    import signal
+    from yalla.modules.datasource import set_source
+    from yalla.modules.registry import get_collector
+    from yalla.modules.supervisor import describe_error
+    # Imported for their side effect of registering collectors
+    from yalla.modules import system_monitor, network_monitor  # noqa: F401
+
+    # Ctrl+C reaches the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if source_spec:
+        set_source(source_spec)
+    while True:
+        try:
+            name = marshal.loads(conn.recv_bytes())
+        except (EOFError, OSError):
+            return
+        try:
+            reply = (True, get_collector(name).func())
+        except Exception as e:
+            reply = (False, describe_error(e))
+        try:
+            data = marshal.dumps(reply)
+        except ValueError as e:
+            data = marshal.dumps((False, f"result of {name} cannot be encoded: {e}"))
+        conn.send_bytes(data)
+
+
+_workers = {}
+
+
+def enable_offload(names=OFFLOADED_COLLECTORS):
+    """Run each named collector in a worker process of its own from now on"""
+    import atexit
+    from functools import partial
+    from yalla.modules.datasource import get_source_spec
+    from yalla.modules.registry import get_collector, override_collector
+    from yalla.modules.supervisor import collector_timeout
+    # Imported for their side effect of registering collectors
+    from yalla.modules import system_monitor, network_monitor  # noqa: F401
+
+    if not _workers:
+        atexit.register(shutdown_offload)
+    for name in names:
+        if name not in _workers:
+            # Give up no later than the supervisor does, so a hung worker is replaced
+            timeout = collector_timeout(get_collector(name))
+            _workers[name] = WorkerProcess(get_source_spec(), reply_timeout=timeout)
+            override_collector(name, partial(_workers[name].call, name))
+    return _workers
+
+
+def shutdown_offload():
+    """Stop the worker processes that were started"""
+    while _workers:
+        _workers.popitem()[1].close()
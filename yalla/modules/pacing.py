@@ -0,0 +1,150 @@
+"""
+Pacing Module
+Drift-free deadlines on the monotonic clock and an adaptive refresh period
+
+Loops schedule their next tick from the previous deadline rather than
+from when the work finished, so the period does not drift by the time the
+work takes. AdaptivePacer moves the dashboard's refresh period between
+REFRESH_MIN_INTERVAL and REFRESH_MAX_INTERVAL: it jumps to the minimum
+when a watched value moves fast or crosses a warning threshold, slows
+down while values stay flat and backs off whenever yalla's own CPU use
+exceeds REFRESH_CPU_BUDGET.
+"""
+
+import time
+
+from yalla.config import REFRESH_INTERVAL, REFRESH_MIN_INTERVAL, REFRESH_MAX_INTERVAL, REFRESH_CPU_BUDGET
+from yalla.config import CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD
+from yalla.config import MEMORY_WARNING_THRESHOLD, MEMORY_CRITICAL_THRESHOLD
+
+# Collectors whose values drive the period; passes running none of them are ignored
+WATCHED_COLLECTORS = frozenset(('cpu', 'memory', 'io_stats'))
+
+# metric -> (flat below, fast from): percentage points, or relative change for rates
+CHANGE_LIMITS = {
+    'cpu_percent': (2.0, 15.0),
+    'memory_percent': (0.5, 5.0),
+    'io_rate': (0.1, 1.0),
+}
+
+# Thresholds whose crossing (either way) asks for the fastest refresh
+THRESHOLDS = {
+    'cpu_percent': (CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD),
+    'memory_percent': (MEMORY_WARNING_THRESHOLD, MEMORY_CRITICAL_THRESHOLD),
+}
+
+# Rates below this many bytes/s count as idle, so noise on a quiet link is flat
+IO_RATE_FLOOR = 1024
+
+# Flat passes in a row before the period is stretched
+FLAT_PASSES = 3
+
+# Factor applied to the period per adjustment
+STEP_FACTOR = 1.5
+
+
+def next_deadline(deadline, period, now):
+    """The tick after `deadline`; one period from `now` if that tick has already passed
+
+    Falling behind (a slow pass, a suspended laptop) restarts the schedule
+    instead of running the missed ticks back to back.
+    """
+    deadline += period
+    return deadline if deadline > now else now + period
+
+
+def _io_rate(network):
+    """Total bytes/s across interfaces"""
+    rates = network.get('io_rates') or {}
+    return sum(r.get('bytes_sent', 0) + r.get('bytes_recv', 0) for r in rates.values())
+
+
+def _band(value, thresholds):
+    """How many of `thresholds` the value has reached"""
+    return sum(value >= threshold for threshold in thresholds)
+
+
+class AdaptivePacer:
+    """Chooses the refresh period from how fast values move and what yalla costs"""
+
+    def __init__(self, base=REFRESH_INTERVAL, minimum=REFRESH_MIN_INTERVAL,
+                 maximum=REFRESH_MAX_INTERVAL, cpu_budget=REFRESH_CPU_BUDGET,
+                 clock=time.monotonic, cpu_clock=time.process_time):
+        self.base = base
+        self.minimum = min(minimum, base)
+        self.maximum = max(maximum, base)
+        self.cpu_budget = cpu_budget
+        self.period = base
+        self.reason = 'base'
+        self._clock = clock
+        self._cpu_clock = cpu_clock
+        self._last = None
+        self._usage = (clock(), cpu_clock())
+        self._flat = 0
+
+    @property
+    def scale(self):
+        """The period as a multiple of the base interval"""
+        return self.period / self.base
+
+    def _own_cpu(self):
+        """yalla's CPU percent (all threads) since the previous call"""
+        now, cpu = self._clock(), self._cpu_clock()
+        last_now, last_cpu = self._usage
+        self._usage = (now, cpu)
+        return (cpu - last_cpu) / (now - last_now) * 100 if now > last_now else 0.0
+
+    def _classify(self, values):
+        """'fast', 'flat' or 'moving' compared with the previous watched values"""
+        previous, self._last = self._last, values
+        if previous is None:
+            return 'moving'
+        flat = True
+        for name, value in values.items():
+            old = previous.get(name)
+            if value is None or old is None:
+                continue
+            if name in THRESHOLDS and _band(value, THRESHOLDS[name]) != _band(old, THRESHOLDS[name]):
+                return 'fast'
+            flat_below, fast_from = CHANGE_LIMITS[name]
+            if name == 'io_rate':
+                if max(value, old) < IO_RATE_FLOOR:
+                    continue
+                change = abs(value - old) / max(min(value, old), IO_RATE_FLOOR)
+            else:
+                change = abs(value - old)
+            if change >= fast_from:
+                return 'fast'
+            if change >= flat_below:
+                flat = False
+        return 'flat' if flat else 'moving'
+
+    def update(self, snapshot, ran=None):
+        """Fold in one collector pass and return the new period"""
+        if ran is not None and not WATCHED_COLLECTORS & set(ran):
+            return self.period
+        values = {'cpu_percent': snapshot.system.get('cpu_percent'),
+                  'memory_percent': snapshot.system.get('memory_percent'),
+                  'io_rate': _io_rate(snapshot.network)}
+        trend = self._classify(values)
+
+        if self._own_cpu() > self.cpu_budget:
+            self.period, self.reason = min(self.maximum, self.period * STEP_FACTOR), 'cpu budget'
+            self._flat = 0
+        elif trend == 'fast':
+            self.period, self.reason = self.minimum, 'fast change'
+            self._flat = 0
+        elif trend == 'flat':
+            self._flat += 1
+            if self._flat >= FLAT_PASSES:
+                self.period, self.reason = min(self.maximum, self.period * STEP_FACTOR), 'flat'
+                self._flat = 0
+        else:
+            # Ordinary movement: drift back towards the configured interval
+            self._flat = 0
+            if self.period < self.base:
+                self.period = min(self.base, self.period * STEP_FACTOR)
+            elif self.period > self.base:
+                self.period = max(self.base, self.period / STEP_FACTOR)
+            self.reason = 'base' if self.period == self.base else self.reason
+        return self.period
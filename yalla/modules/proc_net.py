@@ -0,0 +1,163 @@
+"""
+Proc Net Module
+Streams connections from /proc/net/{tcp,tcp6,udp,udp6} and maps socket inodes to PIDs
+"""
+
+import os
+import socket
+import sys
+import time
+from collections import namedtuple
+
+
+# Kernel TCP states (include/net/tcp_states.h), named the way psutil names them
+TCP_STATES = {
+    '01': 'ESTABLISHED',
+    '02': 'SYN_SENT',
+    '03': 'SYN_RECV',
+    '04': 'FIN_WAIT1',
+    '05': 'FIN_WAIT2',
+    '06': 'TIME_WAIT',
+    '07': 'CLOSE',
+    '08': 'CLOSE_WAIT',
+    '09': 'LAST_ACK',
+    '0A': 'LISTEN',
+    '0B': 'CLOSING',
+    '0C': 'SYN_RECV',
+}
+
+# File name -> (family, type)
+PROTOCOLS = {
+    'tcp': (socket.AF_INET, socket.SOCK_STREAM),
+    'tcp6': (socket.AF_INET6, socket.SOCK_STREAM),
+    'udp': (socket.AF_INET, socket.SOCK_DGRAM),
+    'udp6': (socket.AF_INET6, socket.SOCK_DGRAM),
+}
+
+Connection = namedtuple('Connection', [
+    'family', 'type', 'local_ip', 'local_port', 'remote_ip', 'remote_port', 'status', 'inode'
+])
+
+
+def _decode_ip(hex_ip, family):
+    """Convert the kernel's host-order hex address to text"""
+    raw = bytes.fromhex(hex_ip)
+    if sys.byteorder == 'little':
+        # Each 32-bit word is printed as a host-order integer
+        raw = b''.join(raw[i:i + 4][::-1] for i in range(0, len(raw), 4))
+    return socket.inet_ntop(family, raw)
+
+
+def iter_connections(kinds=('tcp', 'tcp6', 'udp', 'udp6'), states=None, ports=None, root='/proc'):
+    """Lazily yield connections, filtered by status and by local or remote port
+
+    Lines are parsed one at a time and addresses are only decoded for
+    matching rows, so stopping early (e.g. with itertools.islice) skips
+    the rest of the table.
+    """
+    for kind in kinds:
+        family, sock_type = PROTOCOLS[kind]
+        try:
+            proc_file = open(os.path.join(root, 'net', kind), 'r')
+        except OSError:
+            continue
+        with proc_file:
+            proc_file.readline()  # header
+            for line in proc_file:
+                fields = line.split()
+                if len(fields) < 10:
+                    continue
+                if sock_type == socket.SOCK_STREAM:
+                    status = TCP_STATES.get(fields[3], 'UNKNOWN')
+                else:
+                    status = 'NONE'
+                if states is not None and status not in states:
+                    continue
+                local_ip, local_port = fields[1].split(':')
+                remote_ip, remote_port = fields[2].split(':')
+                local_port = int(local_port, 16)
+                remote_port = int(remote_port, 16)
+                if ports is not None and local_port not in ports and remote_port not in ports:
+                    continue
+                yield Connection(
+                    family, sock_type,
+                    _decode_ip(local_ip, family), local_port,
+                    _decode_ip(remote_ip, family) if remote_port else None, remote_port,
+                    status, int(fields[9])
+                )
+
+
+class SocketOwnerIndex:
+    """Incrementally maintained socket inode -> PID map
+
+    Only processes not seen before are scanned when an inode is unknown;
+    existing processes are rescanned only for inodes still unresolved,
+    and inodes that stay unresolved (other users' processes, kernel
+    sockets) are not retried until `retry_after` seconds have passed.
+    """
+
+    def __init__(self, root='/proc', retry_after=30.0):
+        self.root = root
+        self.retry_after = retry_after
+        self._owners = {}
+        self._pid_inodes = {}
+        self._unresolved = {}
+
+    def _socket_inodes(self, pid):
+        """Socket inodes held open by one process"""
+        inodes = set()
+        fd_dir = os.path.join(self.root, str(pid), 'fd')
+        try:
+            for entry in os.scandir(fd_dir):
+                try:
+                    target = os.readlink(entry.path)
+                except OSError:
+                    continue
+                if target.startswith('socket:['):
+                    inodes.add(int(target[8:-1]))
+        except OSError:
+            pass
+        return inodes
+
+    def _scan(self, pid):
+        """(Re)index one process's sockets"""
+        for inode in self._pid_inodes.get(pid, ()):
+            if self._owners.get(inode) == pid:
+                del self._owners[inode]
+        inodes = self._socket_inodes(pid)
+        self._pid_inodes[pid] = inodes
+        for inode in inodes:
+            self._owners[inode] = pid
+
+    def _live_pids(self):
+        """PIDs currently present in /proc"""
+        return {int(name) for name in os.listdir(self.root) if name.isdigit()}
+
+    def lookup(self, inodes):
+        """Map socket inodes to owning PIDs (None when unknown)"""
+        now = time.monotonic()
+        wanted = {inode for inode in inodes
+                  if inode and inode not in self._owners
+                  and self._unresolved.get(inode, 0) <= now}
+        if wanted:
+            live = self._live_pids()
+            for pid in set(self._pid_inodes) - live:
+                for inode in self._pid_inodes.pop(pid):
+                    if self._owners.get(inode) == pid:
+                        del self._owners[inode]
+
+            # New processes are the likeliest owners of new sockets
+            for candidates in (live - set(self._pid_inodes), set(self._pid_inodes)):
+                for pid in candidates:
+                    self._scan(pid)
+                    wanted.difference_update(self._pid_inodes[pid])
+                    if not wanted:
+                        break
+                if not wanted:
+                    break
+
+            for inode in wanted:
+                self._unresolved[inode] = now + self.retry_after
+            if len(self._unresolved) > 4096:
+                self._unresolved = {inode: until for inode, until in self._unresolved.items() if until > now}
+        return {inode: self._owners.get(inode) for inode in inodes}
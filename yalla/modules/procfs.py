@@ -0,0 +1,152 @@
+"""
+Procfs Module
+Linux collection backend that keeps /proc files open and re-reads them with pread
+"""
+
+import os
+import sys
+import threading
+import time
+
+from yalla.config import USE_PROCFS_BACKEND
+
+
+class ProcFile:
+    """A /proc file held open and re-read into a preallocated buffer"""
+
+    def __init__(self, path, size=16384):
+        self.path = path
+        self.fd = os.open(path, os.O_RDONLY)
+        self.buffer = bytearray(size)
+        self.lock = threading.Lock()
+
+    def read(self):
+        """Current contents of the file as bytes"""
+        with self.lock:
+            while True:
+                # Reading from offset 0 makes the kernel regenerate the file
+                length = os.preadv(self.fd, [self.buffer], 0)
+                if length < len(self.buffer):
+                    return bytes(memoryview(self.buffer)[:length])
+                # Larger than the buffer (e.g. /proc/stat on many cores): grow and retry
+                self.buffer = bytearray(len(self.buffer) * 2)
+
+    def close(self):
+        """Close the underlying descriptor"""
+        os.close(self.fd)
+
+
+def _meminfo_field(data, key):
+    """Value of one /proc/meminfo field in bytes, or None if absent"""
+    start = data.find(key)
+    if start < 0:
+        return None
+    end = data.find(b'\n', start)
+    return int(data[start + len(key):end].split()[0]) * 1024
+
+
+class ProcfsBackend:
+    """Native readers for /proc/stat, /proc/meminfo, /proc/loadavg and /proc/net/dev"""
+
+    def __init__(self, root='/proc'):
+        self.stat = ProcFile(os.path.join(root, 'stat'))
+        self.meminfo = ProcFile(os.path.join(root, 'meminfo'))
+        self.loadavg = ProcFile(os.path.join(root, 'loadavg'), 256)
+        self.net_dev = ProcFile(os.path.join(root, 'net', 'dev'))
+        self._last_cpu = None
+        self._cpu_lock = threading.Lock()
+
+    def cpu_times(self):
+        """(busy, total) jiffies for the aggregate "cpu" line"""
+        data = self.stat.read()
+        fields = data[:data.index(b'\n')].split()[1:]
+        values = [int(value) for value in fields]
+        # user nice system idle iowait irq softirq steal guest guest_nice;
+        # guest time is already included in user/nice
+        total = sum(values[:8])
+        idle = values[3] + (values[4] if len(values) > 4 else 0)
+        return total - idle, total
+
+    def cpu_percent(self, interval=None):
+        """System-wide CPU usage, with the same semantics as psutil.cpu_percent"""
+        with self._cpu_lock:
+            if interval:
+                start = self.cpu_times()
+                time.sleep(interval)
+            else:
+                start = self._last_cpu
+            end = self.cpu_times()
+            self._last_cpu = end
+        if start is None:
+            return 0.0
+        total = end[1] - start[1]
+        if total <= 0:
+            return 0.0
+        return round(max(0.0, min(100.0, (end[0] - start[0]) * 100.0 / total)), 1)
+
+    def virtual_memory(self):
+        """Memory totals in bytes, computed the way psutil does"""
+        data = self.meminfo.read()
+        total = _meminfo_field(data, b'MemTotal:')
+        free = _meminfo_field(data, b'MemFree:') or 0
+        available = _meminfo_field(data, b'MemAvailable:')
+        if available is None:
+            # Kernels before 3.14
+            available = (free + (_meminfo_field(data, b'Buffers:') or 0)
+                         + (_meminfo_field(data, b'Cached:') or 0))
+        available = min(available, total)
+        used = total - available
+        return {
+            'total': total,
+            'available': available,
+            'used': used,
+            'free': free,
+            'percent': round(used * 100.0 / total, 1) if total else 0.0
+        }
+
+    def load_average(self):
+        """1, 5 and 15 minute load averages"""
+        fields = self.loadavg.read().split()
+        return float(fields[0]), float(fields[1]), float(fields[2])
+
+    def net_io_counters(self):
+        """Per-interface counters in psutil.net_io_counters field order"""
+        counters = {}
+        for line in self.net_dev.read().split(b'\n')[2:]:
+            colon = line.rfind(b':')
+            if colon < 0:
+                continue
+            fields = line[colon + 1:].split()
+            counters[line[:colon].strip().decode()] = (
+                int(fields[8]),   # bytes_sent
+                int(fields[0]),   # bytes_recv
+                int(fields[9]),   # packets_sent
+                int(fields[1]),   # packets_recv
+                int(fields[2]),   # errin
+                int(fields[10]),  # errout
+                int(fields[3]),   # dropin
+                int(fields[11]),  # dropout
+            )
+        return counters
+
+    def close(self):
+        """Close every open /proc file"""
+        for proc_file in (self.stat, self.meminfo, self.loadavg, self.net_dev):
+            proc_file.close()
+
+
+_backend = None
+_backend_checked = False
+
+
+def get_backend():
+    """The shared procfs backend, or None where it is unavailable or disabled"""
+    global _backend, _backend_checked
+    if not _backend_checked:
+        _backend_checked = True
+        if USE_PROCFS_BACKEND and sys.platform.startswith('linux') and hasattr(os, 'preadv'):
+            try:
+                _backend = ProcfsBackend()
+            except OSError:
+                _backend = None
+    return _backend
@@ -0,0 +1,175 @@
+"""
+Profiling Module
+Per-stage timings for the dashboard overlay and whole-run profilers for --profile
+
+Stage timing is off by default; instrumented code checks
+`stage_timer.enabled` before reading the clock, so the disabled cost is
+one attribute lookup per stage.
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Weight of the newest sample in the smoothed stage durations
+STAGE_SMOOTHING = 0.2
+
+# Seconds between stack samples for collapsed-stack profiles
+SAMPLE_INTERVAL = 0.005
+
+# File extensions that select the sampling profiler's collapsed-stack output
+COLLAPSED_EXTENSIONS = ('.folded', '.collapsed')
+
+
+class StageTimer:
+    """Smoothed duration of named stages, e.g. 'collect:cpu' or 'layout'"""
+
+    def __init__(self, smoothing=STAGE_SMOOTHING):
+        self.enabled = False
+        self.smoothing = smoothing
+        self._durations = {}
+
+    def record(self, stage, seconds):
+        """Fold one measured duration into the stage's average"""
+        previous = self._durations.get(stage)
+        if previous is None:
+            self._durations[stage] = seconds
+        else:
+            self._durations[stage] = previous + (seconds - previous) * self.smoothing
+
+    def durations(self):
+        """Smoothed seconds per stage"""
+        return dict(self._durations)
+
+    def reset(self):
+        """Forget every stage"""
+        self._durations = {}
+
+
+stage_timer = StageTimer()
+
+
+class ProcessUsage:
+    """yalla's own CPU usage between samples, and its resident memory"""
+
+    def __init__(self):
+        self._last = (time.monotonic(), time.process_time())
+
+    def sample(self):
+        """(CPU percent since the previous sample, RSS in bytes or None)"""
+        now, cpu = time.monotonic(), time.process_time()
+        last_wall, last_cpu = self._last
+        self._last = (now, cpu)
+        cpu_percent = (cpu - last_cpu) / (now - last_wall) * 100 if now > last_wall else 0.0
+        return cpu_percent, self._rss()
+
+    @staticmethod
+    def _rss():
+        """Current resident set size"""
+        try:
+            import psutil
+            return psutil.Process(os.getpid()).memory_info().rss
+        except Exception:
+            # Graceful degradation
+            return None
+
+
+class TracingProfiler:
+    """cProfile of the main thread and every thread started while running"""
+
+    def __init__(self):
+        import cProfile
+
+        self._profile_class = cProfile.Profile
+        self._profiles = []
+        self._main = None
+
+    def _start_thread(self, frame, event, arg):
+        # First profiling event in a new thread: hand the thread to cProfile
+        profile = self._profile_class()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+ profiles through sys.monitoring, which already
+            # covers every thread and allows only one active profiler
+            sys.setprofile(None)
+            return
+        self._profiles.append(profile)
+
+    def start(self):
+        self._main = self._profile_class()
+        self._profiles.append(self._main)
+        threading.setprofile(self._start_thread)
+        self._main.enable()
+
+    def stop(self, path):
+        """Stop profiling and write pstats data to `path`"""
+        import pstats
+
+        self._main.disable()
+        threading.setprofile(None)
+        stats = pstats.Stats(self._main)
+        for profile in self._profiles[1:]:
+            try:
+                stats.add(profile)
+            except TypeError:
+                # A thread that never returned to Python has no data
+                pass
+        stats.dump_stats(path)
+
+
+class SamplingProfiler:
+    """Samples every thread's stack and writes flamegraph.pl collapsed stacks"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts = {}
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _frame_label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def sample(self):
+        """Count the current stack of every other thread once"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_label(frame))
+                frame = frame.f_back
+            stack.append(names.get(ident, f'thread-{ident}'))
+            key = ';'.join(reversed(stack))
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='yalla-sampler', daemon=True)
+        self._thread.start()
+
+    def stop(self, path):
+        """Stop sampling and write "frame;frame;... count" lines to `path`"""
+        self._stopped.set()
+        self._thread.join()
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in sorted(self.counts.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def start_profiler(path):
+    """Start the profiler matching `path`: collapsed stacks for .folded/.collapsed, else pstats"""
+    if path.endswith(COLLAPSED_EXTENSIONS):
+        profiler = SamplingProfiler()
+    else:
+        profiler = TracingProfiler()
+    profiler.start()
+    return profiler
@@ -0,0 +1,118 @@
+"""
+Public IP Module
+Races several lookup services and caches the answer on disk
+
+Every service is asked at once from its own thread and the first valid
+address wins; slower requests are abandoned and die with their timeout.
+The cached answer is reused until its TTL expires or the set of local
+interface addresses changes (new network, VPN up or down).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+from yalla.config import PUBLIC_IP_SERVICES, PUBLIC_IP_TIMEOUT, PUBLIC_IP_CACHE_TTL, PUBLIC_IP_CACHE_FILE
+
+
+def default_cache_path():
+    """Cache file from the config, or under $XDG_CACHE_HOME (~/.cache)"""
+    if PUBLIC_IP_CACHE_FILE:
+        return PUBLIC_IP_CACHE_FILE
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'yalla', 'public_ip.json')
+
+
+def parse_response(body):
+    """Address in a service's JSON answer, or None if it holds no valid address"""
+    import ipaddress
+
+    try:
+        data = json.loads(body.decode('utf-8'))
+        # httpbin reports "client, proxy, ..." when behind proxies
+        address = (data.get('ip') or data.get('origin') or '').split(',')[0].strip()
+        return str(ipaddress.ip_address(address))
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return None
+
+
+def query_service(url, timeout=PUBLIC_IP_TIMEOUT):
+    """Address reported by one service, or None"""
+    request = urllib.request.Request(url, headers={'Accept': 'application/json', 'User-Agent': 'yalla'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return parse_response(response.read(4096))
+    except (OSError, ValueError):
+        return None
+
+
+def resolve_public_ip(services=PUBLIC_IP_SERVICES, timeout=PUBLIC_IP_TIMEOUT):
+    """First valid address returned by any of `services`, or None"""
+    answers = queue.Queue()
+    for url in services:
+        thread = threading.Thread(target=lambda url=url: answers.put(query_service(url, timeout)),
+                                  name='yalla-public-ip', daemon=True)
+        thread.start()
+
+    deadline = time.monotonic() + timeout
+    for _ in services:
+        try:
+            address = answers.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            break
+        if address:
+            return address
+    return None
+
+
+def interface_fingerprint(interfaces):
+    """Stable description of the local addresses; a change invalidates the cache"""
+    return sorted(f"{iface['name']}={iface['ip']}" for iface in interfaces if iface.get('is_up'))
+
+
+def read_cache(path, fingerprint, ttl=PUBLIC_IP_CACHE_TTL, now=None):
+    """Cached address if it is younger than `ttl` and the interfaces are unchanged"""
+    if ttl <= 0:
+        return None
+    try:
+        with open(path, encoding='utf-8') as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if now is None:
+        now = time.time()
+    if not isinstance(entry, dict) or entry.get('interfaces') != fingerprint:
+        return None
+    if not 0 <= now - entry.get('timestamp', 0) < ttl:
+        return None
+    return entry.get('ip')
+
+
+def write_cache(path, address, fingerprint, now=None):
+    """Store an address; failures only cost the next lookup"""
+    entry = {'ip': address, 'timestamp': time.time() if now is None else now, 'interfaces': fingerprint}
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f'{path}.{os.getpid()}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(temporary, path)
+    except OSError:
+        pass
+
+
+def lookup_public_ip(interfaces, services=PUBLIC_IP_SERVICES, timeout=PUBLIC_IP_TIMEOUT,
+                     ttl=PUBLIC_IP_CACHE_TTL, cache_path=None):
+    """Public address from the cache, or from the fastest service"""
+    cache_path = cache_path or default_cache_path()
+    fingerprint = interface_fingerprint(interfaces)
+    address = read_cache(cache_path, fingerprint, ttl)
+    if address:
+        return address
+    address = resolve_public_ip(services, timeout)
+    if address and ttl > 0:
+        write_cache(cache_path, address, fingerprint)
+    return address
@@ -0,0 +1,93 @@
+"""
+Rates Module
+Turns cumulative per-interface network counters into per-second rates
+
+psutil undoes wraparound itself, but the /proc/net/dev reader sees the
+raw counters, and drivers that keep them in 32 bits still wrap there. A
+counter that drops from below 2**32 is taken as a wrap only when the
+increase that implies fits the interface's link speed; any other drop
+means the interface was reset or re-created, and that sample is skipped.
+"""
+
+import time
+
+
+COUNTER_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                  'errin', 'errout', 'dropin', 'dropout')
+
+BYTE_FIELDS = ('bytes_sent', 'bytes_recv')
+
+_COUNTER_32_MAX = 2 ** 32
+
+# Smallest Ethernet frame; bounds the packets (and errors, drops) a link can carry
+MIN_FRAME_BYTES = 64
+
+# Allowance over the link speed for samples read slightly apart in time
+WRAP_SLACK = 1.25
+
+
+def counter_delta(previous, current, limit=None):
+    """Increase of a counter; None after a reset
+
+    A drop from below 2**32 counts as a 32-bit wrap when the increase it
+    implies is at most `limit`; without a limit every drop is a reset.
+    """
+    if current >= previous:
+        return current - previous
+    if limit is not None and previous < _COUNTER_32_MAX:
+        wrapped = current + _COUNTER_32_MAX - previous
+        if wrapped <= limit:
+            return wrapped
+    return None
+
+
+class RateTracker:
+    """Keep the previous counter sample per interface and derive rates from it
+
+    `link_speed(interface)` returns the link speed in Mbit/s, or None when
+    it is unknown; it is only called when a counter goes down.
+    """
+
+    def __init__(self, link_speed=None):
+        self.link_speed = link_speed
+        self._previous = {}
+
+    def _wrap_limit(self, interface_name, field, elapsed):
+        """Largest increase of `field` the link could carry in `elapsed` seconds, or None"""
+        speed = self.link_speed(interface_name) if self.link_speed is not None else None
+        if not speed:
+            return None
+        limit = speed * 125000 * elapsed * WRAP_SLACK
+        return limit if field in BYTE_FIELDS else limit / MIN_FRAME_BYTES
+
+    def update(self, io_stats, now=None):
+        """Record a sample and return {interface: {counter: per-second rate}}"""
+        if now is None:
+            now = time.monotonic()
+        rates = {}
+        previous_samples = self._previous
+        self._previous = {}
+
+        for interface_name, counters in io_stats.items():
+            self._previous[interface_name] = (now, counters)
+            previous = previous_samples.get(interface_name)
+            if previous is None:
+                continue
+            elapsed = now - previous[0]
+            if elapsed <= 0:
+                continue
+
+            interface_rates = {}
+            for field in COUNTER_FIELDS:
+                old, current = previous[1].get(field, 0), counters.get(field, 0)
+                limit = self._wrap_limit(interface_name, field, elapsed) if current < old else None
+                delta = counter_delta(old, current, limit)
+                if delta is None:
+                    # Start over from this sample rather than report a bogus spike
+                    interface_rates = None
+                    break
+                interface_rates[field] = delta / elapsed
+            if interface_rates is not None:
+                rates[interface_name] = interface_rates
+
+        return rates
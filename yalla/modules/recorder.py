@@ -0,0 +1,497 @@
+"""
+Recorder Module
+Headless recording of system snapshots into a compact, append-only binary log
+
+Log layout:
+  header    MAGIC, version, field count
+  keyframe  b'K', int64 timestamp (ms), one int64 per field
+  delta     b'D', varint timestamp delta-of-delta, varint bitmask of
+            changed fields, one zigzag varint delta per changed field
+Values are stored as integers after scaling (see RECORD_FIELDS). Every
+file starts with a keyframe, so each rotated file can be read on its own.
+
+A sidecar FILE.idx holds one fixed-width (timestamp, offset) entry per
+keyframe, so readers can binary-search it to seek without a scan, and
+resume at the next keyframe after a corrupt record.
+"""
+
+import mmap
+import os
+import signal
+import struct
+import time
+
+from yalla.config import RECORD_INTERVAL, RECORD_MAX_BYTES, RECORD_BACKUPS, RECORD_KEYFRAME_EVERY
+from yalla.config import Colors
+
+MAGIC = b'YALLAREC'
+VERSION = 1
+
+KEYFRAME = b'K'
+DELTA = b'D'
+
+# (field, scale): stored value is round(value * scale)
+RECORD_FIELDS = (
+    ('cpu_percent', 10),
+    ('memory_total', 1 / 1024),
+    ('memory_used', 1 / 1024),
+    ('memory_available', 1 / 1024),
+    ('memory_percent', 10),
+    ('disk_total', 1 / 1024),
+    ('disk_used', 1 / 1024),
+    ('disk_free', 1 / 1024),
+    ('disk_percent', 10),
+    ('process_count', 1),
+    ('boot_time', 1),
+    ('cpu_count', 1),
+    ('load_1', 100),
+    ('load_5', 100),
+    ('load_15', 100),
+)
+
+FIELD_NAMES = tuple(name for name, _ in RECORD_FIELDS)
+
+HEADER = struct.Struct('<8sBB')
+KEYFRAME_BODY = struct.Struct(f'<q{len(RECORD_FIELDS)}q')
+INDEX_ENTRY = struct.Struct('<qQ')
+
+# Collectors providing the recorded fields
+RECORDED_COLLECTORS = ('cpu', 'memory', 'disk', 'process_count', 'uptime', 'cpu_count', 'load_avg')
+
+
+class CorruptRecordError(ValueError):
+    """A record that cannot be decoded, at byte `offset` of the log"""
+
+    def __init__(self, offset):
+        super().__init__(f'corrupt record at offset {offset}')
+        self.offset = offset
+
+
+def zigzag(value):
+    """Map a signed integer to an unsigned one (0, -1, 1, -2 -> 0, 1, 2, 3)"""
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def unzigzag(value):
+    """Inverse of zigzag()"""
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def encode_varint(value, out):
+    """Append an unsigned LEB128 varint to a bytearray"""
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, offset):
+    """Read an unsigned LEB128 varint; returns (value, new offset)"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+        shift += 7
+
+
+def stats_to_values(system_data):
+    """Scaled integer values for RECORD_FIELDS from a get_system_stats() dict"""
+    flat = dict(system_data)
+    load = system_data.get('load_avg') or (0, 0, 0)
+    flat['load_1'], flat['load_5'], flat['load_15'] = load
+    return [int(round((flat.get(name) or 0) * scale)) for name, scale in RECORD_FIELDS]
+
+
+def values_to_stats(timestamp, values):
+    """Rebuild a get_system_stats()-style dict from a decoded record"""
+    flat = {}
+    for (name, scale), value in zip(RECORD_FIELDS, values):
+        flat[name] = value / scale if scale != 1 else value
+    for name in ('memory_total', 'memory_used', 'memory_available',
+                 'disk_total', 'disk_used', 'disk_free'):
+        flat[name] = int(flat[name])
+    stats = {name: flat[name] for name in FIELD_NAMES if not name.startswith('load_')}
+    stats['disk_usage'] = bool(flat['disk_total'])
+    stats['uptime'] = max(0.0, timestamp - flat['boot_time']) if flat['boot_time'] else 0
+    stats['load_avg'] = (flat['load_1'], flat['load_5'], flat['load_15'])
+    return stats
+
+
+class LogWriter:
+    """Append snapshots to a binary log, rotating it by size"""
+
+    def __init__(self, path, max_bytes=RECORD_MAX_BYTES, backups=RECORD_BACKUPS,
+                 keyframe_every=RECORD_KEYFRAME_EVERY, buffer_size=65536):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.keyframe_every = keyframe_every
+        self.buffer_size = buffer_size
+        self._file = None
+        self._open()
+
+    def _open(self):
+        """Open the log for appending after its last complete record and reset the delta state"""
+        end, entries = 0, b''
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= HEADER.size:
+            # A crash can leave a record cut short; appending after it would corrupt the log
+            end, entries = find_log_end(self.path)
+        self._file = open(self.path, 'ab', buffering=self.buffer_size)
+        self._file.truncate(end)
+        self._file.seek(0, os.SEEK_END)
+        if not end:
+            self._file.write(HEADER.pack(MAGIC, VERSION, len(RECORD_FIELDS)))
+        self._index = open(self.path + '.idx', 'ab')
+        self._index.truncate(0)
+        self._index.seek(0)
+        self._index.write(entries)
+        self._size = self._file.tell()
+        # The next record is always a keyframe after (re)opening
+        self._since_keyframe = None
+        self._previous = None
+        self._previous_timestamp = 0
+        self._previous_step = 0
+
+    def _rotate(self):
+        """Move the current log to .1 (shifting older backups) and start a new one"""
+        self.close()
+        for suffix in ('', '.idx'):
+            path = self.path + suffix
+            if self.backups > 0:
+                for index in range(self.backups - 1, 0, -1):
+                    source = f'{self.path}.{index}{suffix}'
+                    if os.path.exists(source):
+                        os.replace(source, f'{self.path}.{index + 1}{suffix}')
+                if os.path.exists(path):
+                    os.replace(path, f'{self.path}.1{suffix}')
+            elif os.path.exists(path):
+                os.remove(path)
+        self._open()
+
+    def write(self, timestamp, system_data):
+        """Append one snapshot; returns the number of bytes written"""
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+        timestamp_ms = int(round(timestamp * 1000))
+        values = stats_to_values(system_data)
+
+        if self._since_keyframe is None or self._since_keyframe >= self.keyframe_every:
+            record = KEYFRAME + KEYFRAME_BODY.pack(timestamp_ms, *values)
+            self._index.write(INDEX_ENTRY.pack(timestamp_ms, self._size))
+            self._since_keyframe = 0
+            self._previous_step = 0
+        else:
+            record = bytearray(DELTA)
+            step = timestamp_ms - self._previous_timestamp
+            encode_varint(zigzag(step - self._previous_step), record)
+            self._previous_step = step
+            mask = 0
+            deltas = []
+            for index, (value, previous) in enumerate(zip(values, self._previous)):
+                if value != previous:
+                    mask |= 1 << index
+                    deltas.append(value - previous)
+            encode_varint(mask, record)
+            for delta in deltas:
+                encode_varint(zigzag(delta), record)
+            self._since_keyframe += 1
+
+        self._file.write(record)
+        self._size += len(record)
+        self._previous = values
+        self._previous_timestamp = timestamp_ms
+        return len(record)
+
+    def flush(self):
+        """Push buffered records to the OS"""
+        # Log first, so the index never points past written data
+        self._file.flush()
+        self._index.flush()
+
+    def close(self):
+        """Flush and close the log"""
+        if self._file is not None:
+            self._file.close()
+            self._index.close()
+            self._file = None
+
+
+def check_header(data):
+    """Raise ValueError unless `data` starts with a yalla recording header"""
+    if len(data) < HEADER.size:
+        raise ValueError('not a yalla recording')
+    magic, version, field_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or field_count != len(RECORD_FIELDS):
+        raise ValueError('not a yalla recording')
+
+
+def decode_records(data, offset=HEADER.size):
+    """Decode (record offset, end offset, kind, timestamp, values) from bytes or an mmap
+
+    `offset` must point at a keyframe (or the first record). A record cut
+    short at the end (e.g. after a crash) ends the iteration; a corrupt
+    one raises CorruptRecordError.
+    """
+    values = None
+    timestamp = 0
+    step = 0
+    size = len(data)
+    try:
+        while offset < size:
+            start = offset
+            kind = data[offset:offset + 1]
+            offset += 1
+            if kind == KEYFRAME:
+                unpacked = KEYFRAME_BODY.unpack_from(data, offset)
+                offset += KEYFRAME_BODY.size
+                timestamp, values = unpacked[0], list(unpacked[1:])
+                step = 0
+            elif kind == DELTA and values is not None:
+                change, offset = decode_varint(data, offset)
+                step += unzigzag(change)
+                timestamp += step
+                mask, offset = decode_varint(data, offset)
+                index = 0
+                while mask:
+                    if mask & 1:
+                        delta, offset = decode_varint(data, offset)
+                        values[index] += unzigzag(delta)
+                    mask >>= 1
+                    index += 1
+            else:
+                raise CorruptRecordError(start)
+            yield start, offset, kind, timestamp / 1000.0, tuple(values)
+    except (IndexError, struct.error):
+        return
+
+
+def iter_raw_records(data, offset=HEADER.size, index=None):
+    """Decode (record offset, kind, timestamp, values) from bytes or an mmap; see decode_records()
+
+    After a corrupt record decoding resumes at the next keyframe in
+    `index` (a KeyframeIndex), or stops when there is none.
+    """
+    while offset is not None:
+        try:
+            for start, _, kind, timestamp, values in decode_records(data, offset):
+                yield start, kind, timestamp, values
+            return
+        except CorruptRecordError as e:
+            # The failed record and the deltas after it are lost
+            offset = index.next_after(e.offset) if index is not None else None
+
+
+def find_log_end(path):
+    """(offset after the last complete record, index entries before it) of an existing log
+
+    Only the records from the last indexed keyframe on are decoded;
+    keyframes after it that never reached the index are added back.
+    """
+    with LogReader(path) as reader:
+        index = reader.index
+        start = index[len(index) - 1][1] if len(index) else HEADER.size
+        entries = bytearray(index.data[:len(index) * INDEX_ENTRY.size])
+        end = start
+        try:
+            for offset, end, kind, timestamp, _ in decode_records(reader.data, start):
+                if kind == KEYFRAME and (offset > start or not len(index)):
+                    entries += INDEX_ENTRY.pack(int(round(timestamp * 1000)), offset)
+        except CorruptRecordError:
+            # Nothing after a corrupt record can be decoded, so the log ends there too
+            pass
+        if len(index) and end == start:
+            # The last indexed keyframe itself was cut short
+            del entries[-INDEX_ENTRY.size:]
+    return end, bytes(entries)
+
+
+def iter_records(data):
+    """Decode (timestamp, values) pairs from the bytes of one log file"""
+    check_header(data)
+    for _, _, timestamp, values in iter_raw_records(data):
+        yield timestamp, values
+
+
+def read_log(path):
+    """Yield (timestamp, system stats) for every record in a log file"""
+    with LogReader(path) as reader:
+        for timestamp, values in reader.records():
+            yield timestamp, values_to_stats(timestamp, values)
+
+
+class KeyframeIndex:
+    """Sorted (timestamp, offset) entries over a buffer of INDEX_ENTRY structs"""
+
+    def __init__(self, data):
+        self.data = data
+        self._count = len(data) // INDEX_ENTRY.size
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, position):
+        """(timestamp in seconds, log offset) of one keyframe"""
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        timestamp_ms, offset = INDEX_ENTRY.unpack_from(self.data, position * INDEX_ENTRY.size)
+        return timestamp_ms / 1000.0, offset
+
+    def find(self, timestamp):
+        """Offset of the last keyframe at or before `timestamp`, or None"""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self[middle][0] <= timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return self[low - 1][1] if low else None
+
+    def next_after(self, offset):
+        """Offset of the first keyframe past log offset `offset`, or None"""
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self[middle][1] <= offset:
+                low = middle + 1
+            else:
+                high = middle
+        return self[low][1] if low < self._count else None
+
+
+class LogReader:
+    """Memory-mapped view of one recording with O(log n) seeking by timestamp"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._index_file = None
+        try:
+            # mmap refuses empty files with ValueError as well
+            self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            check_header(self.data)
+        except ValueError:
+            self._file.close()
+            raise ValueError('not a yalla recording')
+        self.index = self._load_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _load_index(self):
+        """Map the sidecar index, or build one in memory if it is missing or stale"""
+        index_path = self.path + '.idx'
+        try:
+            if os.path.getsize(index_path) >= INDEX_ENTRY.size:
+                self._index_file = open(index_path, 'rb')
+                index = KeyframeIndex(mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ))
+                offset = index[len(index) - 1][1]
+                if self.data[offset:offset + 1] == KEYFRAME:
+                    return index
+        except (OSError, ValueError):
+            pass
+
+        entries = bytearray()
+        for offset, kind, timestamp, _ in iter_raw_records(self.data):
+            if kind == KEYFRAME:
+                entries += INDEX_ENTRY.pack(int(round(timestamp * 1000)), offset)
+        return KeyframeIndex(bytes(entries))
+
+    @property
+    def start_time(self):
+        """Timestamp of the first record"""
+        for _, _, timestamp, _ in iter_raw_records(self.data, index=self.index):
+            return timestamp
+        return None
+
+    @property
+    def end_time(self):
+        """Timestamp of the last record, decoding only from the last keyframe"""
+        offset = self.index[len(self.index) - 1][1] if len(self.index) else HEADER.size
+        timestamp = None
+        for _, _, timestamp, _ in iter_raw_records(self.data, offset, self.index):
+            pass
+        return timestamp
+
+    def records(self, start=None):
+        """Yield (timestamp, values) from the first record at or after `start`"""
+        offset = None
+        if start is not None:
+            offset = self.index.find(start)
+        if offset is None:
+            offset = HEADER.size
+        for _, _, timestamp, values in iter_raw_records(self.data, offset, self.index):
+            if start is None or timestamp >= start:
+                yield timestamp, values
+
+    def close(self):
+        """Unmap and close the log and its index"""
+        if isinstance(self.index.data, mmap.mmap):
+            self.index.data.close()
+        if self._index_file is not None:
+            self._index_file.close()
+        self.data.close()
+        self._file.close()
+
+
+def run_recorder(path, interval=RECORD_INTERVAL, max_bytes=RECORD_MAX_BYTES,
+                 backups=RECORD_BACKUPS, flush_interval=10.0):
+    """Record system snapshots until interrupted; returns the exit status
+
+    Needs no terminal. Every pass also goes to the subscribe_all()
+    callbacks, such as the history store.
+    """
+    from yalla.modules.collector import CollectorScheduler, default_subscribers, notify_subscribers
+    from yalla.modules.pacing import next_deadline
+    from yalla.modules.registry import get_collectors, COST_LOW
+    from yalla.modules.snapshot import Snapshot
+
+    try:
+        writer = LogWriter(path, max_bytes=max_bytes, backups=backups)
+    except (OSError, ValueError) as e:
+        # e.g. --out names an existing file that is not a yalla recording
+        print(f"{Colors.RED}Cannot record to {path}: {e}{Colors.RESET}")
+        return 1
+
+    # Cheap collectors are sampled on every record; the rest keep their cadence
+    collectors = []
+    for spec in get_collectors('system'):
+        if spec.name not in RECORDED_COLLECTORS:
+            continue
+        if spec.interval is not None and spec.cost == COST_LOW:
+            spec = spec._replace(interval=min(spec.interval, interval))
+        collectors.append(spec)
+    scheduler = CollectorScheduler(collectors)
+
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+
+    subscribers = default_subscribers()
+    next_tick = time.monotonic()
+    last_flush = next_tick
+    try:
+        while not stopping:
+            ran = scheduler.run_due()
+            snapshot = Snapshot(time.time(), scheduler.sections['system'], {}, scheduler.problems())
+            writer.write(snapshot.timestamp, snapshot.system)
+            notify_subscribers(subscribers, snapshot, set(ran))
+            now = time.monotonic()
+            if now - last_flush >= flush_interval:
+                writer.flush()
+                last_flush = now
+            next_tick = next_deadline(next_tick, interval, now)
+            time.sleep(next_tick - now)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.close()
+        writer.close()
+    return 0
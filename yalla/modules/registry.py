@@ -0,0 +1,43 @@
+"""
+Collector Registry
+Each collector declares the snapshot section it feeds, how often it runs and how expensive it is
+"""
+
+from collections import namedtuple
+
+
+# Relative cost of a collector, used to decide what may run on every tick
+COST_LOW = 'low'
+COST_MEDIUM = 'medium'
+COST_HIGH = 'high'
+
+# interval is in seconds; None means the value never changes and is collected once.
+# timeout is how long a run may take before its value is shown as stale;
+# None uses the default for the collector's cost.
+CollectorSpec = namedtuple('CollectorSpec', ['name', 'section', 'func', 'interval', 'cost', 'timeout'],
+                           defaults=(None,))
+
+_collectors = {}
+
+
+def register_collector(name, section, interval, cost=COST_LOW, timeout=None):
+    """Decorator registering a function that returns a dict merged into `section`"""
+    def decorator(func):
+        _collectors[name] = CollectorSpec(name, section, func, interval, cost, timeout)
+        return func
+    return decorator
+
+
+def get_collectors(section=None):
+    """Registered collectors, optionally limited to one section"""
+    return [spec for spec in _collectors.values() if section is None or spec.section == section]
+
+
+def get_collector(name):
+    """Look up a single collector by name"""
+    return _collectors.get(name)
+
+
+def override_collector(name, func):
+    """Swap the function behind a registered collector, keeping its schedule and cost"""
+    _collectors[name] = _collectors[name]._replace(func=func)
@@ -0,0 +1,154 @@
+"""
+Replay Module
+Plays a recorded log back through the dashboard renderer
+"""
+
+import time
+from datetime import datetime
+
+from yalla.config import Colors, FRAME_INTERVAL
+from yalla.modules.snapshot import Snapshot
+from yalla.modules.metric_history import MetricHistory
+from yalla.modules.recorder import LogReader, values_to_stats
+from yalla.modules.terminal import Terminal
+from yalla.modules.timeparse import parse_time
+from yalla.modules.ui_renderer import render_dashboard, clear_screen, get_screen
+
+SPEEDS = (0.25, 0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+# Seconds skipped by the '[' and ']' keys
+SEEK_STEP = 60
+
+
+def format_timestamp(timestamp):
+    """Local date and time of a recorded sample"""
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class ReplayPlayer:
+    """Drive render_dashboard from a recording with play, pause, speed and seek"""
+
+    def __init__(self, path, speed=1, start=None):
+        self.reader = LogReader(path)
+        self.terminal = Terminal()
+        self.speed = speed
+        self.paused = False
+        self.start_time = self.reader.start_time
+        self.end_time = self.reader.end_time
+        if self.start_time is None:
+            self.reader.close()
+            raise ValueError('recording is empty')
+        self.seek(start if start is not None else self.start_time)
+
+    def seek(self, timestamp):
+        """Jump to a point in the recording (an O(log n) index lookup)"""
+        self.position = min(max(timestamp, self.start_time), self.end_time)
+        self.history = MetricHistory()
+        self._records = self.reader.records(self.position)
+        self._current = None
+        self._pending = next(self._records, None)
+        self._advance()
+        if self._current is None and self._pending is not None:
+            self._take_pending()
+
+    def _take_pending(self):
+        """Make the next record current and add it to the sparkline history"""
+        timestamp, values = self._pending
+        self._current = (timestamp, values_to_stats(timestamp, values))
+        self.history.record_snapshot(Snapshot(timestamp, self._current[1], {}))
+        self._pending = next(self._records, None)
+
+    def _advance(self):
+        """Consume every record up to the playback position"""
+        while self._pending is not None and self._pending[0] <= self.position:
+            self._take_pending()
+
+    def change_speed(self, step):
+        """Move one step up or down the speed table"""
+        speeds = sorted(set(SPEEDS) | {self.speed})
+        index = speeds.index(self.speed) + step
+        self.speed = speeds[min(max(index, 0), len(speeds) - 1)]
+
+    def handle_key(self, char):
+        """Apply a key press; returns False when the player should exit"""
+        if char in ('q', 'Q'):
+            return False
+        if char == ' ':
+            if self.position >= self.end_time:
+                self.seek(self.start_time)
+            self.paused = not self.paused
+        elif char in ('+', '='):
+            self.change_speed(1)
+        elif char in ('-', '_'):
+            self.change_speed(-1)
+        elif char == ']':
+            self.seek(self.position + SEEK_STEP)
+        elif char == '[':
+            self.seek(self.position - SEEK_STEP)
+        elif char in ('g', 'G'):
+            clear_screen()
+            get_screen().invalidate()
+            text = self.terminal.prompt(
+                f"Jump to time ({format_timestamp(self.start_time)} .. {format_timestamp(self.end_time)}; "
+                f"HH:MM[:SS], YYYY-MM-DD HH:MM[:SS] or +/-90s, 15m): ")
+            target = parse_time(text, self.position)
+            if target is not None:
+                self.seek(target)
+        return True
+
+    def footer(self):
+        """Status line shown in place of the live dashboard's footer"""
+        state = 'PAUSED' if self.paused else f'PLAY x{self.speed:g}'
+        return (f"REPLAY {format_timestamp(self.position)} [{state}] | space pause | +/- speed | "
+                f"[ ] -/+{SEEK_STEP}s | g jump | q quit")
+
+    def run(self):
+        """Playback loop"""
+        self.terminal.setup()
+        screen = get_screen()
+        try:
+            last = time.monotonic()
+            next_frame = last
+            while True:
+                char = self.terminal.read_key(max(0.0, next_frame - time.monotonic()))
+                if char is not None and not self.handle_key(char):
+                    break
+
+                now = time.monotonic()
+                if not self.paused:
+                    self.position += (now - last) * self.speed
+                    if self.position >= self.end_time:
+                        self.position = self.end_time
+                        self.paused = True
+                last = now
+                self._advance()
+
+                if now < next_frame:
+                    continue
+                next_frame = max(next_frame + FRAME_INTERVAL, now)
+                timestamp, system_data = self._current
+                render_dashboard(system_data, {}, screen, self.history, self.footer())
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.terminal.restore()
+            screen.close()
+            clear_screen()
+            self.reader.close()
+
+
+def run_replay(path, speed=1, start=None):
+    """Replay a recording in the terminal"""
+    try:
+        player = ReplayPlayer(path, speed=speed)
+    except (OSError, ValueError) as e:
+        print(f"{Colors.RED}Cannot replay {path}: {e}{Colors.RESET}")
+        return 1
+    if start is not None:
+        target = parse_time(start, player.start_time)
+        if target is None:
+            print(f"{Colors.RED}Cannot parse start time: {start}{Colors.RESET}")
+            return 1
+        player.seek(target)
+    player.run()
+    return 0
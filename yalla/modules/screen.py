@@ -0,0 +1,78 @@
+"""
+Screen Module
+Double-buffered terminal output that only rewrites lines changed since the last frame
+"""
+
+import shutil
+import sys
+
+from yalla.modules.ui_renderer import clip_visible
+
+
+# ANSI control sequences (colorama translates these on legacy Windows consoles)
+CURSOR_HOME = '\033[H'
+CLEAR_SCREEN = '\033[2J'
+CLEAR_TO_EOL = '\033[K'
+HIDE_CURSOR = '\033[?25l'
+SHOW_CURSOR = '\033[?25h'
+
+
+def move_cursor(row, column=1):
+    """Escape sequence moving the cursor to a 1-based row and column"""
+    return f'\033[{row};{column}H'
+
+
+class Screen:
+    """Keep the previous frame and send only the lines that differ"""
+
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+        self._previous = None
+        self._size = None
+
+    def invalidate(self):
+        """Force the next frame to be redrawn completely"""
+        self._previous = None
+
+    def draw(self, lines):
+        """Write a frame given as a list of lines; returns the number of characters sent"""
+        size = shutil.get_terminal_size()
+        height = max(size.lines, 1)
+        # Rows past the bottom of the terminal would scroll and break addressing,
+        # and so would lines wrapping past the right edge
+        width = max(size.columns, 1)
+        lines = [clip_visible(line, width) for line in lines[:height]]
+
+        if self._previous is None or size != self._size:
+            parts = [HIDE_CURSOR, CURSOR_HOME, CLEAR_SCREEN]
+            for row, line in enumerate(lines, 1):
+                parts.append(move_cursor(row))
+                parts.append(line)
+            self._size = size
+        else:
+            parts = []
+            previous = self._previous
+            for row, line in enumerate(lines, 1):
+                if row > len(previous) or previous[row - 1] != line:
+                    parts.append(move_cursor(row))
+                    parts.append(line)
+                    parts.append(CLEAR_TO_EOL)
+            # Blank out rows left over from a taller previous frame
+            for row in range(len(lines) + 1, len(previous) + 1):
+                parts.append(move_cursor(row))
+                parts.append(CLEAR_TO_EOL)
+
+        self._previous = lines
+        if not parts:
+            return 0
+        parts.append(move_cursor(min(len(lines) + 1, height)))
+        output = ''.join(parts)
+        self.stream.write(output)
+        self.stream.flush()
+        return len(output)
+
+    def close(self):
+        """Restore the cursor and forget the frame buffer"""
+        self.stream.write(SHOW_CURSOR)
+        self.stream.flush()
+        self._previous = None
@@ -0,0 +1,271 @@
+"""
+Simulator Module
+A deterministic simulated host for load-testing yalla at production scale
+
+SimulatedHost mimics the parts of psutil the monitors use. Its state is a
+pure function of the time since it was created: every `tick` seconds a
+`churn` fraction of the processes exits and as many new ones start, the
+same share of sockets is replaced, and network and disk counters grow
+at a varying but monotonic rate. Two hosts with the same options report
+the same values at the same age, so runs are reproducible, and nothing
+is stored per process or socket, so 50k processes and 500k sockets cost
+no more memory than what the caller keeps.
+"""
+
+import math
+import socket
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+svmem = namedtuple('svmem', ['total', 'available', 'percent', 'used', 'free'])
+sswap = namedtuple('sswap', ['total', 'used', 'free', 'percent', 'sin', 'sout'])
+sdiskusage = namedtuple('sdiskusage', ['total', 'used', 'free', 'percent'])
+pmem = namedtuple('pmem', ['rss', 'vms'])
+snicaddr = namedtuple('snicaddr', ['family', 'address', 'netmask', 'broadcast', 'ptp'])
+snicstats = namedtuple('snicstats', ['isup', 'duplex', 'speed', 'mtu', 'flags'])
+snetio = namedtuple('snetio', ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv',
+                               'errin', 'errout', 'dropin', 'dropout'])
+addr = namedtuple('addr', ['ip', 'port'])
+sconn = namedtuple('sconn', ['fd', 'family', 'type', 'laddr', 'raddr', 'status', 'pid'])
+
+GiB = 1024 ** 3
+
+# Default host shape; every option can be overridden in the --source spec
+DEFAULTS = {
+    'processes': 300,
+    'sockets': 200,
+    'cpus': 8,
+    'interfaces': 3,
+    'memory_gb': 16,
+    'disk_gb': 512,
+    'churn': 0.01,      # Share of processes and sockets replaced per tick
+    'tick': 1.0,        # Seconds per simulation step
+    'rate': 1_000_000,  # Mean bytes/s received per interface; a third of it is sent
+    'seed': 0,
+    'stall': 0,         # Seconds disk_usage() blocks, like a dead NFS mount
+}
+
+# Connection states in rough production proportions
+STATES = ('ESTABLISHED',) * 6 + ('TIME_WAIT', 'TIME_WAIT', 'CLOSE_WAIT', 'LISTEN')
+
+PROCESS_NAMES = ('nginx', 'postgres', 'python3', 'java', 'node', 'sshd', 'redis-server',
+                 'systemd', 'kworker', 'containerd', 'dockerd', 'envoy', 'bash', 'cron')
+
+FIRST_PID = 1000
+
+# One process in this many is busy; the rest idle near 0% CPU
+BUSY_EVERY = 40
+
+
+class Error(Exception):
+    pass
+
+
+class NoSuchProcess(Error):
+    pass
+
+
+class AccessDenied(Error):
+    pass
+
+
+class ZombieProcess(NoSuchProcess):
+    pass
+
+
+def _parse_value(text):
+    """A number from an option value, allowing k and M multipliers ("50k")"""
+    multiplier = 1
+    if text[-1:] in ('k', 'K'):
+        text, multiplier = text[:-1], 1_000
+    elif text[-1:] in ('m', 'M'):
+        text, multiplier = text[:-1], 1_000_000
+    value = float(text) * multiplier
+    return int(value) if value.is_integer() and '.' not in text else value
+
+
+def parse_options(text):
+    """SimulatedHost keyword arguments from "key=value,key=value" """
+    options = {}
+    for item in filter(None, (part.strip() for part in text.split(','))):
+        key, sep, value = item.partition('=')
+        if not sep or key not in DEFAULTS:
+            raise ValueError(f"bad simulator option {item!r} (known: {', '.join(DEFAULTS)})")
+        try:
+            options[key] = _parse_value(value)
+        except ValueError:
+            raise ValueError(f"bad value for simulator option {key!r}: {value!r}") from None
+    return options
+
+
+class SimulatedProcess:
+    """One simulated process, valid while its PID is in the host's live window"""
+
+    def __init__(self, host, pid):
+        if not host.is_running(pid):
+            raise NoSuchProcess(pid)
+        self.pid = pid
+        self._host = host
+
+    @contextmanager
+    def oneshot(self):
+        yield
+
+    def create_time(self):
+        return self._host.boot + self.pid
+
+    def name(self):
+        if not self._host.is_running(self.pid):
+            raise NoSuchProcess(self.pid)
+        return PROCESS_NAMES[self.pid % len(PROCESS_NAMES)]
+
+    def cpu_percent(self, interval=None):
+        host = self._host
+        noise = host.noise(self.pid, host.step())
+        if self.pid % BUSY_EVERY == 0:
+            return round(noise * 100, 1)
+        return round(noise * 2, 1)
+
+    def memory_info(self):
+        return pmem(rss=(self.pid * 2654435761 % 512 + 4) * 1024 * 1024, vms=0)
+
+
+class SimulatedHost:
+    """Module-like object exposing the psutil API yalla calls, for a made-up host"""
+
+    NoSuchProcess = NoSuchProcess
+    AccessDenied = AccessDenied
+    ZombieProcess = ZombieProcess
+    Error = Error
+
+    def __init__(self, clock=time.monotonic, **options):
+        unknown = set(options) - set(DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown simulator options: {', '.join(sorted(unknown))}")
+        settings = dict(DEFAULTS, **options)
+        self.processes = max(1, int(settings['processes']))
+        self.sockets = max(0, int(settings['sockets']))
+        self.cpus = max(1, int(settings['cpus']))
+        self.memory_total = int(settings['memory_gb'] * GiB)
+        self.disk_total = int(settings['disk_gb'] * GiB)
+        self.tick = float(settings['tick']) or 1.0
+        self.rate = float(settings['rate'])
+        self.seed = int(settings['seed'])
+        self.stall = float(settings['stall'])
+        self.process_churn = int(self.processes * settings['churn'])
+        self.socket_churn = int(self.sockets * settings['churn'])
+        self.interfaces = [f'eth{i}' for i in range(max(0, int(settings['interfaces']) - 1))] + ['lo']
+        self.clock = clock
+        self.started = clock()
+        # Pretend the host booted three days ago
+        self.boot = time.time() - 3 * 86400
+
+    def elapsed(self):
+        """Seconds since the host was created"""
+        return self.clock() - self.started
+
+    def step(self):
+        """Index of the current simulation step"""
+        return int(self.elapsed() // self.tick)
+
+    def noise(self, *values):
+        """Deterministic pseudo-random fraction in [0, 1) for some integers"""
+        h = self.seed * 0x9E3779B1 & 0xFFFFFFFF
+        for value in values:
+            h = ((h ^ value) * 0x85EBCA6B + 0xC2B2AE35) & 0xFFFFFFFF
+            h ^= h >> 13
+        return h / 4294967296.0
+
+    def _first_pid(self, step=None):
+        return FIRST_PID + (self.step() if step is None else step) * self.process_churn
+
+    def is_running(self, pid):
+        first = self._first_pid()
+        return first <= pid < first + self.processes
+
+    # Processes
+
+    def pids(self):
+        first = self._first_pid()
+        return list(range(first, first + self.processes))
+
+    def Process(self, pid):
+        return SimulatedProcess(self, pid)
+
+    # CPU and memory
+
+    def cpu_percent(self, interval=None):
+        t = self.elapsed()
+        wave = 35 + 25 * math.sin(t / 30) + 10 * (self.noise(self.step()) - 0.5)
+        return round(min(100.0, max(0.0, wave)), 1)
+
+    def cpu_count(self, logical=True):
+        return self.cpus
+
+    def getloadavg(self):
+        busy = self.cpus * self.cpu_percent() / 100
+        return (busy, busy * 0.9, busy * 0.8)
+
+    def boot_time(self):
+        return self.boot
+
+    def virtual_memory(self):
+        percent = round(45 + 15 * math.sin(self.elapsed() / 90), 1)
+        used = int(self.memory_total * percent / 100)
+        available = self.memory_total - used
+        return svmem(self.memory_total, available, percent, used, available * 3 // 4)
+
+    def swap_memory(self):
+        total = 2 * GiB
+        used = int(total * 0.1)
+        return sswap(total, used, total - used, 10.0, 0, 0)
+
+    def disk_usage(self, path):
+        if self.stall:
+            time.sleep(self.stall)
+        # Fills slowly with the same byte rate as the network receives
+        used = min(self.disk_total, int(self.disk_total * 0.4 + self.elapsed() * self.rate / 100))
+        return sdiskusage(self.disk_total, used, self.disk_total - used,
+                          round(used * 100 / self.disk_total, 1))
+
+    # Network
+
+    def net_if_addrs(self):
+        return {name: [snicaddr(socket.AF_INET, '127.0.0.1' if name == 'lo' else f'10.0.{i}.2',
+                                '255.0.0.0' if name == 'lo' else '255.255.255.0', None, None)]
+                for i, name in enumerate(self.interfaces)}
+
+    def net_if_stats(self):
+        return {name: snicstats(True, 2, 0 if name == 'lo' else 10000, 1500, '') for name in self.interfaces}
+
+    def _received(self, index, t):
+        """Bytes received by interface `index` after `t` seconds; the rate varies but never drops below 0"""
+        rate = self.rate * (index + 1) / len(self.interfaces)
+        period = 20 + 10 * index
+        return int(rate * (t + period * (1 - math.cos(t / period))))
+
+    def net_io_counters(self, pernic=False):
+        t = self.elapsed()
+        counters = {}
+        for index, name in enumerate(self.interfaces):
+            received = self._received(index, t)
+            sent = received // 3
+            counters[name] = snetio(sent, received, sent // 900, received // 1400,
+                                    int(t / 60), int(t / 120), int(t / 30), 0)
+        if pernic:
+            return counters
+        return snetio(*(sum(values) for values in zip(*counters.values())))
+
+    def net_connections(self, kind='inet'):
+        first_socket = self.step() * self.socket_churn
+        first_pid = self._first_pid()
+        connections = []
+        for number in range(first_socket, first_socket + self.sockets):
+            status = STATES[number % len(STATES)]
+            local = addr('10.0.0.2', 443 if status == 'LISTEN' else 1024 + number % 64000)
+            remote = () if status == 'LISTEN' else addr(
+                f'198.51.{number // 250 % 250}.{number % 250 + 1}', 443)
+            connections.append(sconn(number % 65000 + 3, socket.AF_INET, socket.SOCK_STREAM,
+                                     local, remote, status, first_pid + number % self.processes))
+        return connections
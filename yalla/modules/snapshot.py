@@ -0,0 +1,13 @@
+"""
+Snapshot Type
+The unit of data shared by the collector, the renderers, the recorder and the daemon
+"""
+
+from collections import namedtuple
+
+
+# A published snapshot is never mutated: merging builds fresh section dicts,
+# so readers can hold on to one without locking. `health` maps each failing
+# collector to its error, failure count, last good time and retry delay
+# (see Supervisor.problems()); None or {} when every collector is healthy.
+Snapshot = namedtuple('Snapshot', ['timestamp', 'system', 'network', 'health'], defaults=(None,))
@@ -0,0 +1,212 @@
+"""
+Supervisor Module
+Runs collectors on worker threads under a deadline and pauses the ones that keep failing
+
+Each collector gets its own daemon worker thread, so a collector stuck in
+the kernel (disk_usage() on a dead NFS mount, a huge connection table)
+only ties up its own worker. The pass stops waiting for it at its
+deadline, the rest of the snapshot is published, and the collector's last
+good value stays on screen marked stale. After COLLECTOR_FAILURE_LIMIT
+errors or overruns in a row the collector is paused, twice as long each
+time up to COLLECTOR_BACKOFF_MAX, so a bad data source is asked less and
+less often until it recovers.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, wait
+
+from yalla.config import COLLECTOR_TIMEOUT, COLLECTOR_SLOW_TIMEOUT, COLLECTOR_FAILURE_LIMIT
+from yalla.config import COLLECTOR_BACKOFF_MAX, REFRESH_INTERVAL
+from yalla.modules.registry import COST_HIGH
+from yalla.modules.profiling import stage_timer
+
+log = logging.getLogger(__name__)
+
+
+def collector_timeout(spec):
+    """Seconds `spec` may run before the pass stops waiting for it"""
+    if spec.timeout is not None:
+        return spec.timeout
+    return COLLECTOR_SLOW_TIMEOUT if spec.cost == COST_HIGH else COLLECTOR_TIMEOUT
+
+
+def describe_error(error):
+    """Short human-readable form of a collector exception"""
+    message = str(error)
+    return f"{type(error).__name__}: {message}" if message else type(error).__name__
+
+
+class CollectorWorker:
+    """A daemon thread running one collector's calls, one at a time"""
+
+    def __init__(self, name):
+        self.future = None
+        self.started = None
+        self._jobs = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f'yalla-{name}', daemon=True)
+        self._thread.start()
+
+    def busy(self):
+        """True while the previous call has not returned"""
+        return self.future is not None and not self.future.done()
+
+    def submit(self, func):
+        """Queue a call to `func` and return a Future for its result"""
+        self.future = Future()
+        self.started = time.monotonic()
+        self._jobs.put((func, self.future))
+        return self.future
+
+    def close(self):
+        """Let the thread exit once it is idle"""
+        self._jobs.put(None)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            func, future = job
+            try:
+                result = func()
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+
+class CollectorHealth:
+    """Consecutive failures and circuit-breaker state of one collector"""
+
+    def __init__(self, section):
+        self.section = section
+        self.failures = 0
+        self.error = None
+        self.last_ok = None  # Wall-clock time of the last good result
+        self.paused_until = None  # Monotonic time; None while the circuit is closed
+        self.backoff = None
+
+    def succeeded(self, name):
+        if self.failures:
+            log.info("collector %s recovered after %d failures", name, self.failures)
+        self.failures = 0
+        self.error = None
+        self.paused_until = None
+        self.backoff = None
+        self.last_ok = time.time()
+
+    def failed(self, name, error, interval, now):
+        self.failures += 1
+        self.error = error
+        if self.failures == 1:
+            log.warning("collector %s failed: %s", name, error)
+        if self.failures >= COLLECTOR_FAILURE_LIMIT:
+            self.backoff = min(COLLECTOR_BACKOFF_MAX, (self.backoff or interval or REFRESH_INTERVAL) * 2)
+            self.paused_until = now + self.backoff
+            log.warning("collector %s paused for %.0fs after %d failures in a row: %s",
+                        name, self.backoff, self.failures, error)
+
+
+class Supervisor:
+    """Worker threads, deadlines and health for a set of collectors"""
+
+    def __init__(self):
+        self.health = {}
+        self._workers = {}
+
+    def _worker(self, name):
+        worker = self._workers.get(name)
+        if worker is None:
+            worker = self._workers[name] = CollectorWorker(name)
+        return worker
+
+    def _health(self, spec):
+        health = self.health.get(spec.name)
+        if health is None:
+            health = self.health[spec.name] = CollectorHealth(spec.section)
+        return health
+
+    @staticmethod
+    def _timed(spec):
+        """`spec.func`, recording its duration while stage timing is on"""
+        if not stage_timer.enabled:
+            return spec.func
+
+        def call():
+            started = time.perf_counter()
+            try:
+                return spec.func()
+            finally:
+                stage_timer.record('collect:' + spec.name, time.perf_counter() - started)
+        return call
+
+    def paused_until(self, name):
+        """Monotonic time until which a failing collector is skipped, or None"""
+        health = self.health.get(name)
+        return health.paused_until if health is not None else None
+
+    def run(self, specs, now):
+        """Run `specs` concurrently; {name: result} for the ones that returned in time
+
+        `now` is the scheduler's clock and is used for the pause times;
+        deadlines are measured on the real monotonic clock.
+        """
+        results = {}
+        pending = {}
+        started = time.monotonic()
+        for spec in specs:
+            worker = self._worker(spec.name)
+            if worker.busy():
+                # Still stuck in the call from an earlier pass
+                self._health(spec).failed(spec.name, f"still running after {started - worker.started:.1f}s",
+                                          spec.interval, now)
+                continue
+            timeout = collector_timeout(spec)
+            pending[worker.submit(self._timed(spec))] = (spec, started + timeout, timeout)
+
+        while pending:
+            deadline = min(item[1] for item in pending.values())
+            done, _ = wait(list(pending), timeout=max(0.0, deadline - time.monotonic()))
+            for future in done:
+                spec = pending.pop(future)[0]
+                error = future.exception()
+                if error is None:
+                    self._health(spec).succeeded(spec.name)
+                    results[spec.name] = future.result()
+                else:
+                    self._health(spec).failed(spec.name, describe_error(error), spec.interval, now)
+            current = time.monotonic()
+            for future, (spec, deadline, timeout) in list(pending.items()):
+                if deadline <= current:
+                    del pending[future]
+                    self._health(spec).failed(spec.name, f"timed out after {timeout:.1f}s",
+                                              spec.interval, now)
+        return results
+
+    def problems(self):
+        """{name: details} for every collector currently failing; empty when all are healthy
+
+        Times are wall-clock, so they stay meaningful in other processes:
+        `last_ok` is when the value on display was collected (None if never)
+        and `retry_at` when a paused collector runs again (None if not paused).
+        """
+        offset = time.time() - time.monotonic()
+        return {
+            name: {
+                'section': health.section,
+                'error': health.error,
+                'failures': health.failures,
+                'last_ok': health.last_ok,
+                'retry_at': None if health.paused_until is None else health.paused_until + offset,
+            }
+            for name, health in self.health.items() if health.failures
+        }
+
+    def close(self):
+        """Stop the idle workers; stuck ones exit when their call returns"""
+        for worker in self._workers.values():
+            worker.close()
+        self._workers = {}
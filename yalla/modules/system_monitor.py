@@ -3,128 +3,297 @@ System Monitor Module
 Collects system metrics: CPU, memory, disk, processes, uptime
 """
 
-import psutil
+import heapq
+import logging
+import threading
 import time
-from yalla.config import SHOW_PROCESS_COUNT, SHOW_UPTIME, SHOW_DISK_STATS
+from yalla.config import REFRESH_INTERVAL, SHOW_PROCESS_COUNT, SHOW_UPTIME, SHOW_DISK_STATS
+from yalla.config import MAX_PROCESSES_DISPLAY
+from yalla.modules.registry import register_collector, COST_LOW, COST_MEDIUM, COST_HIGH
+from yalla.modules.datasource import get_source, get_procfs_backend
+
+# Interval in seconds for values that change slowly (disk totals)
+DISK_REFRESH_INTERVAL = 10
+
+# Walking every process is the most expensive system collector
+PROCESS_REFRESH_INTERVAL = 3
+
+log = logging.getLogger(__name__)
+
+_cpu_primed = False
+_boot_time = None
+
+
+@register_collector('cpu', 'system', REFRESH_INTERVAL, COST_LOW)
+def collect_cpu_percent(interval=None):
+    """CPU usage; with interval=None, measured since the previous call"""
+    global _cpu_primed
+    if interval is None and not _cpu_primed:
+        # The first non-blocking call has nothing to compare against
+        interval = 0.1
+    _cpu_primed = True
+    backend = get_procfs_backend()
+    if backend is not None:
+        try:
+            return {'cpu_percent': backend.cpu_percent(interval=interval)}
+        except (OSError, ValueError, IndexError):
+            pass
+    return {'cpu_percent': get_source().cpu_percent(interval=interval)}
+
+
+@register_collector('memory', 'system', REFRESH_INTERVAL, COST_LOW)
+def collect_memory():
+    """Virtual memory usage"""
+    backend = get_procfs_backend()
+    if backend is not None:
+        try:
+            memory = backend.virtual_memory()
+            return {
+                'memory_total': memory['total'],
+                'memory_used': memory['used'],
+                'memory_available': memory['available'],
+                'memory_percent': memory['percent']
+            }
+        except (OSError, ValueError, TypeError):
+            pass
+    memory = get_source().virtual_memory()
+    return {
+        'memory_total': memory.total,
+        'memory_used': memory.used,
+        'memory_available': memory.available,
+        'memory_percent': memory.percent
+    }
+
+
+@register_collector('disk', 'system', DISK_REFRESH_INTERVAL, COST_MEDIUM)
+def collect_disk():
+    """Usage of the system drive - Cross-platform"""
+    if not SHOW_DISK_STATS:
+        return {}
+    stats = {}
+    try:
+        import platform
+        system = platform.system()
+
+        if system == 'Windows':
+            # On Windows, check C: drive first, then other drives
+            import os
+            drives = ['C:\\']
+            # Add other possible drives
+            for letter in 'DEFGHIJKLMNOPQRSTUVWXYZ':
+                drive = f'{letter}:\\'
+                if os.path.exists(drive):
+                    drives.append(drive)
+                    break  # Just use the first available drive after C:
+
+            disk_path = drives[0] if drives else 'C:\\'
+        else:
+            # Unix-like systems (Linux, macOS)
+            disk_path = '/'
+
+        disk = get_source().disk_usage(disk_path)
+        stats['disk_total'] = disk.total
+        stats['disk_used'] = disk.used
+        stats['disk_free'] = disk.free
+        stats['disk_percent'] = disk.percent
+        stats['disk_usage'] = True
+    except (PermissionError, OSError, ImportError):
+        stats['disk_usage'] = False
+    return stats
+
+
+@register_collector('process_count', 'system', REFRESH_INTERVAL, COST_MEDIUM)
+def collect_process_count():
+    """Number of running processes"""
+    if not SHOW_PROCESS_COUNT:
+        return {}
+    return {'process_count': len(get_source().pids())}
+
+
+@register_collector('uptime', 'system', REFRESH_INTERVAL, COST_LOW)
+def collect_uptime():
+    """Time since boot; the boot time itself is read only once"""
+    global _boot_time
+    if not SHOW_UPTIME:
+        return {}
+    if _boot_time is None:
+        _boot_time = get_source().boot_time()
+    return {'uptime': time.time() - _boot_time, 'boot_time': _boot_time}
+
+
+@register_collector('cpu_count', 'system', None, COST_LOW)
+def collect_cpu_count():
+    """Number of logical CPUs"""
+    return {'cpu_count': get_source().cpu_count()}
+
+
+@register_collector('load_avg', 'system', REFRESH_INTERVAL, COST_LOW)
+def collect_load_avg():
+    """Load average (Unix-like systems)"""
+    backend = get_procfs_backend()
+    if backend is not None:
+        try:
+            return {'load_avg': backend.load_average()}
+        except (OSError, ValueError, IndexError):
+            pass
+    try:
+        return {'load_avg': get_source().getloadavg()}
+    except AttributeError:
+        # Windows doesn't have load average
+        return {'load_avg': None}
 
 
 def get_system_stats():
     """Collect all system statistics"""
     stats = {}
-    
+
     try:
-        # CPU Usage
-        stats['cpu_percent'] = psutil.cpu_percent(interval=0.1)
-        
-        # Memory Usage
-        memory = psutil.virtual_memory()
-        stats['memory_total'] = memory.total
-        stats['memory_used'] = memory.used
-        stats['memory_available'] = memory.available
-        stats['memory_percent'] = memory.percent
-        
-        # Disk Usage - Cross-platform
-        if SHOW_DISK_STATS:
-            try:
-                import platform
-                system = platform.system()
-
-                if system == 'Windows':
-                    # On Windows, check C: drive first, then other drives
-                    import os
-                    drives = ['C:\\']
-                    # Add other possible drives
-                    for letter in 'DEFGHIJKLMNOPQRSTUVWXYZ':
-                        drive = f'{letter}:\\'
-                        if os.path.exists(drive):
-                            drives.append(drive)
-                            break  # Just use the first available drive after C:
-
-                    disk_path = drives[0] if drives else 'C:\\'
-                else:
-                    # Unix-like systems (Linux, macOS)
-                    disk_path = '/'
-
-                disk = psutil.disk_usage(disk_path)
-                stats['disk_total'] = disk.total
-                stats['disk_used'] = disk.used
-                stats['disk_free'] = disk.free
-                stats['disk_percent'] = disk.percent
-                stats['disk_usage'] = True
-            except (PermissionError, OSError, ImportError):
-                stats['disk_usage'] = False
-        
-        # Process Count
-        if SHOW_PROCESS_COUNT:
-            try:
-                stats['process_count'] = len(psutil.pids())
-            except:
-                stats['process_count'] = 0
-        
-        # System Uptime
-        if SHOW_UPTIME:
-            try:
-                boot_time = psutil.boot_time()
-                stats['uptime'] = time.time() - boot_time
-            except:
-                stats['uptime'] = 0
-        
-        # CPU Count
-        stats['cpu_count'] = psutil.cpu_count()
-        
-        # Load Average (Unix-like systems)
-        try:
-            stats['load_avg'] = psutil.getloadavg()
-        except AttributeError:
-            # Windows doesn't have load average
-            stats['load_avg'] = None
-        
+        stats.update(collect_cpu_percent(interval=0.1))
+        stats.update(collect_memory())
+        stats.update(collect_disk())
+        stats.update(collect_process_count())
+        stats.update(collect_uptime())
+        stats.update(collect_cpu_count())
+        stats.update(collect_load_avg())
+
     except Exception as e:
         # Graceful degradation
+        log.warning("system stats incomplete: %s", e)
         stats['error'] = str(e)
         stats['cpu_percent'] = 0
         stats['memory_total'] = 0
         stats['memory_used'] = 0
-    
+
     return stats
 
 
+class ProcessTable:
+    """Long-lived process objects, so CPU usage is measured between ticks
+
+    Entries are keyed by (pid, create_time). A PID missing from a sample is
+    evicted, and a PID whose creation time changed between samples gets a
+    new entry, so a process that reuses a PID always starts fresh.
+    Switching the data source starts the table over.
+    """
+
+    def __init__(self):
+        self._processes = {}
+        self._source = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._processes)
+
+    def _evict_dead(self, live_pids):
+        """Drop entries whose PID is no longer running"""
+        for key in [key for key in self._processes if key[0] not in live_pids]:
+            del self._processes[key]
+
+    def _track(self, pid, key=None):
+        """Process object for `pid`, replacing the entry `key` if the PID now belongs to another process
+
+        psutil caches create_time() per object, so only a fresh Process
+        tells whether the PID was reused; returns (key, Process).
+        """
+        proc = self._source.Process(pid)
+        created = proc.create_time()
+        if key is not None:
+            if key[1] == created:
+                return key, self._processes[key]
+            # Reused between ticks: measure the new process from scratch
+            del self._processes[key]
+        key = (pid, created)
+        self._processes[key] = proc
+        return key, proc
+
+    def sample(self):
+        """Yield one info dict per live process"""
+        source = get_source()
+        if source is not self._source:
+            self._processes = {}
+            self._source = source
+        total_memory = source.virtual_memory().total or 1
+        live_pids = set(source.pids())
+        self._evict_dead(live_pids)
+        known = {key[0]: key for key in self._processes}
+
+        for pid in live_pids:
+            key = known.get(pid)
+            try:
+                key, proc = self._track(pid, key)
+                # One read of /proc/<pid>/stat and statm per process
+                with proc.oneshot():
+                    info = {
+                        'pid': pid,
+                        'name': proc.name(),
+                        'cpu_percent': proc.cpu_percent(interval=None),
+                        'memory_percent': proc.memory_info().rss * 100.0 / total_memory
+                    }
+            except source.NoSuchProcess:
+                if key is not None:
+                    self._processes.pop(key, None)
+                continue
+            except (source.AccessDenied, source.ZombieProcess):
+                continue
+            yield info
+
+    def top(self, limit=5):
+        """The `limit` processes using the most CPU"""
+        with self._lock:
+            return heapq.nlargest(limit, self.sample(), key=lambda x: x['cpu_percent'] or 0)
+
+
+_process_table = ProcessTable()
+
+
 def get_top_processes(limit=5):
     """Get top processes by CPU usage"""
     try:
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-            try:
-                processes.append(proc.info)
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                pass
-        
-        # Sort by CPU usage
-        processes.sort(key=lambda x: x.get('cpu_percent', 0) or 0, reverse=True)
-        return processes[:limit]
-    except:
+        return _process_table.top(limit)
+    except Exception as e:
+        # Graceful degradation
+        log.warning("top processes unavailable: %s", e)
         return []
 
 
+@register_collector('top_processes', 'system', PROCESS_REFRESH_INTERVAL, COST_HIGH)
+def collect_top_processes():
+    """Processes using the most CPU"""
+    return {'top_processes': _process_table.top(MAX_PROCESSES_DISPLAY)}
+
+
+def _read_memory_info():
+    """Virtual and swap memory figures; raises if the source fails"""
+    memory = get_source().virtual_memory()
+    swap = get_source().swap_memory()
+
+    return {
+        'virtual': {
+            'total': memory.total,
+            'used': memory.used,
+            'available': memory.available,
+            'percent': memory.percent
+        },
+        'swap': {
+            'total': swap.total,
+            'used': swap.used,
+            'free': swap.free,
+            'percent': swap.percent
+        }
+    }
+
+
 def get_memory_info():
     """Get detailed memory information"""
     try:
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-        
-        return {
-            'virtual': {
-                'total': memory.total,
-                'used': memory.used,
-                'available': memory.available,
-                'percent': memory.percent
-            },
-            'swap': {
-                'total': swap.total,
-                'used': swap.used,
-                'free': swap.free,
-                'percent': swap.percent
-            }
-        }
-    except:
+        return _read_memory_info()
+    except Exception as e:
+        # Graceful degradation
+        log.warning("memory information unavailable: %s", e)
         return None
+
+
+@register_collector('memory_info', 'system', REFRESH_INTERVAL, COST_LOW)
+def collect_memory_info():
+    """Detailed virtual and swap memory figures"""
+    return {'memory_info': _read_memory_info()}
@@ -0,0 +1,76 @@
+"""
+Terminal Module
+Cross-platform non-blocking keyboard input for the interactive views
+"""
+
+import sys
+import time
+
+# Platform-specific imports
+try:
+    import select
+    import termios
+    import tty
+    HAS_UNIX_TERMINAL = True
+except ImportError:
+    HAS_UNIX_TERMINAL = False
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
+
+
+class Terminal:
+    """Puts the terminal in cbreak mode and reads single keys"""
+
+    def __init__(self):
+        self.old_settings = None
+
+    def setup(self):
+        """Configure terminal for non-blocking input"""
+        if HAS_UNIX_TERMINAL:
+            try:
+                self.old_settings = termios.tcgetattr(sys.stdin)
+                tty.setcbreak(sys.stdin.fileno())
+            except:
+                pass
+
+    def restore(self):
+        """Restore terminal settings"""
+        if HAS_UNIX_TERMINAL and self.old_settings:
+            try:
+                termios.tcsetattr(sys.stdin, termios.TCSADRAIN, self.old_settings)
+            except:
+                pass
+
+    def read_key(self, timeout=0):
+        """Return one key pressed within `timeout` seconds, or None"""
+        if HAS_UNIX_TERMINAL:
+            try:
+                if select.select([sys.stdin], [], [], timeout) == ([sys.stdin], [], []):
+                    return sys.stdin.read(1)
+            except:
+                pass
+        elif msvcrt:
+            # Windows has no select() on consoles, so poll until the timeout
+            try:
+                deadline = time.monotonic() + timeout
+                while not msvcrt.kbhit() and time.monotonic() < deadline:
+                    time.sleep(0.02)
+                if msvcrt.kbhit():
+                    return msvcrt.getch().decode('utf-8')
+            except:
+                pass
+        elif timeout:
+            time.sleep(timeout)
+        return None
+
+    def prompt(self, message):
+        """Read a line of text with normal echo, then return to cbreak mode"""
+        self.restore()
+        try:
+            return input(message)
+        except EOFError:
+            return ''
+        finally:
+            self.setup()
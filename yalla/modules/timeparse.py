@@ -0,0 +1,53 @@
+"""
+Time Parsing Helpers
+Parse durations ("90", "15m", "6h") and points in time typed by the user
+"""
+
+from datetime import datetime
+
+_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+def parse_duration(text):
+    """Seconds in a duration such as "90", "90s", "15m", "6h" or "30d"; None if invalid"""
+    text = text.strip().lower()
+    if not text:
+        return None
+    scale = _UNITS.get(text[-1])
+    number = text[:-1] if scale else text
+    try:
+        return float(number) * (scale or 1)
+    except ValueError:
+        return None
+
+
+def parse_time(text, reference):
+    """Epoch seconds for user input, or None if it cannot be parsed
+
+    Accepts "+90s"/"-5m" (relative to `reference`), epoch seconds,
+    "HH:MM[:SS]" (on the day of `reference`) and ISO "YYYY-MM-DD HH:MM[:SS]".
+    """
+    text = text.strip()
+    if not text:
+        return None
+    if text[0] in '+-':
+        offset = parse_duration(text[1:])
+        if offset is None:
+            return None
+        return reference + offset if text[0] == '+' else reference - offset
+    try:
+        return float(text)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(text).timestamp()
+    except ValueError:
+        pass
+    for pattern in ('%H:%M:%S', '%H:%M'):
+        try:
+            clock = datetime.strptime(text, pattern).time()
+        except ValueError:
+            continue
+        day = datetime.fromtimestamp(reference).date()
+        return datetime.combine(day, clock).timestamp()
+    return None
@@ -4,10 +4,17 @@ Handles ASCII art, colors, progress bars, and terminal layout
 """
 
 import os
+import re
 import sys
+import time
 from yalla.config import Colors, PROGRESS_BAR_LENGTH, PROGRESS_BAR_FILLED, PROGRESS_BAR_EMPTY
 from yalla.config import CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD
 from yalla.config import MEMORY_WARNING_THRESHOLD, MEMORY_CRITICAL_THRESHOLD
+from yalla.config import MAX_PROCESSES_DISPLAY, SPARKLINE_LENGTH, SPARKLINE_CHARS
+from yalla.config import REFRESH_INTERVAL
+
+
+_ANSI_ESCAPE = re.compile(r'\033\[[0-9;?]*[A-Za-z]')
 
 
 def get_terminal_size():
@@ -72,21 +79,35 @@ def get_color_for_percentage(value, warning_threshold, critical_threshold):
         return Colors.GREEN
 
 
-def create_progress_bar(value, max_value=100, label=""):
+def create_progress_bar(value, max_value=100, label="", length=PROGRESS_BAR_LENGTH):
     """Create a visual progress bar"""
     if max_value == 0:
         percentage = 0
     else:
         percentage = min(100, (value / max_value) * 100)
     
-    filled_length = int(PROGRESS_BAR_LENGTH * percentage / 100)
-    bar = PROGRESS_BAR_FILLED * filled_length + PROGRESS_BAR_EMPTY * (PROGRESS_BAR_LENGTH - filled_length)
+    filled_length = int(length * percentage / 100)
+    bar = PROGRESS_BAR_FILLED * filled_length + PROGRESS_BAR_EMPTY * (length - filled_length)
     
     color = get_color_for_percentage(percentage, CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD)
     
     return f"{label}{color}{bar}{Colors.RESET} {color}{percentage:.1f}%{Colors.RESET}"
 
 
+def create_sparkline(values, max_value=None, length=SPARKLINE_LENGTH):
+    """Create a one-line graph of the most recent values"""
+    values = values[-length:]
+    if not values:
+        return ''
+    if max_value is None:
+        max_value = max(values)
+    top = len(SPARKLINE_CHARS) - 1
+    if max_value <= 0:
+        return SPARKLINE_CHARS[0] * len(values)
+    return ''.join(SPARKLINE_CHARS[max(0, min(top, int(value / max_value * top + 0.5)))]
+                   for value in values)
+
+
 def format_bytes(bytes_value):
     """Format bytes to human readable format"""
     for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -96,6 +117,11 @@ def format_bytes(bytes_value):
     return f"{bytes_value:.2f} PB"
 
 
+def format_rate(bytes_per_second):
+    """Format a byte rate to human readable format"""
+    return f"{format_bytes(bytes_per_second)}/s"
+
+
 def format_uptime(seconds):
     """Format uptime in seconds to human readable format"""
     days = int(seconds // 86400)
@@ -110,10 +136,41 @@ def format_uptime(seconds):
         return f"{minutes}m"
 
 
-def create_section(title, content, color=Colors.DARK_VIOLET):
+def format_age(seconds):
+    """Compact age such as 12s, 3m 5s or 2h 4m"""
+    seconds = int(max(0, seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60}m"
+
+
+def build_health_lines(health, section, now=None):
+    """Stale markers for the failing collectors that feed `section`"""
+    if not health:
+        return []
+    if now is None:
+        now = time.time()
+    lines = []
+    for name, problem in sorted(health.items()):
+        if problem.get('section') != section:
+            continue
+        last_ok = problem.get('last_ok')
+        state = f"stale {format_age(now - last_ok)}" if last_ok else "no data"
+        detail = problem.get('error') or 'failed'
+        color = Colors.YELLOW
+        if problem.get('retry_at') is not None:
+            color = Colors.RED
+            detail += f", paused, retry in {format_age(problem['retry_at'] - now)}"
+        lines.append(f"  {color}⚠ {name} {state}{Colors.RESET} {Colors.DARK_GREY}({detail}){Colors.RESET}")
+    return lines
+
+
+def create_section(title, content, color=Colors.DARK_VIOLET, width=None):
     """Create a simple section with symbols"""
-    width = get_terminal_size()[0] - 4
-    width = max(width, 60)
+    if width is None:
+        width = max(get_terminal_size()[0] - 4, 60)
 
     # Use different symbols for different section types
     symbol = "●" if "System" in title else "▲" if "Network" in title else "◆"
@@ -125,12 +182,100 @@ def create_section(title, content, color=Colors.DARK_VIOLET):
     return f"{header}\n{separator}\n{content}\n"
 
 
-def render_dashboard(system_data, network_data):
-    """Render the complete dashboard"""
-    clear_screen()
+def visible_length(text):
+    """Length of text as displayed, ignoring ANSI escape sequences"""
+    return len(_ANSI_ESCAPE.sub('', text))
+
+
+def pad_visible(text, width):
+    """Pad text with spaces to `width` display columns"""
+    return text + ' ' * max(0, width - visible_length(text))
+
+
+def clip_visible(text, width):
+    """Cut text to at most `width` display columns, keeping its ANSI escape sequences intact"""
+    if visible_length(text) <= width:
+        return text
+    parts = []
+    remaining = width
+    position = 0
+    for match in _ANSI_ESCAPE.finditer(text):
+        chunk = text[position:match.start()]
+        if len(chunk) >= remaining:
+            break
+        parts.append(chunk)
+        parts.append(match.group())
+        remaining -= len(chunk)
+        position = match.end()
+    parts.append(text[position:position + remaining])
+    # The cut may fall inside a colored span
+    parts.append(Colors.RESET)
+    return ''.join(parts)
+
+
+def build_profile_overlay(durations, cpu_percent, rss):
+    """Lines showing ms per stage and yalla's own CPU and memory"""
+    width = max(get_terminal_size()[0] - 4, 60)
+    usage = f"yalla CPU {cpu_percent:.1f}%"
+    if rss is not None:
+        usage += f"  RSS {format_bytes(rss)}"
+    lines = [f"{Colors.YELLOW}{Colors.BOLD}Profile{Colors.RESET} {usage} {Colors.DARK_GREY}(p to hide){Colors.RESET}"]
+
+    # Slowest stages first, packed into as few lines as fit the width
+    entries = [f"{stage} {seconds * 1000:.2f}ms"
+               for stage, seconds in sorted(durations.items(), key=lambda item: -item[1])]
+    line = ''
+    for entry in entries:
+        if line and len(line) + 2 + len(entry) > width:
+            lines.append(f"  {Colors.DARK_GREY}{line}{Colors.RESET}")
+            line = ''
+        line = f"{line}  {entry}" if line else entry
+    if line:
+        lines.append(f"  {Colors.DARK_GREY}{line}{Colors.RESET}")
+    lines.append(f"{Colors.DARK_GREY}{'─' * width}{Colors.RESET}")
+    return lines
+
+
+_screen = None
+
+
+def get_screen():
+    """Shared screen buffer used by render_dashboard"""
+    global _screen
+    if _screen is None:
+        from yalla.modules.screen import Screen
+        _screen = Screen()
+    return _screen
+
+
+def render_dashboard(system_data, network_data, screen=None, history=None, footer_text=None, health=None,
+                     pacer=None):
+    """Render the complete dashboard, sending only what changed since the last frame"""
+    if screen is None:
+        screen = get_screen()
+    screen.draw(build_dashboard(system_data, network_data, history, footer_text, health, pacer))
+
+
+def build_dashboard(system_data, network_data, history=None, footer_text=None, health=None, pacer=None):
+    """Lay out the complete dashboard as a list of screen lines
+
+    `health` is Snapshot.health; each failing collector gets a stale marker
+    at the top of the section it feeds. The default footer shows the
+    current period of `pacer` (an AdaptivePacer), or REFRESH_INTERVAL.
+    """
+    output = []
+
+    def trend(metric, max_value=None, color=Colors.DARK_GREY):
+        """Sparkline for a metric's history, prefixed with a gap"""
+        if history is None:
+            return ''
+        values = history.values(metric, SPARKLINE_LENGTH)
+        if len(values) < 2:
+            return ''
+        return f"  {color}{create_sparkline(values, max_value)}{Colors.RESET}"
     
     # Banner
-    print(get_ascii_banner())
+    output.append(get_ascii_banner())
     
     # System Information Section
     cpu_percent = system_data.get('cpu_percent', 0)
@@ -142,14 +287,22 @@ def render_dashboard(system_data, network_data):
     disk_used = system_data.get('disk_used', 0)
     disk_total = system_data.get('disk_total', 0)
 
-    sys_content = f"""  {Colors.BOLD}CPU Usage:{Colors.RESET} {Colors.DARK_GREY}<- Current processor utilization{Colors.RESET}
-    {create_progress_bar(cpu_percent, 100, '')}
+    sys_content = ''.join(line + '\n' for line in build_health_lines(health, 'system'))
+    sys_content += f"""  {Colors.BOLD}CPU Usage:{Colors.RESET} {Colors.DARK_GREY}<- Current processor utilization{Colors.RESET}
+    {create_progress_bar(cpu_percent, 100, '')}{trend('cpu', 100)}
 
   {Colors.BOLD}Memory:{Colors.RESET} {format_bytes(memory_used)} / {format_bytes(memory_total)} {Colors.DARK_GREY}<- RAM usage{Colors.RESET}
-    {create_progress_bar(memory_used, memory_total, '')}
+    {create_progress_bar(memory_used, memory_total, '')}{trend('memory', 100)}
 
   {Colors.BOLD}Disk Usage:{Colors.RESET} {format_bytes(disk_used)} / {format_bytes(disk_total)} {Colors.DARK_GREY}<- Storage usage{Colors.RESET}
-    {create_progress_bar(disk_used, disk_total, '')}
+    {create_progress_bar(disk_used, disk_total, '')}{trend('disk', 100)}
+
+"""
+
+    if system_data.get('load_avg'):
+        load = system_data['load_avg']
+        load_scale = max([system_data.get('cpu_count') or 1] + (history.values('load') if history is not None else []))
+        sys_content += f"""  {Colors.BOLD}Load Average:{Colors.RESET} {load[0]:.2f}, {load[1]:.2f}, {load[2]:.2f}{trend('load', load_scale)} {Colors.DARK_GREY}<- 1, 5, 15 min{Colors.RESET}
 
 """
 
@@ -163,12 +316,23 @@ def render_dashboard(system_data, network_data):
         process_count = system_data.get('process_count', 0)
         sys_content += f"""  {Colors.BOLD}Running Processes:{Colors.RESET} {process_count} {Colors.DARK_GREY}<- Active programs{Colors.RESET}
 """
+
+    if system_data.get('top_processes'):
+        sys_content += f"""  {Colors.BOLD}Top Processes:{Colors.RESET} {Colors.DARK_GREY}<- Busiest programs by CPU{Colors.RESET}
+"""
+        for proc in system_data.get('top_processes', [])[:MAX_PROCESSES_DISPLAY]:
+            name = (proc.get('name') or '?')[:24]
+            cpu = proc.get('cpu_percent') or 0
+            mem = proc.get('memory_percent') or 0
+            color = get_color_for_percentage(cpu, CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD)
+            sys_content += f"""    {Colors.RED}●{Colors.RESET} {proc.get('pid', 0):>7} {name:<24} {color}{cpu:5.1f}%{Colors.RESET} CPU {mem:5.1f}% MEM
+"""
     
     sys_section = create_section("System Information", sys_content, Colors.DARK_VIOLET)
-    print(sys_section)
+    output.append(sys_section)
 
     # Network Information Section
-    net_content = ""
+    net_content = ''.join(line + '\n' for line in build_health_lines(health, 'network'))
     
     if network_data.get('interfaces'):
         net_content += f"""  {Colors.BOLD}Network Interfaces:{Colors.RESET} {Colors.DARK_GREY}<- Your network adapters{Colors.RESET}
@@ -183,6 +347,9 @@ def render_dashboard(system_data, network_data):
 
     if network_data.get('connections'):
         conn_count = len(network_data.get('connections', []))
+        states = network_data.get('connection_states')
+        if states:
+            conn_count = sum(states.values())
         net_content += f"""  {Colors.BOLD}Active Connections:{Colors.RESET} {conn_count} {Colors.DARK_GREY}<- Current network sessions{Colors.RESET}
 """
         for conn in network_data.get('connections', [])[:5]:
@@ -194,10 +361,21 @@ def render_dashboard(system_data, network_data):
 """
 
     if network_data.get('io_stats'):
+        io_rates = network_data.get('io_rates', {})
         for iface_name, stats in list(network_data.get('io_stats', {}).items())[:3]:
             sent = format_bytes(stats.get('bytes_sent', 0))
             recv = format_bytes(stats.get('bytes_recv', 0))
-            net_content += f"""  {Colors.BOLD}{iface_name}:{Colors.RESET} ↑ {Colors.RED}{sent}{Colors.RESET} ↓ {Colors.BLUE}{recv}{Colors.RESET} {Colors.DARK_GREY}<- Network traffic{Colors.RESET}
+            rates = io_rates.get(iface_name)
+            if rates:
+                net_content += f"""  {Colors.BOLD}{iface_name}:{Colors.RESET} ↑ {Colors.RED}{format_rate(rates['bytes_sent'])}{Colors.RESET} ↓ {Colors.BLUE}{format_rate(rates['bytes_recv'])}{Colors.RESET} {Colors.DARK_GREY}({sent} / {recv} total) <- Network traffic{Colors.RESET}
+"""
+                sent_trend = trend(f'net_sent:{iface_name}', color=Colors.RED)
+                recv_trend = trend(f'net_recv:{iface_name}', color=Colors.BLUE)
+                if sent_trend:
+                    net_content += f"""   ↑{sent_trend}   ↓{recv_trend}
+"""
+            else:
+                net_content += f"""  {Colors.BOLD}{iface_name}:{Colors.RESET} ↑ {Colors.RED}{sent}{Colors.RESET} ↓ {Colors.BLUE}{recv}{Colors.RESET} {Colors.DARK_GREY}<- Network traffic{Colors.RESET}
 """
 
     if not net_content:
@@ -205,15 +383,22 @@ def render_dashboard(system_data, network_data):
 """
     
     net_section = create_section("Network Information", net_content, Colors.BLUE)
-    print(net_section)
+    output.append(net_section)
 
     # Footer
     width = get_terminal_size()[0] - 4
     width = max(width, 60)
-    footer_text = "Press 'q' to quit | 'r' to refresh | Auto-refresh every 1.5s"
+    if footer_text is None:
+        if pacer is not None:
+            refresh = f"Auto-refresh every {pacer.period:.1f}s ({pacer.reason})"
+        else:
+            refresh = f"Auto-refresh every {REFRESH_INTERVAL:.1f}s"
+        footer_text = f"Press 'q' to quit | 'r' to refresh | 'p' for profile | {refresh}"
     centered_footer = footer_text.center(width)
     separator = f"{Colors.DARK_GREY}{'═' * width}{Colors.RESET}"
 
-    print(separator)
-    print(f"{Colors.BLUE}{centered_footer}{Colors.RESET}")
-    print(separator)
\ No newline at end of file
+    output.append(separator)
+    output.append(f"{Colors.BLUE}{centered_footer}{Colors.RESET}")
+    output.append(separator)
+
+    return '\n'.join(output).split('\n')
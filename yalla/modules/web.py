@@ -0,0 +1,298 @@
+"""
+Web Module
+A browser dashboard: one static page plus snapshot deltas over a WebSocket
+
+`yalla web` runs an asyncio server using only the standard library. It
+serves the page from web_page.py at / and upgrades /ws to a WebSocket
+(RFC 6455; the handshake and framing are done by hand). Every collection
+pass becomes one frame, the same full/delta frames yalla agent streams,
+encoded once on the collector thread and written as the same bytes to
+every client, so each additional browser costs a socket write and nothing
+more. A client that falls too far behind is disconnected; the page
+reconnects and starts over from a full frame.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import socket
+import struct
+import threading
+
+from yalla.config import Colors, WEB_ADDRESS
+from yalla.config import CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD
+from yalla.config import MEMORY_WARNING_THRESHOLD, MEMORY_CRITICAL_THRESHOLD
+from yalla.config import DISK_WARNING_THRESHOLD, DISK_CRITICAL_THRESHOLD
+from yalla.modules.agent import full_frame, delta_frame, parse_target
+from yalla.modules.snapshot import Snapshot
+
+# Appended to the client's key to prove the server speaks WebSocket (RFC 6455, 1.3)
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+TEXT, CLOSE, PING, PONG = 0x1, 0x8, 0x9, 0xA
+
+# Network fields the page does not show; leaving them out keeps the deltas small
+UNUSED_FIELDS = ('connections', 'interfaces', 'io_stats')
+
+# Bytes a client may leave unread before it is disconnected
+CLIENT_BUFFER_LIMIT = 1024 * 1024
+
+# Largest message accepted from a browser; the page only sends close frames
+CLIENT_MESSAGE_LIMIT = 64 * 1024
+
+# Seconds a connection may take to send its request headers
+REQUEST_TIMEOUT = 10
+
+
+def accept_key(key):
+    """Sec-WebSocket-Accept value for a client's Sec-WebSocket-Key"""
+    return base64.b64encode(hashlib.sha1(key.encode('ascii') + WEBSOCKET_GUID).digest()).decode('ascii')
+
+
+def encode_message(payload, opcode=TEXT):
+    """One unmasked, unfragmented server frame"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def encode_frame(frame):
+    """A full or delta frame as a WebSocket text message"""
+    return encode_message(json.dumps(frame, separators=(',', ':'), default=str).encode('utf-8'))
+
+
+def unmask(payload, mask):
+    """Payload of a masked client frame"""
+    if not payload:
+        return payload
+    key = (mask * (len(payload) // 4 + 1))[:len(payload)]
+    return (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(len(payload), 'big')
+
+
+async def read_message(reader):
+    """(opcode, payload) of the next frame from a client"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if not second & 0x80:
+        raise ValueError('client frames must be masked')
+    if length > CLIENT_MESSAGE_LIMIT:
+        raise ValueError(f'client frame of {length} bytes')
+    mask = await reader.readexactly(4)
+    return first & 0x0F, unmask(await reader.readexactly(length), mask)
+
+
+def parse_request(head):
+    """(method, path, {lowercase header: value}) from the request line and headers"""
+    lines = head.decode('latin-1').split('\r\n')
+    method, path, _ = lines[0].split(' ', 2)
+    headers = {}
+    for line in lines[1:]:
+        name, sep, value = line.partition(':')
+        if sep:
+            headers[name.strip().lower()] = value.strip()
+    return method, path, headers
+
+
+def http_response(status, body=b'', content_type='text/plain; charset=utf-8'):
+    """A complete HTTP/1.1 response that closes the connection"""
+    return (f'HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n'
+            'Cache-Control: no-cache\r\nConnection: close\r\n\r\n').encode('latin-1') + body
+
+
+def render_page():
+    """The page with the config's thresholds filled in"""
+    from yalla.modules.web_page import PAGE
+
+    thresholds = {'cpu': [CPU_WARNING_THRESHOLD, CPU_CRITICAL_THRESHOLD],
+                  'memory': [MEMORY_WARNING_THRESHOLD, MEMORY_CRITICAL_THRESHOLD],
+                  'disk': [DISK_WARNING_THRESHOLD, DISK_CRITICAL_THRESHOLD]}
+    return PAGE.replace('__THRESHOLDS__', json.dumps(thresholds)).encode('utf-8')
+
+
+def page_snapshot(snapshot):
+    """`snapshot` without the fields the page does not show"""
+    network = {key: value for key, value in snapshot.network.items() if key not in UNUSED_FIELDS}
+    return Snapshot(snapshot.timestamp, snapshot.system, network, snapshot.health or {})
+
+
+def same_origin(headers):
+    """False when a page from another site opens the socket (the browser always sends Origin)"""
+    origin = headers.get('origin')
+    if origin is None:
+        return True
+    return origin.partition('://')[2].rstrip('/') == headers.get('host', '')
+
+
+class WebServer:
+    """Serves the page and fans every published snapshot out to the connected browsers"""
+
+    def __init__(self, host_name=None):
+        self.host_name = host_name or socket.gethostname()
+        self.page = http_response('200 OK', render_page(), 'text/html; charset=utf-8')
+        self.clients = set()  # StreamWriters; only touched on the event loop
+        self.loop = None
+        self._snapshot = None
+        self._full = None  # Encoded full frame of _snapshot, built when a client needs it
+        self._lock = threading.Lock()
+
+    def publish(self, snapshot, ran=None):
+        """Collector subscriber: encode the change once and queue it to every client"""
+        snapshot = page_snapshot(snapshot)
+        with self._lock:
+            previous, self._snapshot = self._snapshot, snapshot
+            self._full = None
+            if previous is None:
+                frame = self._full_frame(snapshot)
+            else:
+                frame = delta_frame(previous, snapshot)
+                if snapshot.health != previous.health:
+                    frame['health'] = snapshot.health
+            data = encode_frame(frame)
+            # Scheduled under the lock so frames reach the loop in publishing order
+            if self.loop is not None:
+                self.loop.call_soon_threadsafe(self.broadcast, data)
+
+    def _full_frame(self, snapshot):
+        frame = full_frame(snapshot, self.host_name)
+        frame['health'] = snapshot.health
+        return frame
+
+    def full_message(self):
+        """Encoded full frame of the latest snapshot, or None before the first one"""
+        with self._lock:
+            if self._snapshot is not None and self._full is None:
+                self._full = encode_frame(self._full_frame(self._snapshot))
+            return self._full
+
+    def broadcast(self, data):
+        """Write one encoded frame to every client"""
+        for writer in list(self.clients):
+            if writer.transport.get_write_buffer_size() > CLIENT_BUFFER_LIMIT:
+                # Its next frame would be a delta against data it never got
+                self.clients.discard(writer)
+                writer.transport.abort()
+                continue
+            writer.write(data)
+
+    async def handle(self, reader, writer):
+        """Serve one connection: the page, or a WebSocket until the browser leaves"""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), REQUEST_TIMEOUT)
+            method, path, headers = parse_request(head)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ConnectionError, ValueError):
+            writer.close()
+            return
+        path = path.partition('?')[0]
+        if method != 'GET':
+            writer.write(http_response('405 Method Not Allowed', b'GET only\n'))
+        elif path in ('/', '/index.html'):
+            writer.write(self.page)
+        elif path == '/ws':
+            await self.serve_websocket(reader, writer, headers)
+            return
+        else:
+            writer.write(http_response('404 Not Found', b'Not found\n'))
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def serve_websocket(self, reader, writer, headers):
+        """Complete the handshake, then stream frames and answer pings until the client closes"""
+        key = headers.get('sec-websocket-key')
+        if (headers.get('upgrade', '').lower() != 'websocket' or not key
+                or 'upgrade' not in headers.get('connection', '').lower()):
+            writer.write(http_response('400 Bad Request', b'WebSocket upgrade expected\n'))
+        elif headers.get('sec-websocket-version') != '13':
+            writer.write(http_response('400 Bad Request', b'WebSocket version 13 expected\n'))
+        elif not same_origin(headers):
+            writer.write(http_response('403 Forbidden', b'Cross-origin WebSocket refused\n'))
+        else:
+            writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                         b'Sec-WebSocket-Accept: ' + accept_key(key).encode('ascii') + b'\r\n\r\n')
+            full = self.full_message()
+            if full is not None:
+                writer.write(full)
+            self.clients.add(writer)
+            try:
+                while True:
+                    opcode, payload = await read_message(reader)
+                    if opcode == CLOSE:
+                        writer.write(encode_message(payload[:2], CLOSE))
+                        break
+                    if opcode == PING:
+                        writer.write(encode_message(payload, PONG))
+            except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+                pass
+            finally:
+                self.clients.discard(writer)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        writer.close()
+
+    async def serve(self, host, port, ready=None):
+        """Listen until cancelled; `ready`, if given, is called with the bound address"""
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self.handle, host or None, port)
+        if ready is not None:
+            ready(server.sockets[0].getsockname())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.loop = None
+            for writer in list(self.clients):
+                writer.close()
+            self.clients.clear()
+
+
+def run_web(address=WEB_ADDRESS):
+    """Collect in the background and serve the web dashboard until interrupted"""
+    import signal
+    from yalla.modules.collector import BackgroundCollector
+
+    try:
+        host, port = parse_target(address, default_port=None)
+        if port is None:
+            raise ValueError('a port is required')
+    except ValueError as e:
+        print(f"{Colors.RED}Invalid address {address}: {e}{Colors.RESET}")
+        return 1
+
+    def terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    def ready(bound):
+        shown = host or '*'
+        print(f"{Colors.BLUE}Dashboard on http://{shown}:{bound[1]}/{Colors.RESET} "
+              f"{Colors.DARK_GREY}(Ctrl+C to stop){Colors.RESET}")
+
+    signal.signal(signal.SIGTERM, terminate)
+    server = WebServer()
+    collector = BackgroundCollector()
+    collector.subscribe(server.publish)
+    collector.start()
+    try:
+        asyncio.run(server.serve(host, port, ready))
+    except KeyboardInterrupt:
+        pass
+    except OSError as e:
+        print(f"{Colors.RED}Cannot listen on {address}: {e}{Colors.RESET}")
+        return 1
+    finally:
+        collector.stop()
+    return 0
@@ -0,0 +1,187 @@
+"""
+Web Page Module
+The single page served by yalla web
+
+The page opens a WebSocket to /ws, applies the full and delta frames
+with the same rules as agent.merge_delta() and redraws at most once per
+animation frame. It reconnects with backoff and starts over from the full
+frame the server sends to every new client. __THRESHOLDS__ is replaced
+with the warning and critical thresholds from the config.
+"""
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>yalla</title>
+<style>
+  :root { --bg: #101014; --panel: #1a1a22; --text: #e4e4ea; --dim: #7c7c8a; --accent: #9d7cd8;
+          --ok: #4ec970; --warn: #e5c07b; --crit: #e06c75; }
+  * { box-sizing: border-box; }
+  body { margin: 0; padding: 2vmin; background: var(--bg); color: var(--text);
+         font: 2vmin/1.4 ui-monospace, SFMono-Regular, Menlo, Consolas, monospace; }
+  header { display: flex; justify-content: space-between; align-items: baseline; margin-bottom: 2vmin; }
+  header h1 { margin: 0; color: var(--accent); font-size: 4vmin; }
+  #status { color: var(--dim); }
+  #status.live::before { content: "\\25CF "; color: var(--ok); }
+  #status.down::before { content: "\\25CF "; color: var(--crit); }
+  main { display: grid; grid-template-columns: repeat(auto-fit, minmax(40ch, 1fr)); gap: 2vmin; }
+  section { background: var(--panel); border-radius: 1vmin; padding: 1.5vmin 2vmin; }
+  h2 { margin: 0 0 1vmin; font-size: 2.2vmin; color: var(--accent); font-weight: normal; }
+  .gauge { margin: 1vmin 0; }
+  .gauge .label { display: flex; justify-content: space-between; }
+  .gauge .value { font-size: 3.5vmin; }
+  .bar { height: 1.2vmin; background: #2a2a36; border-radius: 0.6vmin; overflow: hidden; }
+  .bar div { height: 100%; width: 0; transition: width 0.4s; }
+  .ok { color: var(--ok); } .warn { color: var(--warn); } .crit { color: var(--crit); }
+  .bar .ok { background: var(--ok); } .bar .warn { background: var(--warn); } .bar .crit { background: var(--crit); }
+  table { width: 100%; border-collapse: collapse; }
+  td, th { padding: 0.2vmin 0.6vmin; text-align: right; white-space: nowrap; }
+  td:first-child, th:first-child { text-align: left; }
+  th { color: var(--dim); font-weight: normal; }
+  .dim { color: var(--dim); }
+  #problems { color: var(--warn); }
+</style>
+</head>
+<body>
+<header><h1 id="host">yalla</h1><span id="status" class="down">connecting</span></header>
+<div id="problems"></div>
+<main>
+  <section><h2>System</h2><div id="gauges"></div><table id="stats"></table></section>
+  <section><h2>Top processes</h2><table id="processes"></table></section>
+  <section><h2>Throughput</h2><table id="rates"></table></section>
+  <section><h2>Connections</h2><table id="states"></table></section>
+</main>
+<script>
+"use strict";
+const THRESHOLDS = __THRESHOLDS__;
+let state = null;
+let pending = false;
+
+function isObject(value) {
+  return value !== null && typeof value === "object" && !Array.isArray(value);
+}
+
+function merge(values, delta) {
+  for (const [key, value] of Object.entries(delta)) {
+    if (key === "__removed__") {
+      for (const removed of value) delete values[removed];
+    } else if (isObject(value) && isObject(values[key])) {
+      merge(values[key], value);
+    } else {
+      values[key] = value;
+    }
+  }
+}
+
+function apply(frame) {
+  if (frame.type === "full") {
+    state = {host: frame.host, timestamp: frame.timestamp, system: frame.system,
+             network: frame.network, health: frame.health || {}};
+  } else if (state !== null) {
+    state.timestamp = frame.timestamp;
+    if (frame.system) merge(state.system, frame.system);
+    if (frame.network) merge(state.network, frame.network);
+    if ("health" in frame) state.health = frame.health || {};
+  }
+  if (!pending) {
+    pending = true;
+    requestAnimationFrame(() => { pending = false; render(); });
+  }
+}
+
+function bytes(value) {
+  const units = ["B", "KB", "MB", "GB", "TB"];
+  let i = 0;
+  while (value >= 1024 && i < units.length - 1) { value /= 1024; i++; }
+  return value.toFixed(i ? 1 : 0) + " " + units[i];
+}
+
+function level(value, limits) {
+  return value >= limits[1] ? "crit" : value >= limits[0] ? "warn" : "ok";
+}
+
+function escape(text) {
+  return String(text).replace(/[&<>"]/g, c => ({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"}[c]));
+}
+
+function rows(headers, items) {
+  const head = headers.length ? "<tr>" + headers.map(h => `<th>${h}</th>`).join("") + "</tr>" : "";
+  return head + items.map(cells => "<tr>" + cells.map(c => `<td>${c}</td>`).join("") + "</tr>").join("");
+}
+
+function gauge(name, percent, detail, limits) {
+  const cls = level(percent, limits);
+  return `<div class="gauge"><div class="label"><span>${name} <span class="dim">${detail}</span></span>` +
+         `<span class="value ${cls}">${percent.toFixed(1)}%</span></div>` +
+         `<div class="bar"><div class="${cls}" style="width:${Math.min(100, percent)}%"></div></div></div>`;
+}
+
+function uptime(seconds) {
+  const days = Math.floor(seconds / 86400), hours = Math.floor(seconds % 86400 / 3600);
+  return days ? `${days}d ${hours}h` : `${hours}h ${Math.floor(seconds % 3600 / 60)}m`;
+}
+
+function render() {
+  if (state === null) return;
+  const s = state.system, n = state.network;
+  document.getElementById("host").textContent = state.host;
+  document.title = `yalla \\u2013 ${state.host}`;
+
+  let gauges = "";
+  if (s.cpu_percent !== undefined)
+    gauges += gauge("CPU", s.cpu_percent, s.cpu_count ? `${s.cpu_count} cores` : "", THRESHOLDS.cpu);
+  if (s.memory_percent !== undefined)
+    gauges += gauge("Memory", s.memory_percent, `${bytes(s.memory_used)} / ${bytes(s.memory_total)}`, THRESHOLDS.memory);
+  if (s.disk_percent !== undefined)
+    gauges += gauge("Disk", s.disk_percent, `${bytes(s.disk_used)} / ${bytes(s.disk_total)}`, THRESHOLDS.disk);
+  document.getElementById("gauges").innerHTML = gauges;
+
+  const stats = [];
+  if (s.load_avg) stats.push(["Load", s.load_avg.map(v => v.toFixed(2)).join(" ")]);
+  if (s.process_count !== undefined) stats.push(["Processes", s.process_count]);
+  if (s.uptime !== undefined) stats.push(["Uptime", uptime(s.uptime)]);
+  document.getElementById("stats").innerHTML = rows([], stats);
+
+  const processes = (s.top_processes || []).map(p =>
+    [escape(p.name), p.pid, `<span class="${level(p.cpu_percent, THRESHOLDS.cpu)}">${p.cpu_percent.toFixed(1)}%</span>`,
+     `${p.memory_percent.toFixed(1)}%`]);
+  document.getElementById("processes").innerHTML = rows(["Name", "PID", "CPU", "Mem"], processes);
+
+  const rates = Object.entries(n.io_rates || {}).map(([name, r]) =>
+    [escape(name), bytes(r.bytes_sent || 0) + "/s", bytes(r.bytes_recv || 0) + "/s",
+     `${Math.round(r.packets_sent || 0)} / ${Math.round(r.packets_recv || 0)}`]);
+  document.getElementById("rates").innerHTML = rows(["Interface", "Sent", "Received", "Packets/s"], rates);
+
+  const states = Object.entries(n.connection_states || {}).sort((a, b) => b[1] - a[1]).map(([name, count]) =>
+    [escape(name), count]);
+  document.getElementById("states").innerHTML = rows(["State", "Count"], states);
+
+  const problems = Object.entries(state.health).map(([name, h]) =>
+    `\\u26A0 ${escape(name)}: ${escape(h.error)}` + (h.retry_at ? " (paused)" : ""));
+  document.getElementById("problems").innerHTML = problems.join("<br>");
+
+  const status = document.getElementById("status");
+  status.className = "live";
+  status.textContent = new Date(state.timestamp * 1000).toLocaleTimeString();
+}
+
+function connect(delay) {
+  const scheme = location.protocol === "https:" ? "wss:" : "ws:";
+  const socket = new WebSocket(`${scheme}//${location.host}/ws`);
+  socket.onopen = () => { delay = 1000; };
+  socket.onmessage = event => apply(JSON.parse(event.data));
+  socket.onclose = () => {
+    const status = document.getElementById("status");
+    status.className = "down";
+    status.textContent = "reconnecting";
+    setTimeout(() => connect(Math.min(delay * 2, 30000)), delay);
+  };
+}
+
+connect(1000);
+</script>
+</body>
+</html>
+"""